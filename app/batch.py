@@ -0,0 +1,88 @@
+import asyncio
+import time
+from typing import AsyncIterator, Awaitable, Callable, List
+
+from app import config
+
+
+class BatchRunner:
+    """Runs the root crawls of every batch request under one process-wide limit.
+
+    Roots of all in-flight batches wait on the same semaphore, so the
+    browser pool and the host scheduler see a steady number of crawls no
+    matter how many batches are open. A failing root only fails its own
+    result.
+    """
+
+    def __init__(self, concurrency: int = config.BATCH_CONCURRENCY):
+        self.concurrency = max(1, concurrency)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self.queued = 0
+        self.active = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    async def stream(self, urls: List[str], crawl: Callable[[str], Awaitable]) -> AsyncIterator[dict]:
+        """Yield one "result" event per url, in completion order, then a "done" event.
+
+        Closing the generator cancels the roots that have not finished and
+        waits until they have unwound.
+        """
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(self._run(index, url, crawl)) for index, url in enumerate(urls)]
+        failed = 0
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                event = await next_result
+                failed += event["status"] != 200
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+            # The cancelled roots give back their slots and browsers before the stream ends
+            await asyncio.gather(*tasks, return_exceptions=True)
+        yield {
+            "event": "done",
+            "total": len(urls),
+            "succeeded": len(urls) - failed,
+            "failed": failed,
+            "elapsedMs": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "queued": self.queued,
+            "active": self.active,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+        }
+
+    async def _run(self, index: int, url: str, crawl: Callable[[str], Awaitable]) -> dict:
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.active += 1
+        start = time.perf_counter()
+        try:
+            data = await crawl(url)
+        except Exception as e:
+            self.failed += 1
+            return self._event(index, url, start, status=500, data=None, message=str(e))
+        finally:
+            self.active -= 1
+            self._slots.release()
+        self.succeeded += 1
+        return self._event(index, url, start, status=200, data=data, message="Successfully crawled.")
+
+    @staticmethod
+    def _event(index: int, url: str, start: float, **fields) -> dict:
+        return {
+            "event": "result",
+            "index": index,
+            "url": url,
+            **fields,
+            "elapsedMs": round((time.perf_counter() - start) * 1000, 1),
+        }
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Optional
+
+from crawl4ai import AsyncWebCrawler
+from crawl4ai.async_configs import BrowserConfig
+
+from app import config
+from app.resources import route_resources
+
+logger = logging.getLogger(__name__)
+
+
+class PooledBrowser:
+    def __init__(self, crawler: AsyncWebCrawler):
+        self.crawler = crawler
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+
+    def is_healthy(self) -> bool:
+        if not self.crawler.ready:
+            return False
+        strategy = getattr(self.crawler, "crawler_strategy", None)
+        manager = getattr(strategy, "browser_manager", None)
+        browser = getattr(manager, "browser", None)
+        if browser is None:
+            # Persistent/managed contexts have no separate Browser handle
+            return manager is not None
+        return browser.is_connected()
+
+    def is_expired(self, idle_ttl: float, max_uses: int) -> bool:
+        if idle_ttl and time.monotonic() - self.last_used > idle_ttl:
+            return True
+        return bool(max_uses) and self.uses >= max_uses
+
+
+class BrowserPool:
+    """Fixed-size pool of warm AsyncWebCrawler instances leased per request."""
+
+    def __init__(
+        self,
+        size: int = config.BROWSER_POOL_SIZE,
+        idle_ttl: float = config.BROWSER_IDLE_TTL,
+        max_uses: int = config.BROWSER_MAX_USES,
+        health_interval: float = config.BROWSER_HEALTH_INTERVAL,
+        lease_timeout: float = config.BROWSER_LEASE_TIMEOUT,
+        browser_config_factory: Callable[[], BrowserConfig] = BrowserConfig,
+    ):
+        self.size = max(1, size)
+        self.idle_ttl = idle_ttl
+        self.max_uses = max_uses
+        self.health_interval = health_interval
+        self.lease_timeout = lease_timeout
+        self.browser_config_factory = browser_config_factory
+
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._leased = 0
+        self._replaced = 0
+        self._missing = 0
+        self._maintenance_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def start(self):
+        # Each browser can be leased as soon as it is up; slots that failed to launch are
+        # refilled by the maintenance loop, unless none launched at all
+        async def launch():
+            self._idle.put_nowait(await self._launch())
+
+        results = await asyncio.gather(*(launch() for _ in range(self.size)), return_exceptions=True)
+        failures = [result for result in results if isinstance(result, Exception)]
+        if len(failures) == self.size:
+            raise failures[0]
+        for failure in failures:
+            logger.warning("Failed to launch pooled browser: %s", failure)
+        self._missing += len(failures)
+        if self.health_interval:
+            self._maintenance_task = asyncio.create_task(self._maintain())
+        return self
+
+    async def close(self):
+        self._closed = True
+        if self._maintenance_task:
+            self._maintenance_task.cancel()
+            try:
+                await self._maintenance_task
+            except asyncio.CancelledError:
+                pass
+        while not self._idle.empty():
+            await self._shutdown(self._idle.get_nowait())
+
+    @asynccontextmanager
+    async def lease(self, timeout: Optional[float] = None):
+        # timeout (e.g. what is left of a request deadline) can only shorten lease_timeout
+        browser = await self._acquire(timeout)
+        self._leased += 1
+        try:
+            yield browser.crawler
+        finally:
+            self._leased -= 1
+            browser.uses += 1
+            browser.last_used = time.monotonic()
+            await self._release(browser)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "leased": self._leased,
+            "replaced": self._replaced,
+            "missing": self._missing,
+        }
+
+    async def _acquire(self, timeout: Optional[float] = None) -> PooledBrowser:
+        if timeout is None or (self.lease_timeout and timeout > self.lease_timeout):
+            timeout = self.lease_timeout
+        browser = await asyncio.wait_for(self._idle.get(), timeout=timeout)
+        if browser.is_expired(self.idle_ttl, self.max_uses) or not browser.is_healthy():
+            browser = await self._replace(browser)
+        return browser
+
+    async def _release(self, browser: PooledBrowser):
+        if self._closed:
+            await self._shutdown(browser)
+            return
+        if not browser.is_healthy():
+            try:
+                browser = await self._replace(browser)
+            except Exception as e:
+                logger.warning("Failed to replace crashed browser: %s", e)
+                return
+        self._idle.put_nowait(browser)
+
+    async def _launch(self) -> PooledBrowser:
+        crawler = AsyncWebCrawler(config=self.browser_config_factory())
+        # Every run's ResourcePolicy (if any) is applied on navigation
+        crawler.crawler_strategy.set_hook("before_goto", route_resources)
+        await crawler.start()
+        return PooledBrowser(crawler)
+
+    async def _replace(self, browser: PooledBrowser) -> PooledBrowser:
+        self._replaced += 1
+        replacement = None
+        try:
+            await self._shutdown(browser)
+            replacement = await self._launch()
+            return replacement
+        finally:
+            if replacement is None:
+                # Failed or cancelled (a deadline or a client disconnect): the slot is
+                # refilled by the maintenance loop
+                self._missing += 1
+
+    async def _shutdown(self, browser: PooledBrowser):
+        try:
+            await browser.crawler.close()
+        except Exception as e:
+            logger.warning("Failed to close pooled browser: %s", e)
+
+    async def _maintain(self):
+        # Recycle idle browsers that crashed or sat unused past their TTL
+        while not self._closed:
+            await asyncio.sleep(self.health_interval)
+            while self._missing:
+                try:
+                    self._idle.put_nowait(await self._launch())
+                except Exception as e:
+                    logger.warning("Failed to refill browser pool: %s", e)
+                    break
+                self._missing -= 1
+            for _ in range(self._idle.qsize()):
+                try:
+                    browser = self._idle.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                try:
+                    if browser.is_expired(self.idle_ttl, self.max_uses) or not browser.is_healthy():
+                        browser = await self._replace(browser)
+                except Exception as e:
+                    logger.warning("Failed to replace idle browser: %s", e)
+                    continue
+                self._idle.put_nowait(browser)
@@ -0,0 +1,310 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from app import config
+from app.hosts import HostScheduler
+from app.payload import dumps, loads
+from app.urls import normalize_url
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("use", "bypass", "refresh")
+# The disk tier re-reads its stored size whenever this much of max_bytes was written here,
+# since other workers may write to the same file
+SYNC_FRACTION = 0.05
+
+
+class CacheEntry:
+    def __init__(self, value, stored_at: float, size: int, etag: str = None, last_modified: str = None):
+        self.value = value
+        self.stored_at = stored_at
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class SQLiteTier:
+    """On-disk second tier; calls run in a thread so the event loop never blocks.
+
+    Entries too old to be revalidated are dropped as others are written, and
+    past max_bytes the least recently used go, down to 90% of it. The size
+    is re-read from SQLite before evicting and every SYNC_FRACTION of
+    max_bytes written, as several workers may share the file.
+    """
+
+    def __init__(self, path: str, max_bytes: int = config.RESULT_CACHE_DISK_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = asyncio.Lock()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, "
+            "etag TEXT, last_modified TEXT, size INTEGER NOT NULL DEFAULT 0, used_at REAL NOT NULL DEFAULT 0)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(results)")]
+        if "size" not in columns:
+            self._conn.execute("ALTER TABLE results ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("ALTER TABLE results ADD COLUMN used_at REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE results SET size = LENGTH(value), used_at = stored_at")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_stored_at ON results (stored_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_used_at ON results (used_at)")
+        self._conn.commit()
+        self.bytes = self._stored_bytes()
+        self._written = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        async with self._lock:
+            row = await asyncio.to_thread(self._get, key)
+        if not row:
+            return None
+        value, stored_at, etag, last_modified = row
+        return CacheEntry(loads(value), stored_at, len(value), etag, last_modified)
+
+    async def set(self, key: str, payload: bytes, entry: CacheEntry, oldest: float):
+        async with self._lock:
+            await asyncio.to_thread(self._set, key, payload, entry, oldest)
+
+    async def delete(self, key: str):
+        async with self._lock:
+            await asyncio.to_thread(self._delete, key)
+
+    def close(self):
+        self._conn.close()
+
+    def _get(self, key):
+        row = self._conn.execute(
+            "SELECT value, stored_at, etag, last_modified FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row:
+            self._conn.execute("UPDATE results SET used_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return row
+
+    def _set(self, key, payload, entry, oldest):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results (key, value, stored_at, etag, last_modified, size, used_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, payload, entry.stored_at, entry.etag, entry.last_modified, len(payload), entry.stored_at),
+        )
+        # Entries too old to be revalidated are useless on disk
+        self._conn.execute("DELETE FROM results WHERE stored_at < ?", (oldest,))
+        self._conn.commit()
+        # Replaced and pruned rows are counted until the next re-read, which errs on the side of evicting
+        self.bytes += len(payload)
+        self._written += len(payload)
+        if self.bytes > self.max_bytes or self._written > self.max_bytes * SYNC_FRACTION:
+            self.bytes = self._stored_bytes()
+            self._written = 0
+            if self.bytes > self.max_bytes:
+                self._evict()
+
+    def _stored_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def _evict(self):
+        # Least recently used first, down to 90% of the limit
+        target = self.max_bytes * 0.9
+        remaining = self.bytes
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM results ORDER BY used_at"):
+            if remaining <= target:
+                break
+            doomed.append((key,))
+            remaining -= size
+        self._conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+        self._conn.commit()
+        self.bytes = self._stored_bytes()
+        self.evictions += len(doomed)
+
+    def _delete(self, key):
+        self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+        self._conn.commit()
+
+
+class ResultCache:
+    """Response-level cache for /crawl and /crawl/deep.
+
+    Fresh entries (younger than ttl) are served directly. Stale entries are
+    kept for max_stale more seconds and revalidated against the root page's
+    ETag/Last-Modified before falling back to a full crawl.
+    """
+
+    def __init__(
+        self,
+        ttl: float = config.RESULT_CACHE_TTL,
+        max_stale: float = config.RESULT_CACHE_MAX_STALE,
+        max_bytes: int = config.RESULT_CACHE_MAX_BYTES,
+        sqlite_path: str = config.RESULT_CACHE_SQLITE_PATH,
+        disk_max_bytes: int = config.RESULT_CACHE_DISK_MAX_BYTES,
+    ):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_bytes = max_bytes
+        self.disk = SQLiteTier(sqlite_path, disk_max_bytes) if sqlite_path else None
+
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "stores": 0,
+            "evictions": 0,
+            "disk_hits": 0,
+        }
+
+    @staticmethod
+    def make_key(kind: str, url: str, **params) -> str:
+        normalized = {
+            name: sorted(value) if isinstance(value, (list, tuple)) else value
+            for name, value in params.items()
+        }
+        return json.dumps([kind, normalize_url(url), normalized], sort_keys=True)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        url: str,
+        mode: str,
+        compute: Callable[[dict], Awaitable],
+        http_client: Optional[httpx.AsyncClient] = None,
+        hosts: Optional[HostScheduler] = None,
+    ):
+        """compute(validators) runs the crawl and fills validators with the root page's ETag/Last-Modified.
+
+        Results marked "partial" (cut by a request deadline, or missing a failed
+        extraction) are returned but never stored.
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}")
+
+        if mode == "use":
+            entry = await self.get(key)
+            if entry is not None:
+                age = time.time() - entry.stored_at
+                if age < self.ttl:
+                    self.counters["hits"] += 1
+                    return entry.value
+                if entry.has_validators and http_client and await self._not_modified(url, entry, http_client, hosts):
+                    self.counters["revalidated"] += 1
+                    await self.set(key, entry.value, {"etag": entry.etag, "last_modified": entry.last_modified})
+                    return entry.value
+
+        self.counters["misses"] += 1
+        validators = {}
+        value = await compute(validators)
+        if mode != "bypass" and not (isinstance(value, dict) and value.get("partial")):
+            await self.set(key, value, validators)
+        return value
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        elif self.disk:
+            entry = await self.disk.get(key)
+            if entry is not None:
+                self.counters["disk_hits"] += 1
+                self._remember(key, entry)
+
+        if entry is not None and time.time() - entry.stored_at > self.ttl + self.max_stale:
+            await self.delete(key)
+            return None
+        return entry
+
+    async def set(self, key: str, value, validators: dict):
+        payload = dumps(value)
+        entry = CacheEntry(
+            value,
+            time.time(),
+            len(payload),
+            validators.get("etag"),
+            validators.get("last_modified"),
+        )
+        self.counters["stores"] += 1
+        self._remember(key, entry)
+        if self.disk:
+            await self.disk.set(key, payload, entry, entry.stored_at - self.ttl - self.max_stale)
+
+    async def delete(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        if self.disk:
+            await self.disk.delete(key)
+
+    def close(self):
+        if self.disk:
+            self.disk.close()
+
+    def stats(self) -> dict:
+        stats = {
+            **self.counters,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+        if self.disk:
+            stats.update(disk_bytes=self.disk.bytes, disk_max_bytes=self.disk.max_bytes, disk_evictions=self.disk.evictions)
+        return stats
+
+    def _remember(self, key: str, entry: CacheEntry):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.counters["evictions"] += 1
+
+    async def _not_modified(self, url: str, entry: CacheEntry, http_client: httpx.AsyncClient, hosts: Optional[HostScheduler]) -> bool:
+        if hosts:
+            return await hosts.run(
+                url, lambda permit: not_modified(http_client, url, entry.etag, entry.last_modified, permit)
+            )
+        return await not_modified(http_client, url, entry.etag, entry.last_modified)
+
+
+async def not_modified(
+    http_client: httpx.AsyncClient, url: str, etag: str = None, last_modified: str = None, permit=None
+) -> bool:
+    """Conditional GET of url; True when the server answers 304 Not Modified."""
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    try:
+        # Only the status matters, so the body is never read
+        async with http_client.stream("GET", url, headers=headers) as response:
+            if permit:
+                permit.report(response.status_code, response.headers)
+            return response.status_code == 304
+    except httpx.HTTPError as e:
+        logger.info("Revalidation of %s failed: %s", url, e)
+        return False
+
+
+def response_validators(headers: Optional[dict]) -> dict:
+    headers = {name.lower(): value for name, value in (headers or {}).items()}
+    return {
+        "etag": headers.get("etag"),
+        "last_modified": headers.get("last-modified"),
+    }
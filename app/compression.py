@@ -0,0 +1,168 @@
+import asyncio
+import zlib
+from typing import Optional
+
+from app import config
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def supported_encodings() -> tuple:
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best encoding the client accepts, preferring zstd over gzip."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    for encoding in supported_encodings():
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+def merge_vary(headers: list) -> list:
+    # Accept-Encoding joins whatever Vary the app already set, instead of a second Vary header
+    values = [value.decode("latin-1") for name, value in headers if name == b"vary"]
+    fields = [field.strip() for value in values for field in value.split(",") if field.strip()]
+    if not any(field.lower() in ("accept-encoding", "*") for field in fields):
+        fields.append("Accept-Encoding")
+    return [(name, value) for name, value in headers if name != b"vary"] + [(b"vary", ", ".join(fields).encode("latin-1"))]
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, zstd_level: int):
+        if encoding == "zstd":
+            self._zstd = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+            self._gzip = None
+        else:
+            # wbits 31 writes a gzip header and trailer
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._zstd = None
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        if self._zstd is not None:
+            out = self._zstd.compress(data)
+            return out + self._zstd.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK) if flush else out
+        out = self._gzip.compress(data)
+        return out + self._gzip.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self._zstd is not None:
+            return self._zstd.flush()
+        return self._gzip.flush()
+
+    async def run(self, data: bytes, flush: bool, last: bool, thread_bytes: int) -> bytes:
+        # Calls on one compressor follow each other, so handing one to a thread is safe
+        if len(data) >= thread_bytes:
+            return await asyncio.to_thread(self._run, data, flush, last)
+        return self._run(data, flush, last)
+
+    def _run(self, data: bytes, flush: bool, last: bool) -> bytes:
+        return self.compress(data, flush) + self.finish() if last else self.compress(data, flush)
+
+
+class CompressionMiddleware:
+    """Negotiated zstd/gzip compression for JSON and text responses.
+
+    Unlike Starlette's GZipMiddleware this also speaks zstd when the
+    zstandard package is installed. Streamed responses (NDJSON/SSE) are
+    compressed chunk by chunk and flushed after every chunk, so events still
+    reach the client as soon as they are produced. Bodies and chunks of
+    thread_bytes or more are compressed in a thread, so a multi-MB result
+    does not stall the event loop.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = config.RESPONSE_COMPRESS_MIN_BYTES,
+        gzip_level: int = config.RESPONSE_GZIP_LEVEL,
+        zstd_level: int = config.RESPONSE_ZSTD_LEVEL,
+        thread_bytes: int = config.RESPONSE_COMPRESS_THREAD_BYTES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.thread_bytes = thread_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start is not None:
+                response_start, start = start, None
+                response_headers = [(name.lower(), value) for name, value in response_start.get("headers", [])]
+                content_type = dict(response_headers).get(b"content-type", b"").decode("latin-1")
+                skip = (
+                    any(name == b"content-encoding" for name, _ in response_headers)
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                )
+                if skip:
+                    await send(response_start)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding, self.gzip_level, self.zstd_level)
+                response_headers = [
+                    (name, value) for name, value in response_headers
+                    if name != b"content-length"
+                ]
+                response_headers.append((b"content-encoding", encoding.encode()))
+                response_headers = merge_vary(response_headers)
+                if not more_body:
+                    body = await compressor.run(body, False, True, self.thread_bytes)
+                    response_headers.append((b"content-length", str(len(body)).encode()))
+                    await send({**response_start, "headers": response_headers})
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send({**response_start, "headers": response_headers})
+
+            if compressor is None:
+                await send(message)
+                return
+
+            chunk = await compressor.run(body, more_body, not more_body, self.thread_bytes)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
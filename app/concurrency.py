@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable, List, Optional, Tuple
+
+from app import config
+from app.metrics import CONCURRENCY_DECISIONS
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+CGROUP_MEMORY_LIMITS = ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes")
+# cgroup v1 reports "no limit" as a huge page-aligned number
+UNLIMITED_CGROUP_BYTES = 1 << 60
+MAX_DECISIONS = 50
+
+
+def detect_memory_limit() -> int:
+    """Bytes this process may use: the container's cgroup limit, else physical memory (0 if unknown)."""
+    for path in CGROUP_MEMORY_LIMITS:
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value.isdigit() and int(value) < UNLIMITED_CGROUP_BYTES:
+            return int(value)
+    if psutil is not None:
+        return psutil.virtual_memory().total
+    return 0
+
+
+def sample_rss() -> tuple:
+    """(rss of this process, rss of its child processes: the browsers and their drivers)."""
+    if psutil is None:
+        return 0, 0
+    process = psutil.Process(os.getpid())
+    own = process.memory_info().rss
+    children = 0
+    for child in process.children(recursive=True):
+        try:
+            children += child.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return own, children
+
+
+class AdaptiveConcurrency:
+    """Process-wide limit on browser page loads that follows memory and latency.
+
+    Every rendered page, from any request, takes a slot. A sampling loop
+    reads the RSS of this process plus its children (the pooled browsers)
+    and the latency of pages that finished since the last sample: above
+    memory_high of the memory limit, or with pages slower than latency_high,
+    the limit is halved; below memory_low with callers waiting it grows by
+    one, no sooner than cooldown after a backoff. Pages already loading
+    are never interrupted, so a backoff takes effect as they finish, and
+    the limit is not halved again until it has (or cooldown has passed).
+
+    RSS of browser processes counts shared pages once per process, which
+    overstates their footprint and errs on the side of backing off. Without
+    psutil only latency drives the limit. sampler returns (process rss,
+    browser rss) and can be replaced to drive the controller in benchmarks.
+    """
+
+    def __init__(
+        self,
+        initial: int = config.ADAPTIVE_INITIAL_CONCURRENCY,
+        min_concurrency: int = config.ADAPTIVE_MIN_CONCURRENCY,
+        max_concurrency: int = config.ADAPTIVE_MAX_CONCURRENCY,
+        memory_limit: int = config.ADAPTIVE_MEMORY_LIMIT,
+        memory_high: float = config.ADAPTIVE_MEMORY_HIGH,
+        memory_low: float = config.ADAPTIVE_MEMORY_LOW,
+        latency_high: float = config.ADAPTIVE_LATENCY_HIGH,
+        interval: float = config.ADAPTIVE_INTERVAL,
+        cooldown: float = config.ADAPTIVE_COOLDOWN,
+        enabled: bool = config.ADAPTIVE_CONCURRENCY,
+        sampler: Callable[[], Tuple[int, int]] = sample_rss,
+    ):
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        # Every worker process samples only itself and its own browsers
+        self.memory_limit = memory_limit or detect_memory_limit() // config.WORKERS
+        self.memory_high = memory_high
+        self.memory_low = memory_low
+        self.latency_high = latency_high
+        self.interval = interval
+        self.cooldown = cooldown
+        self.enabled = enabled
+        self.sampler = sampler
+        start = initial if enabled else self.max_concurrency
+        self.limit = min(self.max_concurrency, max(self.min_concurrency, start))
+
+        self._changed = asyncio.Condition()
+        self._latencies: List[float] = []
+        self._backed_off_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.active = 0
+        self.waiting = 0
+        self.rss = 0
+        self.browser_rss = 0
+        self.latency = None
+        self.decisions = deque(maxlen=MAX_DECISIONS)
+
+    def start(self):
+        if self.enabled and self.interval:
+            self._task = asyncio.create_task(self._sample_loop())
+        return self
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._changed:
+            self.waiting += 1
+            try:
+                await self._changed.wait_for(lambda: self.active < self.limit)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+        try:
+            yield
+        finally:
+            async with self._changed:
+                self.active -= 1
+                self._changed.notify_all()
+
+    def observe(self, seconds: float):
+        """Report how long a page took to load in the browser."""
+        self._latencies.append(seconds)
+
+    @property
+    def memory_used(self) -> int:
+        return self.rss + self.browser_rss
+
+    async def sample(self):
+        """Read memory and recent latency, then raise, lower or keep the limit."""
+        self.rss, self.browser_rss = await asyncio.to_thread(self.sampler)
+        latencies, self._latencies = self._latencies, []
+        self.latency = sum(latencies) / len(latencies) if latencies else None
+        memory = self.memory_used / self.memory_limit if self.memory_limit and self.memory_used else None
+        now = time.monotonic()
+
+        # Back off again only once the last backoff has drained, or after a cooldown
+        settled = self.active <= self.limit or now - self._backed_off_at >= self.cooldown
+        if memory is not None and memory >= self.memory_high:
+            if settled:
+                await self._set_limit(self.limit // 2, "memory", now)
+        elif self.latency is not None and self.latency >= self.latency_high:
+            if settled:
+                await self._set_limit(self.limit // 2, "latency", now)
+        elif (
+            self.waiting
+            and (memory is None or memory < self.memory_low)
+            and now - self._backed_off_at >= self.cooldown
+        ):
+            await self._set_limit(self.limit + 1, "headroom", now)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "limit": self.limit,
+            "min_concurrency": self.min_concurrency,
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rss_bytes": self.rss,
+            "browser_rss_bytes": self.browser_rss,
+            "memory_limit_bytes": self.memory_limit,
+            "memory_ratio": round(self.memory_used / self.memory_limit, 3) if self.memory_limit else None,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "decisions": list(self.decisions),
+        }
+
+    async def _set_limit(self, limit: int, reason: str, now: float):
+        limit = min(self.max_concurrency, max(self.min_concurrency, limit))
+        if limit == self.limit:
+            return
+        action = "increase" if limit > self.limit else "decrease"
+        if action == "decrease":
+            self._backed_off_at = now
+        self.decisions.append({
+            "at": round(time.time(), 3),
+            "action": action,
+            "reason": reason,
+            "from": self.limit,
+            "to": limit,
+            "rss_bytes": self.memory_used,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+        })
+        CONCURRENCY_DECISIONS.inc(action=action, reason=reason)
+        logger.log(
+            logging.WARNING if action == "decrease" else logging.DEBUG,
+            "Browser page concurrency %d -> %d (%s)", self.limit, limit, reason,
+        )
+        async with self._changed:
+            self.limit = limit
+            self._changed.notify_all()
+
+    async def _sample_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sample()
+            except Exception as e:
+                logger.warning("Concurrency sample failed: %s", e)
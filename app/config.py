@@ -0,0 +1,163 @@
+import os
+import tempfile
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Worker processes: uvicorn starts WEB_CONCURRENCY of them (set it rather than --workers).
+# Each has its own browser pool, extraction executor, caches and politeness state, so the
+# defaults below that split the machine (extraction CPUs, the adaptive memory limit, per-host
+# and global fetch limits) are divided among the workers; the rest are per worker
+WORKERS = max(1, env_int("WEB_CONCURRENCY", 1))
+
+# Startup (see app.warmup): browsers launch after the app is up, so GET / answers at once, and
+# GET /ready passes once they have, plus with WARMUP a local fixture page was rendered by every
+# pooled browser and every extraction worker was started. With several workers, each marks
+# itself ready in READY_DIR and /ready waits for all of them
+WARMUP = env_bool("WARMUP", True)
+WARMUP_TIMEOUT = env_float("WARMUP_TIMEOUT", 60.0)
+READY_DIR = os.getenv("READY_DIR", os.path.join(tempfile.gettempdir(), "crawl4ai-ready"))
+
+# Browser pool. Each /crawl, deep crawl or batch root leases one pooled browser for its whole
+# run, so BROWSER_POOL_SIZE is how many of them render at once per worker; more wait for a lease
+BROWSER_POOL_SIZE = env_int("BROWSER_POOL_SIZE", 2)
+BROWSER_IDLE_TTL = env_float("BROWSER_IDLE_TTL", 300.0)
+BROWSER_MAX_USES = env_int("BROWSER_MAX_USES", 200)
+BROWSER_HEALTH_INTERVAL = env_float("BROWSER_HEALTH_INTERVAL", 30.0)
+BROWSER_LEASE_TIMEOUT = env_float("BROWSER_LEASE_TIMEOUT", 60.0)
+
+# Extraction executor ("process" or "thread")
+EXTRACTION_EXECUTOR = os.getenv("EXTRACTION_EXECUTOR", "process")
+EXTRACTION_WORKERS = env_int("EXTRACTION_WORKERS", max(1, (os.cpu_count() or 2) // WORKERS))
+EXTRACTION_MAX_PENDING = env_int("EXTRACTION_MAX_PENDING", 4 * EXTRACTION_WORKERS)
+EXTRACTION_TIMEOUT = env_float("EXTRACTION_TIMEOUT", 30.0)
+
+# Per-site card-grid templates reused by subpage extraction (see app.site_templates)
+EXTRACTION_TEMPLATES = env_bool("EXTRACTION_TEMPLATES", True)
+EXTRACTION_TEMPLATE_SITES = env_int("EXTRACTION_TEMPLATE_SITES", 1000)
+
+# Result cache
+RESULT_CACHE_TTL = env_float("RESULT_CACHE_TTL", 3600.0)
+RESULT_CACHE_MAX_STALE = env_float("RESULT_CACHE_MAX_STALE", 86400.0)
+RESULT_CACHE_MAX_BYTES = env_int("RESULT_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+RESULT_CACHE_SQLITE_PATH = os.getenv("RESULT_CACHE_SQLITE_PATH", "")
+# Byte budget of the on-disk tier, shared by the workers using one file
+RESULT_CACHE_DISK_MAX_BYTES = env_int("RESULT_CACHE_DISK_MAX_BYTES", 1024 * 1024 * 1024)
+
+# Content-addressed page store for incremental deep recrawls: off unless PAGE_STORE_PATH names
+# a database file, ideally on a data volume. Workers may share one file; MAX_BYTES covers pages,
+# extractions and saved frontiers together
+PAGE_STORE_PATH = os.getenv("PAGE_STORE_PATH", "")
+PAGE_STORE_MAX_BYTES = env_int("PAGE_STORE_MAX_BYTES", 512 * 1024 * 1024)
+PAGE_STORE_MAX_AGE = env_float("PAGE_STORE_MAX_AGE", 7 * 86400.0)
+
+# Shared HTTP client
+HTTP_TIMEOUT = env_float("HTTP_TIMEOUT", 15.0)
+HTTP_MAX_CONNECTIONS = env_int("HTTP_MAX_CONNECTIONS", 100)
+HTTP_USER_AGENT = os.getenv(
+    "HTTP_USER_AGENT",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+)
+HTTP_MAX_PAGE_BYTES = env_int("HTTP_MAX_PAGE_BYTES", 5 * 1024 * 1024)
+
+# Subpage fetching: "http" tries a plain HTTP fetch first, "browser" always renders
+SUBPAGE_FETCH_MODE = os.getenv("SUBPAGE_FETCH_MODE", "http")
+# Distinct subpages fetched per /crawl after dedup and ranking
+SUBPAGE_LIMIT = env_int("SUBPAGE_LIMIT", 25)
+
+# Sitemap discovery: subpage candidates from robots.txt and sitemaps, fetched before
+# (and in parallel with) the start page render (see app.discovery)
+SITEMAP_DISCOVERY = env_bool("SITEMAP_DISCOVERY", True)
+SITEMAP_TTL = env_float("SITEMAP_TTL", 3600.0)
+# Discoveries cut by SITEMAP_TIMEOUT keep what they read, but only this long, so the site gets another try
+SITEMAP_PARTIAL_TTL = env_float("SITEMAP_PARTIAL_TTL", 60.0)
+SITEMAP_TIMEOUT = env_float("SITEMAP_TIMEOUT", 5.0)
+SITEMAP_MAX_URLS = env_int("SITEMAP_MAX_URLS", 1000)
+SITEMAP_MAX_FILES = env_int("SITEMAP_MAX_FILES", 10)
+SITEMAP_MAX_DEPTH = env_int("SITEMAP_MAX_DEPTH", 2)
+SITEMAP_MAX_BYTES = env_int("SITEMAP_MAX_BYTES", 10 * 1024 * 1024)
+SITEMAP_CACHE_SITES = env_int("SITEMAP_CACHE_SITES", 256)
+
+# Deep crawl frontier scoring: "service" (path and anchor words plus URL shapes learned
+# from extraction hits, see app.scoring) or "keyword" (the original placeholder keywords)
+DEEP_CRAWL_SCORER = os.getenv("DEEP_CRAWL_SCORER", "service")
+URL_SCORER_MAX_FEATURES = env_int("URL_SCORER_MAX_FEATURES", 50000)
+# A deep crawl stops once DEEP_CRAWL_PLATEAU_PAGES pages in a row found no new service
+# (0: never), but not before DEEP_CRAWL_MIN_PAGES pages
+DEEP_CRAWL_PLATEAU_PAGES = env_int("DEEP_CRAWL_PLATEAU_PAGES", 15)
+DEEP_CRAWL_MIN_PAGES = env_int("DEEP_CRAWL_MIN_PAGES", 20)
+
+# Browser request blocking per page: "minimal", "styles-only" or "full" (see app.resources).
+# The base page keeps stylesheets for the fonts/colors extractor
+BASE_PAGE_RESOURCE_PROFILE = os.getenv("BASE_PAGE_RESOURCE_PROFILE", "styles-only")
+SUBPAGE_RESOURCE_PROFILE = os.getenv("SUBPAGE_RESOURCE_PROFILE", "minimal")
+
+# POST /crawl/batch: root crawls running at once across all batches, and roots per request.
+# A root holds a pooled browser, so more than BROWSER_POOL_SIZE would only queue on the lease
+BATCH_CONCURRENCY = env_int("BATCH_CONCURRENCY", BROWSER_POOL_SIZE)
+BATCH_MAX_URLS = env_int("BATCH_MAX_URLS", 1000)
+
+# Adaptive limit on browser page loads across all requests (see app.concurrency). Pages, not
+# leases: a leased browser renders a crawl's subpages in parallel tabs, so the limit starts at
+# one page per pooled browser and grows while memory allows. Memory thresholds are fractions of ADAPTIVE_MEMORY_LIMIT bytes per worker (0: the cgroup limit or
+# physical memory, divided among the workers)
+ADAPTIVE_CONCURRENCY = env_bool("ADAPTIVE_CONCURRENCY", True)
+ADAPTIVE_MIN_CONCURRENCY = env_int("ADAPTIVE_MIN_CONCURRENCY", 1)
+ADAPTIVE_MAX_CONCURRENCY = env_int("ADAPTIVE_MAX_CONCURRENCY", 4 * BROWSER_POOL_SIZE)
+ADAPTIVE_INITIAL_CONCURRENCY = env_int("ADAPTIVE_INITIAL_CONCURRENCY", BROWSER_POOL_SIZE)
+ADAPTIVE_MEMORY_LIMIT = env_int("ADAPTIVE_MEMORY_LIMIT", 0)
+ADAPTIVE_MEMORY_HIGH = env_float("ADAPTIVE_MEMORY_HIGH", 0.8)
+ADAPTIVE_MEMORY_LOW = env_float("ADAPTIVE_MEMORY_LOW", 0.65)
+ADAPTIVE_LATENCY_HIGH = env_float("ADAPTIVE_LATENCY_HIGH", 20.0)
+ADAPTIVE_INTERVAL = env_float("ADAPTIVE_INTERVAL", 1.0)
+ADAPTIVE_COOLDOWN = env_float("ADAPTIVE_COOLDOWN", 5.0)
+
+# Job scheduler
+JOB_WORKERS = env_int("JOB_WORKERS", 2)
+JOB_QUEUE_SIZE = env_int("JOB_QUEUE_SIZE", 100)
+JOB_TIMEOUT = env_float("JOB_TIMEOUT", 300.0)
+JOB_RETENTION = env_float("JOB_RETENTION", 3600.0)
+# Workers share jobs through SQLite, so any worker can answer GET /jobs/{id}
+JOB_BACKEND = os.getenv("JOB_BACKEND", "sqlite" if WORKERS > 1 else "memory")
+JOB_SQLITE_PATH = os.getenv("JOB_SQLITE_PATH", "jobs.db")
+# How often a worker checks the shared backend for cancellations sent to another worker
+JOB_CANCEL_POLL_INTERVAL = env_float("JOB_CANCEL_POLL_INTERVAL", 1.0)
+
+# Per-host politeness
+HOST_MAX_CONCURRENCY = env_int("HOST_MAX_CONCURRENCY", max(1, 4 // WORKERS))
+HOST_RATE = env_float("HOST_RATE", 4.0 / WORKERS)
+HOST_BURST = env_int("HOST_BURST", max(1, 8 // WORKERS))
+HOST_MAX_RETRIES = env_int("HOST_MAX_RETRIES", 2)
+HOST_BACKOFF_BASE = env_float("HOST_BACKOFF_BASE", 1.0)
+HOST_BACKOFF_MAX = env_float("HOST_BACKOFF_MAX", 60.0)
+GLOBAL_MAX_FETCHES = env_int("GLOBAL_MAX_FETCHES", max(1, 32 // WORKERS))
+
+# In-page fonts/colors extractor
+FONTS_COLORS_MAX_ELEMENTS = env_int("FONTS_COLORS_MAX_ELEMENTS", 3000)
+FONTS_COLORS_TIME_BUDGET_MS = env_int("FONTS_COLORS_TIME_BUDGET_MS", 500)
+FONTS_COLORS_CONSOLE = env_bool("FONTS_COLORS_CONSOLE", False)
+
+# Response compression (zstd needs the zstandard package)
+RESPONSE_COMPRESS_MIN_BYTES = env_int("RESPONSE_COMPRESS_MIN_BYTES", 1024)
+RESPONSE_GZIP_LEVEL = env_int("RESPONSE_GZIP_LEVEL", 6)
+RESPONSE_ZSTD_LEVEL = env_int("RESPONSE_ZSTD_LEVEL", 3)
+# Bodies and stream chunks from this size up are compressed in a thread, off the event loop
+RESPONSE_COMPRESS_THREAD_BYTES = env_int("RESPONSE_COMPRESS_THREAD_BYTES", 256 * 1024)
+
+# Stage timings and /metrics histograms; disabled timings cost one attribute check per span
+METRICS_ENABLED = env_bool("METRICS_ENABLED", True)
@@ -0,0 +1,171 @@
+import re
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+US_STATES = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas", "CA": "California",
+    "CO": "Colorado", "CT": "Connecticut", "DE": "Delaware", "FL": "Florida", "GA": "Georgia",
+    "HI": "Hawaii", "ID": "Idaho", "IL": "Illinois", "IN": "Indiana", "IA": "Iowa",
+    "KS": "Kansas", "KY": "Kentucky", "LA": "Louisiana", "ME": "Maine", "MD": "Maryland",
+    "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota", "MS": "Mississippi", "MO": "Missouri",
+    "MT": "Montana", "NE": "Nebraska", "NV": "Nevada", "NH": "New Hampshire", "NJ": "New Jersey",
+    "NM": "New Mexico", "NY": "New York", "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio",
+    "OK": "Oklahoma", "OR": "Oregon", "PA": "Pennsylvania", "RI": "Rhode Island", "SC": "South Carolina",
+    "SD": "South Dakota", "TN": "Tennessee", "TX": "Texas", "UT": "Utah", "VT": "Vermont",
+    "VA": "Virginia", "WA": "Washington", "WV": "West Virginia", "WI": "Wisconsin", "WY": "Wyoming",
+    "DC": "District of Columbia",
+}
+STATE_NAMES = {name.lower(): name for name in US_STATES.values()}
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation of words with shared prefixes factored out.
+
+    "New Jersey|New Mexico|New York" becomes "New\\s+(?:Jersey|Mexico|York)", so
+    the engine reads each character once instead of retrying every word.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if "" in node:
+            return "(?:" + "|".join(branches) + ")?" if branches else ""
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+
+EMAIL_RE = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+# Finds where the run of local-part characters before an "@" starts
+EMAIL_LOCAL_START_RE = re.compile(r'.*[^\w.-]', re.DOTALL)
+MAX_EMAIL_LOCAL_CHARS = 64
+# An opening parenthesis may lead, so "(555) 010-0000" keeps its area code bracket
+PHONE_RE = re.compile(r'(\+?\(?\d[\d\s\-\(\)]{7,}\d)')
+PHONE_PUNCTUATION = str.maketrans("", "", " \t\n\r\f\v-()+")
+
+# Addresses are found by anchoring on ", <state> [zip]" and walking back to
+# the city and street: the city is the segment after the last comma, the
+# street the leftmost "<number> " of the run of street characters before it.
+# State names match case-insensitively, postal codes only in upper case.
+STATE_ANCHOR_RE = re.compile(
+    r',\s*(?P<state>(?i:%s)|%s)\b(?:\s+(?P<zip>\d{5}(?:-\d{4})?))?'
+    % (trie_pattern(STATE_NAMES), trie_pattern(US_STATES))
+)
+LAST_BREAK_RE = re.compile(r'.*[^\w\s.,#&-]', re.DOTALL)
+STREET_START_RE = re.compile(r'\d{1,5}\s')
+CITY_RE = re.compile(r'\s*[\w\s]+')
+MAX_ADDRESS_CHARS = 300
+NON_WORD_RE = re.compile(r'[^\w]+')
+
+
+def find_addresses(text: str) -> list:
+    """Address details for every US-style street address in text, in order."""
+    addresses = []
+    consumed = 0
+    for anchor in STATE_ANCHOR_RE.finditer(text):
+        comma = anchor.start()
+        city_comma = text.rfind(",", consumed, comma)
+        if city_comma < 0 or not CITY_RE.fullmatch(text, city_comma + 1, comma):
+            continue
+        window = max(consumed, comma - MAX_ADDRESS_CHARS)
+        last_break = LAST_BREAK_RE.match(text, window, city_comma)
+        street = STREET_START_RE.search(text, last_break.end() if last_break else window, city_comma)
+        if street is None or street.end() == city_comma:
+            continue
+
+        state = anchor.group("state")
+        addresses.append({
+            "full_address": text[street.start():anchor.end()].strip(),
+            "street_address": text[street.start():city_comma].strip(),
+            "city": text[city_comma + 1:comma].strip(),
+            "state": state if len(state) == 2 else STATE_NAMES[" ".join(state.lower().split())],
+            "zip_code": anchor.group("zip"),
+        })
+        consumed = anchor.end()
+    return addresses
+
+
+def find_emails(text: str) -> list:
+    """Same matches as EMAIL_RE.findall, but only tried around each "@".
+
+    A pattern that starts with a character class is attempted at every
+    position of the text; str.find jumps straight to the few candidates.
+    """
+    emails = []
+    end = 0
+    at = text.find("@")
+    while at >= 0:
+        window = max(end, at - MAX_EMAIL_LOCAL_CHARS)
+        boundary = EMAIL_LOCAL_START_RE.match(text, window, at)
+        match = EMAIL_RE.match(text, boundary.end() if boundary else window)
+        if match and match.end() > at:
+            emails.append(match.group())
+            end = match.end()
+        at = text.find("@", max(at + 1, end))
+    return emails
+
+
+def parse_address(address: str) -> dict:
+    found = find_addresses(address) if address else []
+    if found:
+        return {**found[0], "full_address": address}
+    return {
+        "full_address": address,
+        "street_address": None,
+        "city": None,
+        "state": None,
+        "zip_code": None,
+    }
+
+
+def extract_contacts(text: str) -> dict:
+    """Emails, phones and address details found in already-normalized text."""
+    return {
+        "emails": dedupe(find_emails(text), str.lower),
+        "phones": dedupe(PHONE_RE.findall(text), phone_key),
+        "addresses": dedupe(find_addresses(text), lambda address: address_key(address["full_address"])),
+    }
+
+
+def phone_key(phone: str) -> str:
+    digits = phone.translate(PHONE_PUNCTUATION)
+    return digits[1:] if len(digits) == 11 and digits.startswith("1") else digits
+
+
+def address_key(address: str) -> str:
+    return NON_WORD_RE.sub(" ", address.lower()).strip()
+
+
+def dedupe(values: Iterable[str], key=lambda value: value) -> list:
+    seen = set()
+    unique = []
+    for value in values:
+        marker = key(value)
+        if marker not in seen:
+            seen.add(marker)
+            unique.append(value)
+    return unique
+
+
+def merge_contacts(results: Iterable[dict]) -> dict:
+    """Merge extract_contacts() results from every page of a crawl, first seen wins."""
+    emails, phones, addresses = [], [], []
+    for result in results:
+        if not result:
+            continue
+        emails.extend(result.get("emails", []))
+        phones.extend(result.get("phones", []))
+        addresses.extend(result.get("addresses", []))
+    return {
+        "emails": dedupe(emails, str.lower),
+        "phones": dedupe(phones, phone_key),
+        "addresses": dedupe(addresses, lambda address: address_key(address["full_address"])),
+    }
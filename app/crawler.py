@@ -8,18 +8,252 @@ from crawl4ai.deep_crawling.filters import (
     URLPatternFilter,
     ContentTypeFilter
 )
-from crawl4ai.deep_crawling.scorers import KeywordRelevanceScorer
-from typing import List
+from crawl4ai.deep_crawling.scorers import URLScorer
+from crawl4ai.utils import normalize_url_for_deep_crawl
+from typing import List, Optional
+from urllib.parse import urlsplit
+from contextlib import aclosing, asynccontextmanager
+import asyncio
+import logging
+import time
+from app.cache import response_validators
+from app.deadline import NO_DEADLINE, Deadline
+from app.executor import ExtractionError, ExtractionTimeout
+from app.fetcher import fetch_static_page, js_rendering_reason
+from app.links import select_subpages
+from app.metrics import DEEP_CRAWL_EARLY_STOPS, DEEP_CRAWL_PAGES, NO_TIMINGS, SUBPAGE_FETCHES_SAVED, Timings
+from app.pagestore import content_hash
+from app.payload import FieldSelection
+from app.resources import ResourcePolicy
+from app.runtime import CrawlRuntime
+from app.scheduled_crawler import ScheduledBestFirstStrategy, ScheduledCrawler
+from app.scoring import ServiceURLScorer, ServiceYield, make_url_scorer
+from app.urls import url_key
+from app import config
 from app.helper import (
     extract_image_attribute, 
     split_desc_blocks, 
     extract_repeated_sections, 
     extract_basic_info,
-    js_fonts_colors_extractor
+    js_fonts_colors_extractor,
+    merge_site_contacts
 )
-from urllib.parse import urlparse, urljoin
 
-async def handle_crawl(url: str):
+logger = logging.getLogger(__name__)
+
+EXTRACTION_FAILURES = ("extraction-timeout", "extraction-failed")
+
+@asynccontextmanager
+async def lease_browser(runtime: CrawlRuntime, timings: Timings = NO_TIMINGS, deadline: Deadline = NO_DEADLINE):
+    # Waiting for a pooled browser (and relaunching a crashed one) is its own stage
+    start = time.perf_counter()
+    async with runtime.browser_pool.lease(deadline.remaining()) as crawler:
+        timings.record("browser_lease", time.perf_counter() - start)
+        yield crawler
+
+def record_js_extractor(content, timings: Timings):
+    # The in-page fonts/colors script reports its own run time
+    result = getattr(content, "js_execution_result", None) or {}
+    values = result.get("results") or []
+    if values and isinstance(values[0], dict) and values[0].get("elapsedMs") is not None:
+        timings.record("fonts_colors_js", values[0]["elapsedMs"] / 1000)
+
+async def extract_subpage(runtime: CrawlRuntime, raw_html: str, include_html: bool = False, url: str = None) -> dict:
+    # Unchanged content (by hash) reuses the stored extraction instead of re-parsing
+    store = runtime.page_store
+    if store is None:
+        return await extract_with_template(runtime, raw_html, include_html, url)
+    hash = content_hash(raw_html)
+    kind = "subpage+html" if include_html else "subpage"
+    extraction = await store.extraction(hash, kind)
+    if extraction is None:
+        extraction = await extract_with_template(runtime, raw_html, include_html, url)
+        await store.put_extraction(hash, kind, extraction)
+    return extraction
+
+async def extract_with_template(runtime: CrawlRuntime, raw_html: str, include_html: bool, url: str = None) -> dict:
+    # Pages of a site the extractor has seen try the site's learned card-grid paths first
+    templates = runtime.templates if url else None
+    extraction = await runtime.executor.subpage(raw_html, include_html, templates.get(url) if templates else None)
+    outcome = extraction.pop("template", None)
+    if templates:
+        templates.record(url, len(raw_html), outcome)
+    return extraction
+
+def extraction_failure(error: ExtractionError) -> str:
+    # The reason reported for a page (or its basic info) left out after error
+    return "extraction-timeout" if isinstance(error, ExtractionTimeout) else "extraction-failed"
+
+async def add_basic_info(runtime: CrawlRuntime, data: dict, content, timings: Timings, deadline: Deadline = NO_DEADLINE):
+    # A timed-out or crashed extraction leaves basicInfo out of data and names the reason instead
+    record_js_extractor(content, timings)
+    try:
+        with timings.span("basic_info"):
+            basic = await deadline.run(runtime.executor.basic_info(content))
+    except ExtractionError as e:
+        logger.warning("No basic info for %s: %s", content.url, e)
+        data["basicInfoError"] = extraction_failure(e)
+        return
+    if basic is not None:
+        data["basicInfo"] = basic
+
+async def extract_fetched_page(runtime: CrawlRuntime, content, timings: Timings = NO_TIMINGS) -> tuple:
+    # ((content, extraction), None), or (None, reason) when the extraction timed out or lost its worker
+    try:
+        with timings.span("extraction"):
+            extraction = await extract_subpage(runtime, content.html, url=content.url)
+    except ExtractionError as e:
+        logger.warning("Skipping %s: %s", content.url, e)
+        return None, extraction_failure(e)
+    return (content, extraction), None
+
+async def crawl_subpages(
+    urls: List[str],
+    runtime: CrawlRuntime,
+    fetch_mode: str,
+    timings: Timings = NO_TIMINGS,
+    deadline: Deadline = NO_DEADLINE
+):
+    """Fetch and extract subpages, trying plain HTTP first in "http" mode.
+
+    Pages that look JS-rendered, fail to fetch or yield no repeated sections
+    over HTTP are rendered in the browser. Returns the (content, extraction)
+    pairs in input order, extraction holding the page's "sections" and
+    "contacts", and a per-URL report of the path each page took.
+
+    Each page is extracted as soon as it is fetched, so a deadline only
+    drops the pages still being fetched or extracted; those are reported
+    with fetchedWith None and fallbackReason "deadline". Pages whose
+    extraction timed out or lost its worker are dropped too, with
+    fallbackReason "extraction-timeout" or "extraction-failed".
+    """
+    paths = {}
+    extracted = {}
+    browser_urls = list(urls)
+
+    async def fetch_static(u):
+        # (page, extraction) when the plain HTTP copy will do, else the reason to render u
+        page, reason = await fetch_static_page(runtime.http_client, u, runtime.hosts)
+        reason = reason or js_rendering_reason(page.html)
+        if reason:
+            return None, reason
+        extracted_page, failure = await extract_fetched_page(runtime, page, timings)
+        if failure:
+            return None, failure
+        if not extracted_page[1]["sections"]:
+            return None, "no-sections"
+        return extracted_page, None
+
+    if fetch_mode == "http" and urls:
+        with timings.span("subpages_http"):
+            fetched = await deadline.gather(fetch_static(u) for u in urls)
+        browser_urls = []
+        for u, outcome in zip(urls, fetched):
+            if outcome is None:
+                paths[u] = (None, "deadline")
+                continue
+            page, reason = outcome
+            if page:
+                paths[u] = ("http", None)
+                extracted[u] = page
+            elif reason in EXTRACTION_FAILURES:
+                paths[u] = (None, reason)
+            else:
+                paths[u] = ("browser", reason)
+                browser_urls.append(u)
+
+    resources = {}
+    if browser_urls:
+        policy = ResourcePolicy(config.SUBPAGE_RESOURCE_PROFILE)
+        rendered = [None] * len(browser_urls)
+        try:
+            async with lease_browser(runtime, timings, deadline) as crawler:
+                subpage_config = CrawlerRunConfig(
+                    exclude_external_links=True,
+                    scraping_strategy=LXMLWebScrapingStrategy(),
+                    shared_data=policy.run_data(),
+                )
+                scheduled = ScheduledCrawler(crawler, runtime.hosts, concurrency=runtime.concurrency)
+
+                async def render(u):
+                    # Fanned out per URL like arun_many, so a page cut by the deadline is cancelled alone
+                    result = await scheduled.arun(u, config=subpage_config)
+                    return [await extract_fetched_page(runtime, content, timings) for content in result._results[:1]]
+
+                with timings.span("subpages_browser"):
+                    rendered = await deadline.gather(render(u) for u in browser_urls)
+        except asyncio.TimeoutError:
+            # No pooled browser came free before the deadline
+            if not deadline.expired:
+                raise
+            deadline.cut = True
+
+        resources = {u: policy.page_stats(u) for u in browser_urls}
+        for u, outcomes in zip(browser_urls, rendered):
+            if outcomes is None:
+                paths[u] = (None, "deadline")
+                continue
+            for page, failure in outcomes:
+                if failure:
+                    paths[u] = (None, failure)
+                    continue
+                extracted[page[0].url] = page
+                paths.setdefault(page[0].url, ("browser", None))
+
+    report = [
+        {"url": u, "fetchedWith": paths[u][0], "fallbackReason": paths[u][1], "resources": resources.get(u)}
+        for u in urls if u in paths
+    ]
+    return [extracted[u] for u in urls if u in extracted], report
+
+async def crawl_sitemap_subpages(
+    url: str,
+    runtime: CrawlRuntime,
+    fetch_mode: str,
+    crawl: bool = True,
+    timings: Timings = NO_TIMINGS,
+    deadline: Deadline = NO_DEADLINE
+):
+    """(link selection, subpages, report) for the subpages the site's sitemap lists.
+
+    None when the site has no sitemap or select_subpages keeps none of its
+    pages. Without crawl only the selection is made.
+    """
+    with timings.span("discovery"):
+        candidates = await deadline.run(runtime.discovery.discover(url, runtime.http_client, runtime.hosts), [])
+    if not candidates:
+        return None
+    with timings.span("link_selection"):
+        link_selection = select_subpages(url, ({"href": u} for u in candidates), config.SUBPAGE_LIMIT, source="sitemap")
+    if not link_selection.urls:
+        return None
+    if not crawl:
+        return link_selection, [], []
+    SUBPAGE_FETCHES_SAVED.inc(link_selection.saved_fetches)
+    subpages, report = await crawl_subpages(link_selection.urls, runtime, fetch_mode, timings, deadline)
+    return link_selection, subpages, report
+
+async def handle_crawl(
+    url: str,
+    runtime: CrawlRuntime,
+    validators: dict = None,
+    fetch_mode: str = config.SUBPAGE_FETCH_MODE,
+    selection: FieldSelection = None,
+    timings: Timings = NO_TIMINGS,
+    deadline: Deadline = NO_DEADLINE,
+    discover: bool = config.SITEMAP_DISCOVERY
+):
+    # Parts the caller did not select are never built: no html, no basic info
+    # extraction, and no subpage crawl when neither services nor subpages are wanted
+    # (linkSelection alone only ranks the links). Work still running when the
+    # deadline passes is cancelled and the response carries "partial": True, as
+    # does one whose basic info extraction timed out or crashed: pageContent then
+    # has basicInfoError ("extraction-timeout" or "extraction-failed") instead.
+    # With discover, subpages are picked from the site's sitemap when it has
+    # one and crawled while the start page renders; the start page's links
+    # are the fallback, and the start page is not rendered at all when
+    # pageContent is not wanted and the sitemap did the job
+    selection = selection or FieldSelection()
     js_font_extractor = js_fonts_colors_extractor()
 
     strategy = RegexExtractionStrategy(
@@ -51,8 +285,7 @@ async def handle_crawl(url: str):
     #     ],
     # )
 
-    browser_config = BrowserConfig()
-
+    policy = ResourcePolicy(config.BASE_PAGE_RESOURCE_PROFILE)
     run_config = CrawlerRunConfig(
         # link_preview_config=link_config,
         # score_links=True,
@@ -60,131 +293,167 @@ async def handle_crawl(url: str):
         scraping_strategy=LXMLWebScrapingStrategy(),
         extraction_strategy=strategy,
         js_code=js_font_extractor,
-        capture_console_messages=True,
+        capture_console_messages=config.FONTS_COLORS_CONSOLE,
+        shared_data=policy.run_data(),
     )
 
     base_result = None
     basic_info = None
     page_content = None
     internal_links = []
-    filtered_links = []
+    link_selection = None
+    urls = []
     pages = []
     services = []
-    async with AsyncWebCrawler(config=browser_config) as crawler:
-        result = await crawler.arun(
-            url=url,
-            config=run_config,
-            use_browser=True
-        )
-        base_result = result._results[0] if len(result._results) else None
-
-    if base_result:
-        internal_links = base_result.links.get("internal")
-        basic_info = extract_basic_info(base_result)
-        page_content = {
-            "url": base_result.url,
-            "html": base_result.html,
-            "basicInfo": basic_info   
-        }
-
-    if internal_links:
-        excluded_keywords = [
-            'contact',
-            'about',
-            'blog',
-            'faq',
-            'team',
-            'terms',
-            'privacy',
-            'financing',
-            'login',
-            'signup',
-            'register',
-            'cart',
-            'checkout',
-            'account',
-            'dashboard',
-            'profile',
-            'search',
-            'policy',
-            'cookie',
-            'sitemap',
-            'appointment',
-            'careers',
-            'news',
-            'press',
-            'testimonials',
-            'reviews',
-            'gallery',
-            'events',
-            'admin',
-            'rss',
-            'help',
-            'support',
-            'partners',
-            'legal',
-            'newsletter',
-            'subscribe',
-            'unsubscribe',
-            'disclaimer'
-        ]
-
-
-        filtered_links = [
-            link for link in internal_links
-            if (href := link.get("href"))  # safe get
-            and not any(x in href.lower() for x in excluded_keywords)
-            and urlparse(urljoin(url, href)).path.strip('/')  # exclude homepage
-        ][:25]
-
-
-    async with AsyncWebCrawler() as crawler:
-        config = CrawlerRunConfig(
-            exclude_external_links=True,
-            scraping_strategy=LXMLWebScrapingStrategy(),
+    result = None
+    wants_subpages = selection.wants("services") or selection.wants("subpages")
+    sitemap = None
+    if discover and (wants_subpages or selection.wants("linkSelection")):
+        sitemap = asyncio.create_task(
+            crawl_sitemap_subpages(url, runtime, fetch_mode, wants_subpages, timings, deadline)
         )
+    discovered = None
+    try:
+        if sitemap and not selection.wants("pageContent"):
+            # Nothing is read from the start page itself: it is only rendered for its links
+            discovered = await sitemap
+        if discovered is None:
+            try:
+                async with lease_browser(runtime, timings, deadline) as crawler:
+                    scheduled = ScheduledCrawler(crawler, runtime.hosts, concurrency=runtime.concurrency)
+                    with timings.span("base_page"):
+                        result = await deadline.run(scheduled.arun(
+                            url=url,
+                            config=run_config,
+                            use_browser=True
+                        ))
+            except asyncio.TimeoutError:
+                # No pooled browser came free before the deadline
+                if not deadline.expired:
+                    raise
+                deadline.cut = True
+        base_result = result._results[0] if result and len(result._results) else None
 
-        urls = [t["href"] for t in filtered_links]
-        results = await crawler.arun_many(urls, config=config)
+        if base_result:
+            internal_links = base_result.links.get("internal")
+            if validators is not None:
+                validators.update(response_validators(base_result.response_headers))
+            page_content = {"url": base_result.url, "resources": policy.page_stats(url)}
+            if selection.wants("pageContent.html"):
+                page_content["html"] = base_result.html
+            if selection.wants("pageContent.basicInfo"):
+                await add_basic_info(runtime, page_content, base_result, timings, deadline)
 
-        seen_titles = set()
-        for result in results:
-            content = result._results[0] if result._results else None
-            if not content:
-                continue
+        if sitemap:
+            discovered = await sitemap
+    finally:
+        if sitemap:
+            sitemap.cancel()
 
-            extracted_contents = extract_repeated_sections(content.html)
-
-            for item in extracted_contents:
-                title = item.get("title", "").strip()
-                
-                if not title or title in seen_titles:
-                    continue  # Skip duplicates or empty titles
-                
-                seen_titles.add(title)
-                
-                services.append({
-                    "url_source": content.url,
-                    "img_src": item.get("img_src"),
-                    "title": item.get("title"),
-                    "description": item.get("description"),
-                })
+    if discovered:
+        link_selection, subpages, subpage_report = discovered
+    else:
+        if internal_links and (wants_subpages or selection.wants("linkSelection")):
+            with timings.span("link_selection"):
+                link_selection = select_subpages(base_result.url, internal_links, config.SUBPAGE_LIMIT)
+            if wants_subpages:
+                SUBPAGE_FETCHES_SAVED.inc(link_selection.saved_fetches)
+                urls = link_selection.urls
 
-    return {
+        subpages, subpage_report = await crawl_subpages(urls, runtime, fetch_mode, timings, deadline)
+
+    for content, extraction in subpages:
+        runtime.url_shapes.record(content.url, bool(extraction["sections"]))
+
+    seen_titles = set()
+    for content, extraction in subpages:
+        for item in extraction["sections"]:
+            title = item.get("title", "").strip()
+            
+            if not title or title in seen_titles:
+                continue  # Skip duplicates or empty titles
+            
+            seen_titles.add(title)
+            
+            services.append({
+                "url_source": content.url,
+                "img_src": item.get("img_src"),
+                "title": item.get("title"),
+                "description": item.get("description"),
+            })
+
+    if page_content and "basicInfo" in page_content:
+        merge_site_contacts(page_content["basicInfo"], [extraction["contacts"] for _, extraction in subpages])
+
+    response = {
         "pageContent": page_content,
-        "services": services
+        "services": services,
+        "subpages": subpage_report,
+        "linkSelection": link_selection.as_dict() if link_selection else None
     }
+    if deadline.cut or (page_content and "basicInfoError" in page_content):
+        response["partial"] = True
+    return response
 
-async def handle_deep_crawl(url: str, max_pages: int, url_filter: List[str]):
+def seeded_state(start_url: str, seeds: List[str], filter_chain: FilterChain, scorer, max_pages: int) -> Optional[dict]:
+    """Crawler state with a site's sitemap pages queued at depth 1 beside the start page.
+
+    The strategy would otherwise only find them hop by hop, rendering each
+    depth before it knows the next; queued up front they fill the first
+    batches. Pages the filters reject are left out and the max_pages best
+    scored (then shallowest) are kept. The start page sorts first, so it is
+    still the first result. Returns None when no seed passes.
+    """
+    start_key = url_key(start_url)
+    seen = {start_key}
+    ranked = []
+    for order, seed in enumerate(seeds):
+        page = normalize_url_for_deep_crawl(seed, start_url)
+        if not page or url_key(page) in seen:
+            continue
+        seen.add(url_key(page))
+        if not all(url_filter.apply(page) for url_filter in filter_chain.filters):
+            continue
+        score = scorer.score(page) if scorer else 0
+        depth = len([segment for segment in urlsplit(page).path.split("/") if segment])
+        ranked.append((-score, depth, order, page))
+    if not ranked:
+        return None
+    ranked.sort()
+    queued = [
+        {"score": score, "depth": 1, "url": page, "parent_url": start_url}
+        for score, _, _, page in ranked[:max_pages]
+    ]
+    start_score = min(-(scorer.score(start_url) if scorer else 0), queued[0]["score"])
+    return {
+        "visited": [],
+        "queue_items": [{"score": start_score, "depth": 0, "url": start_url, "parent_url": None}] + queued,
+        "depths": {start_url: 0, **{item["url"]: 1 for item in queued}},
+        "pages_crawled": 0,
+    }
+
+def build_deep_crawl_config(
+    max_pages: int,
+    url_filter: List[str],
+    runtime: CrawlRuntime,
+    policy: ResourcePolicy = None,
+    resume_state: dict = None,
+    on_state_change=None,
+    start_url: str = None,
+    seeds: List[str] = None,
+    url_scorer: URLScorer = None,
+    should_cancel=None
+) -> CrawlerRunConfig:
     filter_chain = FilterChain([
         url_filter,
         ContentTypeFilter(allowed_types=["text/html"])
     ])
 
-    keyword_scorer = KeywordRelevanceScorer(
-        keywords=["crawl", "example", "async", "configuration"],
-        weight=0.7
-    )
+    url_scorer = url_scorer or make_url_scorer(config.DEEP_CRAWL_SCORER, runtime.url_shapes)
+
+    if seeds and resume_state is None:
+        # A fresh crawl starts from the sitemap's pages as well as the start page
+        resume_state = seeded_state(start_url, seeds, filter_chain, url_scorer, max_pages)
 
     strategy = RegexExtractionStrategy(
         pattern = (
@@ -193,54 +462,297 @@ async def handle_deep_crawl(url: str, max_pages: int, url_filter: List[str]):
         )
     )
 
-    config = CrawlerRunConfig(
-        deep_crawl_strategy=BestFirstCrawlingStrategy(
+    return CrawlerRunConfig(
+        deep_crawl_strategy=ScheduledBestFirstStrategy(
             max_depth=3,
             max_pages=max_pages,
             include_external=False,
             filter_chain=filter_chain,
-            url_scorer=keyword_scorer
+            url_scorer=url_scorer,
+            hosts=runtime.hosts,
+            store=runtime.page_store,
+            http_client=runtime.http_client,
+            concurrency=runtime.concurrency,
+            resume_state=resume_state,
+            on_state_change=on_state_change,
+            should_cancel=should_cancel
         ),
         exclude_external_links=True,
         scraping_strategy=LXMLWebScrapingStrategy(),
         extraction_strategy=strategy,
         js_code=js_fonts_colors_extractor(),
-        capture_console_messages=True,
+        capture_console_messages=config.FONTS_COLORS_CONSOLE,
+        shared_data=policy.run_data() if policy else None,
         stream=True,
         verbose=True
     )
 
-    results = []
-    async with AsyncWebCrawler() as crawler:
-        async for result in await crawler.arun(url, config=config):
-            results.append(result)
+def resumable_state(state: dict, events: list) -> dict:
+    """Crawler state to resume from, with pages that never produced an event queued again.
 
+    The strategy marks a whole batch visited before fetching it, so pages of
+    the batch that was running when the crawl stopped are put back.
+    """
+    emitted = {url_key(event["data"]["url"]) for event in events}
+    queued = {item["url"] for item in state.get("queue_items", [])}
+    depths = state.get("depths", {})
+    visited, requeued = [], []
+    for page_url in state.get("visited", []):
+        if url_key(page_url) in emitted:
+            visited.append(page_url)
+        elif page_url not in queued:
+            requeued.append({"score": 0, "depth": depths.get(page_url, 0), "url": page_url, "parent_url": None})
+    return {
+        **state,
+        "visited": visited,
+        "queue_items": requeued + state.get("queue_items", []),
+        "pages_crawled": len(events),
+    }
 
-    contents = []
-    page_content = None
+async def stream_deep_crawl(
+    url: str,
+    max_pages: int,
+    url_filter: List[str],
+    runtime: CrawlRuntime,
+    validators: dict = None,
+    selection: FieldSelection = None,
+    timings: Timings = NO_TIMINGS,
+    resume_key: str = None,
+    resume: bool = False,
+    deadline: Deadline = NO_DEADLINE,
+    discover: bool = config.SITEMAP_DISCOVERY
+):
+    """Yield deep crawl events as soon as each page is extracted.
 
-    for index, result in enumerate(results):
-        if index == 0:
-            content = result._results[0] if result._results else None
-            basicInfo = extract_basic_info(content)
-            page_content = {
-                "url": content.url,
-                "html": content.html,
-                "basicInfo": basicInfo
-            }
-            # page_content = content
-            continue
+    Emits one "pageContent" event for the start page, then a "page" event per
+    subpage (in completion order, tagged with its crawl "index") and a final
+    "done" event. A subpage whose extraction timed out or crashed still gets
+    its "page" event, with no extracted_content or contacts and
+    extractionError "extraction-timeout" or "extraction-failed". Closing the generator cancels the crawl. The start page's
+    ETag/Last-Modified are written into validators when given. The start
+    page html, its basic info and the per-section html are only produced
+    when selection wants them.
+
+    With a page store and a resume_key, the frontier and every emitted event
+    are saved as the crawl advances and dropped once it is done. resume=True
+    picks up a saved, unfinished crawl: its events are replayed first and
+    only the rest of the frontier is crawled.
+
+    When the deadline passes the crawl is cancelled and the "done" event
+    carries "partial": True; its frontier is kept, so resume=True continues it.
+
+    With discover, a fresh crawl queues the pages of the site's sitemap that
+    pass url_filter next to the start page (see seeded_state), so they are
+    rendered in the first batches instead of one depth at a time.
+
+    The frontier is ranked by the DEEP_CRAWL_SCORER, and every extracted
+    page teaches the runtime's URL shapes whether it had sections. The crawl
+    stops queueing pages once new services level off (see ServiceYield);
+    the "done" event reports the pages and services found as "serviceYield".
+    """
+    selection = selection or FieldSelection()
+    page_html = selection.wants("pageContent.html")
+    basic_info = selection.wants("pageContent.basicInfo")
+    section_html = selection.wants("pages.extracted_content.html")
+    store = runtime.page_store if resume_key else None
+    saved_events = []
+    resume_state = None
+    if store:
+        saved = await store.frontier(resume_key) if resume else None
+        if saved:
+            saved_events = sorted(saved[1], key=lambda event: event.get("index", 0))
+            resume_state = resumable_state(saved[0], saved_events)
+        else:
+            await store.drop_frontier(resume_key)
 
-        if len(result._results):
-            content = result._results[0]
+    async def save_state(state):
+        await store.save_frontier(resume_key, state)
 
-            contents.append({
+    # The start page keeps its stylesheets for the fonts/colors extractor
+    policy = ResourcePolicy(
+        config.SUBPAGE_RESOURCE_PROFILE, base_url=url, base_profile=config.BASE_PAGE_RESOURCE_PROFILE
+    )
+    seeds = None
+    if discover and resume_state is None:
+        with timings.span("discovery"):
+            seeds = await deadline.run(runtime.discovery.discover(url, runtime.http_client, runtime.hosts), [])
+    scorer = make_url_scorer(config.DEEP_CRAWL_SCORER, runtime.url_shapes)
+    services = ServiceYield()
+    for event in saved_events:
+        if event["event"] == "page":
+            services.add(event["data"]["extracted_content"] or [])
+    run_config = build_deep_crawl_config(
+        max_pages, url_filter, runtime, policy, resume_state, save_state if store else None, url, seeds,
+        scorer, services.should_stop
+    )
+    events = asyncio.Queue()
+
+    async def emit(event):
+        if store:
+            await store.save_frontier_event(resume_key, event["data"]["url"], event)
+        await events.put(event)
+
+    async def extract_page(index, content):
+        try:
+            with timings.span("extraction"):
+                extraction = await extract_subpage(runtime, content.html, section_html, content.url)
+        except ExtractionError as e:
+            # Still a crawled page: reported without content, like the subpages of /crawl
+            logger.warning("No sections for %s: %s", content.url, e)
+            DEEP_CRAWL_PAGES.inc(outcome="failed")
+            await emit({
+                "event": "page",
+                "index": index,
+                "data": {
+                    "url": content.url,
+                    "resources": policy.page_stats(content.url),
+                    "extracted_content": None,
+                    "contacts": None,
+                    "extractionError": extraction_failure(e),
+                }
+            })
+            return
+        anchor = scorer.anchor_text(content.url) if isinstance(scorer, ServiceURLScorer) else None
+        runtime.url_shapes.record(content.url, bool(extraction["sections"]), anchor)
+        found = services.add(extraction["sections"])
+        DEEP_CRAWL_PAGES.inc(outcome="new" if found else "none")
+        await emit({
+            "event": "page",
+            "index": index,
+            "data": {
                 "url": content.url,
+                "resources": policy.page_stats(content.url),
                 # "html": content.html,
-                "extracted_content": extract_repeated_sections(content.html)
+                "extracted_content": extraction["sections"],
+                "contacts": extraction["contacts"]
+            }
+        })
+
+    # Pages crawled so far, resumed ones included: both kinds of "done" event report it
+    index = max((event.get("index", 0) + 1 for event in saved_events), default=0)
+
+    async def crawl():
+        nonlocal index
+        extractions = []
+        start_key = url_key(url)
+        root_pending = not any(event["event"] == "pageContent" for event in saved_events)
+        try:
+            for event in saved_events:
+                await events.put(event)
+            async with lease_browser(runtime, timings) as crawler:
+                crawl_started = time.perf_counter()
+                results = await crawler.arun(url, config=run_config)
+                try:
+                    async for result in results:
+                        content = result._results[0] if result._results else None
+                        # Resumed crawls may still owe the start page, at any position
+                        is_root = root_pending and content is not None and (
+                            url_key(content.url) == start_key if saved_events else index == 0
+                        )
+                        if is_root:
+                            root_pending = False
+                            timings.record("base_page", time.perf_counter() - crawl_started)
+                            if validators is not None:
+                                validators.update(response_validators(content.response_headers))
+                            data = {"url": content.url, "resources": policy.page_stats(content.url)}
+                            if page_html:
+                                data["html"] = content.html
+                            if basic_info:
+                                await add_basic_info(runtime, data, content, timings)
+                            await emit({"event": "pageContent", "index": 0, "data": data})
+                            index = max(index, 1)
+                            continue
+                        if content is not None:
+                            extractions.append(asyncio.create_task(extract_page(index, content)))
+                        index += 1
+                finally:
+                    await results.aclose()
+                    timings.record("deep_crawl", time.perf_counter() - crawl_started)
+            await asyncio.gather(*extractions)
+            if store:
+                await store.drop_frontier(resume_key)
+            if services.stopped:
+                DEEP_CRAWL_EARLY_STOPS.inc()
+            await events.put({
+                "event": "done",
+                "pages": index,
+                "resumedPages": len(saved_events),
+                "serviceYield": services.as_dict()
             })
+        except asyncio.CancelledError:
+            for task in extractions:
+                task.cancel()
+            raise
+        except Exception as e:
+            for task in extractions:
+                task.cancel()
+            await events.put({"event": "error", "message": str(e)})
 
-    return {
+    crawl_task = asyncio.create_task(crawl())
+    try:
+        while True:
+            event = events.get_nowait() if not events.empty() else await deadline.run(events.get())
+            if event is None:
+                yield {
+                    "event": "done",
+                    "pages": index,
+                    "resumedPages": len(saved_events),
+                    "serviceYield": services.as_dict(),
+                    "partial": True
+                }
+                break
+            yield event
+            if event["event"] in ("done", "error"):
+                break
+    finally:
+        crawl_task.cancel()
+        try:
+            await crawl_task
+        except asyncio.CancelledError:
+            pass
+
+async def handle_deep_crawl(
+    url: str,
+    max_pages: int,
+    url_filter: List[str],
+    runtime: CrawlRuntime,
+    validators: dict = None,
+    selection: FieldSelection = None,
+    timings: Timings = NO_TIMINGS,
+    resume_key: str = None,
+    resume: bool = False,
+    deadline: Deadline = NO_DEADLINE,
+    discover: bool = config.SITEMAP_DISCOVERY
+):
+    contents = []
+    page_content = None
+    partial = False
+    service_yield = None
+
+    # aclosing: a cancelled caller (e.g. the client disconnected) stops the crawl right away
+    async with aclosing(stream_deep_crawl(
+        url, max_pages, url_filter, runtime, validators, selection, timings, resume_key, resume, deadline, discover
+    )) as events:
+        async for event in events:
+            if event["event"] == "pageContent":
+                page_content = event["data"]
+            elif event["event"] == "page":
+                contents.append((event["index"], event["data"]))
+            elif event["event"] == "done":
+                partial = event.get("partial", False)
+                service_yield = event.get("serviceYield")
+            elif event["event"] == "error":
+                raise RuntimeError(event["message"])
+
+    pages = [data for _, data in sorted(contents, key=lambda item: item[0])]
+    if page_content and "basicInfo" in page_content:
+        merge_site_contacts(page_content["basicInfo"], [page.get("contacts") for page in pages])
+
+    response = {
         "pageContent": page_content,
-        "pages": contents
-    }
\ No newline at end of file
+        "pages": pages,
+        "serviceYield": service_yield
+    }
+    if partial or (page_content and "basicInfoError" in page_content):
+        response["partial"] = True
+    return response
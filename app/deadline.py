@@ -0,0 +1,75 @@
+import asyncio
+import time
+from typing import Awaitable, Iterable, List, Optional
+
+
+class Deadline:
+    """Time budget of one crawl request, checked at every page-level await.
+
+    Work still running when the budget is spent is cancelled and its result
+    dropped; cut records that happened, so the caller can mark what it
+    collected as partial. A Deadline without a budget never expires.
+    """
+
+    def __init__(self, ms: Optional[float] = None):
+        self.ms = ms
+        self.expires_at = time.monotonic() + ms / 1000 if ms else None
+        self.cut = False
+
+    def __bool__(self) -> bool:
+        return self.expires_at is not None
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    async def run(self, aw: Awaitable, default=None):
+        """Result of aw, or default if the budget runs out first (aw is cancelled)."""
+        if self.expires_at is None:
+            return await aw
+        try:
+            return await asyncio.wait_for(aw, timeout=self.remaining())
+        except asyncio.TimeoutError:
+            if not self.expired:
+                # A timeout raised by the work itself, not by the budget
+                raise
+            self.cut = True
+            return default
+
+    async def gather(self, aws: Iterable[Awaitable], return_exceptions: bool = False) -> List:
+        """Results of aws in order, like asyncio.gather; None for work cut by the budget."""
+        tasks = [asyncio.ensure_future(aw) for aw in aws]
+        if not tasks:
+            return []
+        if self.expires_at is None:
+            return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=self.remaining())
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+        if pending:
+            self.cut = True
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        results = []
+        for task in tasks:
+            if task not in done:
+                results.append(None)
+            elif task.exception() is not None:
+                if not return_exceptions:
+                    raise task.exception()
+                results.append(task.exception())
+            else:
+                results.append(task.result())
+        return results
+
+
+NO_DEADLINE = Deadline()
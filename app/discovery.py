@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from lxml import etree
+
+from app import config
+from app.hosts import HostScheduler
+from app.links import ASSET_RE, EXCLUDED_RE
+from app.metrics import SITEMAP_FETCHES
+from app.singleflight import SingleFlight
+from app.urls import canonical_parts, host_key, parts_key
+
+logger = logging.getLogger(__name__)
+
+# robots.txt answers that put the whole site off limits, as RobotFileParser.read reads them
+DISALLOW_ALL_OUTCOMES = ("status-401", "status-403")
+# Tried in order when robots.txt names no sitemap
+FALLBACK_SITEMAPS = ("/sitemap.xml", "/sitemap_index.xml")
+SITEMAP_LINE_RE = re.compile(r"^\s*sitemap\s*:\s*(\S+)", re.IGNORECASE | re.MULTILINE)
+GZIP_MAGIC = b"\x1f\x8b"
+SECONDARY_SITEMAP_RE = re.compile(r"(?<![a-z])(?:post|tag|category|author)")
+
+
+def local_name(tag) -> str:
+    # Sitemaps are namespaced, and not always with the standard namespace
+    return tag.rsplit("}", 1)[-1].lower() if isinstance(tag, str) else ""
+
+
+def parse_sitemap(payload: bytes) -> Tuple[List[str], List[str]]:
+    """(page urls, child sitemap urls) listed in a sitemap or sitemap index.
+
+    Malformed XML is read as far as it goes; a plain-text sitemap (one URL
+    per line) is accepted too.
+    """
+    parser = etree.XMLParser(recover=True, resolve_entities=False, no_network=True, remove_comments=True)
+    try:
+        root = etree.fromstring(payload, parser)
+    except etree.XMLSyntaxError:
+        root = None
+    if root is None:
+        lines = payload.decode("utf-8", errors="replace").split()
+        return [line for line in lines if line.startswith(("http://", "https://"))], []
+
+    pages, sitemaps = [], []
+    for loc in root.iter():
+        if local_name(loc.tag) != "loc" or not loc.text:
+            continue
+        parent = local_name(loc.getparent().tag) if loc.getparent() is not None else ""
+        (sitemaps if parent == "sitemap" else pages).append(loc.text.strip())
+    return pages, sitemaps
+
+
+def is_secondary_sitemap(url: str) -> bool:
+    # Child sitemaps of blog posts, tags, news and the like are read last
+    path = urlsplit(url).path.lower().replace("sitemap", "")
+    return bool(EXCLUDED_RE.search(path) or SECONDARY_SITEMAP_RE.search(path))
+
+
+class SitemapDiscovery:
+    """Candidate subpage URLs of a site, read from robots.txt and its sitemaps.
+
+    Sitemaps named by robots.txt (else /sitemap.xml, then /sitemap_index.xml)
+    are fetched over plain HTTP through the HostScheduler; sitemap indexes
+    are followed up to max_depth levels and max_sitemaps files, gzipped
+    sitemaps are inflated, and pages off the site, asset files and paths
+    robots.txt disallows are dropped; a robots.txt answering 401 or 403
+    disallows the whole site. URLs are rewritten to the scheme and
+    host they were asked for, so callers can queue them next to the start
+    page, and capped at max_urls in sitemap order.
+
+    Results, empty ones included, are kept per site for ttl seconds, least
+    recently used first up to max_sites; concurrent lookups of one site share
+    one discovery. A discovery is given up after timeout seconds with the
+    pages read so far, which are kept for partial_ttl seconds only.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = config.SITEMAP_DISCOVERY,
+        ttl: float = config.SITEMAP_TTL,
+        partial_ttl: float = config.SITEMAP_PARTIAL_TTL,
+        timeout: float = config.SITEMAP_TIMEOUT,
+        max_urls: int = config.SITEMAP_MAX_URLS,
+        max_sitemaps: int = config.SITEMAP_MAX_FILES,
+        max_depth: int = config.SITEMAP_MAX_DEPTH,
+        max_bytes: int = config.SITEMAP_MAX_BYTES,
+        max_sites: int = config.SITEMAP_CACHE_SITES,
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.partial_ttl = partial_ttl
+        self.timeout = timeout
+        self.max_urls = max(1, max_urls)
+        self.max_sitemaps = max(1, max_sitemaps)
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self.max_sites = max(1, max_sites)
+        self._sites: OrderedDict = OrderedDict()
+        self._flights = SingleFlight()
+        self.counters = {
+            "lookups": 0,
+            "cached": 0,
+            "discovered": 0,
+            "empty": 0,
+            "timeouts": 0,
+            "disallowed": 0,
+            "files": 0,
+            "urls": 0,
+        }
+
+    async def discover(self, url: str, client: httpx.AsyncClient, hosts: HostScheduler) -> List[str]:
+        """Page URLs the site's sitemaps list, on the scheme and host of url ([] if none)."""
+        if not self.enabled:
+            return []
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            return []
+        self.counters["lookups"] += 1
+        key = f"{parts.scheme}://{host_key(parts.hostname)}:{parts.port or ''}"
+        cached = self._sites.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self._sites.move_to_end(key)
+            self.counters["cached"] += 1
+            return cached[1]
+
+        urls, complete = await self._flights.run(key, lambda: self._discover_site(url, client, hosts))
+        self._sites[key] = (time.monotonic() + (self.ttl if complete else self.partial_ttl), urls)
+        self._sites.move_to_end(key)
+        while len(self._sites) > self.max_sites:
+            self._sites.popitem(last=False)
+        return urls
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "enabled": self.enabled,
+            "sites": len(self._sites),
+        }
+
+    async def _discover_site(self, url: str, client: httpx.AsyncClient, hosts: HostScheduler) -> Tuple[List[str], bool]:
+        # (urls, complete): a timed-out discovery returns the pages it read so far
+        pages: List[str] = []
+        complete = True
+        try:
+            await asyncio.wait_for(self._read_sitemaps(url, client, hosts, pages), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.info("Sitemap discovery for %s timed out after %d pages", url, len(pages))
+            self.counters["timeouts"] += 1
+            complete = False
+        urls = pages[:self.max_urls]
+        self.counters["discovered" if urls else "empty"] += 1
+        self.counters["urls"] += len(urls)
+        return urls, complete
+
+    async def _read_sitemaps(self, url: str, client: httpx.AsyncClient, hosts: HostScheduler, pages: List[str]):
+        # Appends to pages as each sitemap is read, so a timeout keeps what was found
+        base = urlsplit(url)
+        origin = urlunsplit((base.scheme, base.netloc, "", "", ""))
+        robots = RobotFileParser()
+        robots_txt, outcome = await self._fetch(client, hosts, origin + "/robots.txt", "robots")
+        if outcome in DISALLOW_ALL_OUTCOMES:
+            self.counters["disallowed"] += 1
+            return
+        text = robots_txt.decode("utf-8", errors="replace") if robots_txt else ""
+        robots.parse(text.splitlines())
+        declared = [urljoin(origin, match) for match in SITEMAP_LINE_RE.findall(text)]
+
+        site = host_key(base.hostname or "")
+        seen_pages = {parts_key(base)}
+        seen_sitemaps = set()
+        level = list(dict.fromkeys(declared))
+        fallbacks = [] if level else [origin + path for path in FALLBACK_SITEMAPS]
+        fetched = 0
+        depth = 0
+        while (level or fallbacks) and depth <= self.max_depth and fetched < self.max_sitemaps:
+            if not level:
+                # Conventional locations, one at a time: the second is only tried when the first is missing
+                level = [fallbacks.pop(0)]
+            batch = [sitemap for sitemap in level if sitemap not in seen_sitemaps][:self.max_sitemaps - fetched]
+            seen_sitemaps.update(batch)
+            fetched += len(batch)
+            payloads = await asyncio.gather(*(self._fetch(client, hosts, sitemap, "sitemap") for sitemap in batch))
+            children = []
+            for payload, _ in payloads:
+                if payload is None:
+                    continue
+                fallbacks = []
+                listed, nested = await asyncio.to_thread(parse_sitemap, payload)
+                children.extend(nested)
+                for href in listed:
+                    parts = canonical_parts(href)
+                    if parts is None or host_key(parts.hostname or "") != site or ASSET_RE.search(parts.path):
+                        continue
+                    key = parts_key(parts)
+                    if key in seen_pages:
+                        continue
+                    seen_pages.add(key)
+                    page = urlunsplit(parts._replace(scheme=base.scheme, netloc=base.netloc))
+                    if robots.can_fetch(config.HTTP_USER_AGENT, page):
+                        pages.append(page)
+            if len(pages) >= self.max_urls:
+                break
+            level = sorted(dict.fromkeys(children), key=is_secondary_sitemap)
+            if children:
+                depth += 1
+
+    async def _fetch(
+        self, client: httpx.AsyncClient, hosts: HostScheduler, url: str, kind: str
+    ) -> Tuple[Optional[bytes], str]:
+        body, outcome = await hosts.run(url, lambda permit: self._get(client, url, permit))
+        SITEMAP_FETCHES.inc(kind=kind, outcome=outcome)
+        if body is not None and kind == "sitemap":
+            self.counters["files"] += 1
+        return body, outcome
+
+    async def _get(self, client: httpx.AsyncClient, url: str, permit) -> Tuple[Optional[bytes], str]:
+        try:
+            async with client.stream("GET", url) as response:
+                permit.report(response.status_code, response.headers)
+                if response.status_code != 200:
+                    return None, f"status-{response.status_code}"
+                chunks = []
+                size = 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        return None, "too-large"
+                    chunks.append(chunk)
+        except httpx.HTTPError as e:
+            logger.info("Fetch of %s failed: %s", url, e)
+            return None, "http-error"
+        body = b"".join(chunks)
+        if body.startswith(GZIP_MAGIC):
+            # .xml.gz files come as gzip bodies rather than a gzip Content-Encoding
+            inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            try:
+                body = inflater.decompress(body, self.max_bytes)
+            except zlib.error:
+                return None, "bad-gzip"
+            if inflater.unconsumed_tail:
+                return None, "too-large"
+        return body, "ok"
@@ -0,0 +1,54 @@
+import re
+from functools import cached_property
+from typing import Union
+
+from lxml import html
+
+HEADING_TAGS = frozenset(("h1", "h2", "h3", "h4", "h5", "h6"))
+
+
+class PageDocument:
+    """Parses a page's HTML once and caches the views shared by the extractors."""
+
+    def __init__(self, raw_html: str):
+        self.raw_html = raw_html
+
+    @cached_property
+    def tree(self):
+        return html.fromstring(self.raw_html)
+
+    def parse(self) -> "PageDocument":
+        # Parses now rather than on first use, e.g. to keep the parse out of a timing
+        self.tree
+        return self
+
+    @cached_property
+    def title(self) -> str:
+        title = self.tree.xpath('//title/text()')
+        return title[0].strip() if title else ""
+
+    @cached_property
+    def images(self) -> list:
+        return self.tree.xpath('//img')
+
+    @cached_property
+    def footer_text(self) -> str:
+        # Text of <footer>, common footer containers, or the bottom of <body>
+        tree = self.tree
+        footer_elements = tree.xpath('//footer')
+
+        if footer_elements:
+            full_text = footer_elements[0].text_content()
+        else:
+            possible_footers = tree.xpath('//div[contains(translate(@class, "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz"), "footer")]')
+            if possible_footers:
+                full_text = " ".join(el.text_content() for el in possible_footers)
+            else:
+                last_elements = tree.xpath('//body//*[position() > last()-5]')
+                full_text = " ".join(el.text_content() for el in last_elements)
+
+        return re.sub(r'\s+', ' ', full_text)
+
+
+def as_document(page: Union[str, PageDocument]) -> PageDocument:
+    return page if isinstance(page, PageDocument) else PageDocument(page)
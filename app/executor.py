@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import List, Optional
+
+from app import config
+from app.contacts import extract_contacts
+from app.document import PageDocument
+from app.helper import extract_basic_info, extract_repeated_sections, extract_templated_sections
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionError(Exception):
+    """The page could not be extracted; callers skip it."""
+
+
+class ExtractionTimeout(ExtractionError):
+    pass
+
+
+class ExtractionWorkerLost(ExtractionError):
+    """The worker process died (e.g. killed for memory) while extracting; the pool is rebuilt."""
+
+
+# Worker entry points: plain arguments in, plain dicts out, so they pickle cheaply
+def basic_info_job(raw_html: str, extracted_content: str, console_messages: list, js_execution_result: dict) -> dict:
+    content = SimpleNamespace(
+        html=raw_html,
+        extracted_content=extracted_content,
+        console_messages=console_messages,
+        js_execution_result=js_execution_result,
+    )
+    return extract_basic_info(content, PageDocument(raw_html))
+
+
+def repeated_sections_job(raw_html: str, include_html: bool) -> list:
+    return extract_repeated_sections(PageDocument(raw_html), include_html=include_html)
+
+
+def subpage_job(raw_html: str, include_html: bool, template: List[str] = None) -> dict:
+    # One parse serves both the sections and the contact scan of the footer text.
+    # The parse is the same with or without a site template, so only the section search is timed
+    document = PageDocument(raw_html).parse()
+    start = time.perf_counter()
+    sections, hit, learned = extract_templated_sections(document, template, include_html)
+    return {
+        "sections": sections,
+        "contacts": extract_contacts(document.footer_text),
+        "template": {
+            "tried": bool(template),
+            "hit": hit,
+            "learned": learned,
+            "seconds": time.perf_counter() - start,
+        },
+    }
+
+
+def warm_up_job(raw_html: str) -> tuple:
+    # Every extractor once, so the worker's first parses happen before traffic arrives
+    basic_info_job(raw_html, "[]", [], None)
+    repeated_sections_job(raw_html, False)
+    subpage_job(raw_html, False)
+    return os.getpid(), threading.get_ident()
+
+
+def worker_processes(pool: Executor) -> list:
+    # Taken before shutdown(), which forgets them
+    return list((getattr(pool, "_processes", None) or {}).values())
+
+
+def terminate_workers(processes: list):
+    # Tasks still running in these workers fail as BrokenProcessPool, which frees their slots
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+def load_extractors():
+    # Process pool initializer: each worker imports lxml and the extractors and runs one small
+    # parse as it starts, so a worker that got no warm_up_job is not cold on its first task
+    repeated_sections_job("<html><body><ul><li>a</li><li>b</li></ul></body></html>", False)
+
+
+class ExtractionExecutor:
+    """Runs CPU-bound lxml/regex extraction off the event loop.
+
+    A task past task_timeout fails its caller at once but holds its slot
+    until the work ends. In process mode the pool is then recycled: new work
+    goes to a fresh pool, and workers of the old one still busy task_timeout
+    later (a pathological DOM or regex may never return) are terminated.
+    Threads cannot be stopped, so in thread mode the slot stays taken until
+    the task ends on its own.
+    """
+
+    def __init__(
+        self,
+        kind: str = config.EXTRACTION_EXECUTOR,
+        max_workers: int = config.EXTRACTION_WORKERS,
+        max_pending: int = config.EXTRACTION_MAX_PENDING,
+        task_timeout: float = config.EXTRACTION_TIMEOUT,
+    ):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown extraction executor: {kind}")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending)
+        self.task_timeout = task_timeout
+
+        self._executor: Optional[Executor] = None
+        # Worker processes of recycled pools, terminated task_timeout after the recycle
+        self._retired: List[list] = []
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._pending = 0
+        self._timeouts = 0
+        self._restarts = 0
+
+    def start(self):
+        self._executor = self._create()
+        return self
+
+    def _create(self) -> Executor:
+        if self.kind == "process":
+            # Playwright runs its own threads in the parent, so never fork
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=load_extractors,
+            )
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="extraction",
+        )
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        # A hung worker would otherwise block interpreter exit, which joins pool workers
+        for processes in self._retired:
+            terminate_workers(processes)
+        self._retired = []
+
+    async def run(self, fn, *args):
+        # Callers wait here once max_pending tasks are queued or running. A slot is held until
+        # the work itself ends: a task past its timeout keeps running in its worker
+        await self._slots.acquire()
+        executor = self._executor
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException as e:
+            self._slots.release()
+            if isinstance(e, BrokenExecutor):
+                self._restart(executor)
+                raise ExtractionWorkerLost(f"{fn.__name__}: extraction pool was broken") from e
+            raise
+        self._pending += 1
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: self._task_done(loop))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.task_timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            if self.kind == "process":
+                self._recycle(executor)
+            raise ExtractionTimeout(f"{fn.__name__} exceeded {self.task_timeout}s")
+        except BrokenExecutor as e:
+            self._restart(executor)
+            raise ExtractionWorkerLost(f"{fn.__name__}: extraction worker died") from e
+
+    def _task_done(self, loop: asyncio.AbstractEventLoop):
+        # Called from the pool's thread when the work ends, finished, failed or cancelled
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # The loop is closed: the service is shutting down
+            pass
+
+    def _release(self):
+        self._pending -= 1
+        self._slots.release()
+
+    def _restart(self, broken: Executor):
+        # A dead worker breaks the whole process pool; every later submit would fail. The
+        # first caller to notice replaces it, and tasks of the old pool fail and free their slots
+        if self._executor is not broken:
+            return
+        logger.warning("Extraction pool broken by a dead worker; starting a new one")
+        self._restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._create()
+
+    def _recycle(self, pool: Executor):
+        # Replaces the pool a task timed out in; the old one keeps running what it was given, and
+        # task_timeout later every task there has ended or overrun its own budget too
+        if self._executor is not pool:
+            return
+        logger.warning("Extraction task exceeded %ss; starting a new pool and retiring the old one", self.task_timeout)
+        self._restarts += 1
+        self._executor = self._create()
+        processes = worker_processes(pool)
+        pool.shutdown(wait=False)
+        self._retired.append(processes)
+        asyncio.get_running_loop().call_later(self.task_timeout, self._retire, processes)
+
+    def _retire(self, processes: list):
+        terminate_workers(processes)
+        if processes in self._retired:
+            self._retired.remove(processes)
+
+    async def warm_up(self, raw_html: str) -> int:
+        """Start every worker and run each extractor on raw_html; returns the workers that ran a job.
+
+        Pools start their workers on demand, one per task submitted while none
+        is idle, so max_workers tasks at once start all of them.
+        """
+        workers = await asyncio.gather(*(self.run(warm_up_job, raw_html) for _ in range(self.max_workers)))
+        return len(set(workers))
+
+    async def basic_info(self, content) -> dict:
+        return await self.run(
+            basic_info_job,
+            content.html,
+            content.extracted_content,
+            content.console_messages,
+            getattr(content, "js_execution_result", None),
+        )
+
+    async def repeated_sections(self, raw_html: str, include_html: bool = False) -> list:
+        return await self.run(repeated_sections_job, raw_html, include_html)
+
+    async def subpage(self, raw_html: str, include_html: bool = False, template: List[str] = None) -> dict:
+        """Repeated sections and contacts of a subpage: {"sections", "contacts", "template"}.
+
+        "template" reports how the site template (container paths from
+        SiteTemplates) was used; see subpage_job.
+        """
+        return await self.run(subpage_job, raw_html, include_html, template)
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "timeouts": self._timeouts,
+            "restarts": self._restarts,
+        }
@@ -0,0 +1,87 @@
+import logging
+import re
+from typing import Optional
+
+import httpx
+
+from app import config
+from app.hosts import HostScheduler
+from app.metrics import FETCH_FAILURES, record_page
+
+logger = logging.getLogger(__name__)
+
+FETCH_MODES = ("http", "browser")
+
+SPA_ROOT_RE = re.compile(
+    r"""id=["']?(?:root|app|__next|__nuxt|___gatsby)["'\s>]|data-reactroot|ng-app|ng-version""",
+    re.IGNORECASE
+)
+
+BODY_RE = re.compile(r"<body[^>]*>(.*)</body>", re.IGNORECASE | re.DOTALL)
+SCRIPT_STYLE_RE = re.compile(r"<(script|style|noscript|template)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+TAG_RE = re.compile(r"<[^>]+>")
+
+MIN_BODY_WORDS = 50
+
+
+class StaticPage:
+    """A subpage fetched over plain HTTP; duck-types the CrawlResult fields extraction reads."""
+
+    def __init__(self, requested_url: str, url: str, html: str, status_code: int, headers: dict, size: int = 0):
+        self.requested_url = requested_url
+        self.url = url
+        self.html = html
+        self.status_code = status_code
+        self.response_headers = headers
+        self.size = size
+
+
+def body_word_count(raw_html: str) -> int:
+    match = BODY_RE.search(raw_html)
+    body = match.group(1) if match else raw_html
+    body = SCRIPT_STYLE_RE.sub(" ", body)
+    return len(TAG_RE.sub(" ", body).split())
+
+
+def js_rendering_reason(raw_html: str) -> Optional[str]:
+    # Cheap string checks; the absence of repeated sections is checked after extraction
+    if body_word_count(raw_html) < MIN_BODY_WORDS:
+        if SPA_ROOT_RE.search(raw_html):
+            return "spa-root"
+        return "empty-body"
+    return None
+
+
+async def fetch_static_page(client: httpx.AsyncClient, url: str, hosts: HostScheduler) -> tuple:
+    """Returns (StaticPage, None) or (None, reason the browser is needed)."""
+    page, reason = await hosts.run(url, lambda permit: _fetch_static_page(client, url, permit))
+    if page is not None:
+        record_page("http", page.size)
+    else:
+        FETCH_FAILURES.inc(via="http", reason=reason)
+    return page, reason
+
+async def _fetch_static_page(client: httpx.AsyncClient, url: str, permit) -> tuple:
+    try:
+        async with client.stream("GET", url) as response:
+            permit.report(response.status_code, response.headers)
+            content_type = response.headers.get("content-type", "")
+            if response.status_code != 200:
+                return None, f"status-{response.status_code}"
+            if "html" not in content_type:
+                return None, "not-html"
+
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > config.HTTP_MAX_PAGE_BYTES:
+                    return None, "too-large"
+                chunks.append(chunk)
+
+            encoding = response.encoding or "utf-8"
+            raw_html = b"".join(chunks).decode(encoding, errors="replace")
+            return StaticPage(url, str(response.url), raw_html, response.status_code, dict(response.headers), size), None
+    except httpx.HTTPError as e:
+        logger.info("HTTP fetch of %s failed: %s", url, e)
+        return None, "http-error"
@@ -1,7 +1,10 @@
 import re
 import ast
 import json
-from lxml import html
+from lxml import etree, html
+from app import config
+from app.contacts import extract_contacts, merge_contacts, parse_address
+from app.document import HEADING_TAGS, PageDocument, as_document
 
 def extract_image_attribute(image: dict, desc_block: str) -> dict:
     desc_block = desc_block.replace("\n", " ").strip()
@@ -42,46 +45,108 @@ def clean_desc_with_repeating_word(desc: str) -> dict:
         "desc": desc.strip()
     }
 
-def extract_repeated_sections(raw_html):
-    tree = html.fromstring(raw_html)
-    repeated_blocks = []
-
-    for parent in tree.xpath("//*[count(*) > 2]"):
-        children = parent.getchildren()
-
-        tag_names = [child.tag for child in children]
-        if len(set(tag_names)) == 1 and len(children) >= 3:
-            blocks = []
-            for child in children:
-                imgs = child.xpath(".//img")
-                if imgs:
-                    img_src = imgs[0].get("data-src") if imgs[0].get("data-src") else imgs[0].get("src")  # take first image
-                    text = child.text_content().strip()
-
-                    # Try to find the first heading inside the block
-                    heading = child.xpath(
-                        ".//*[self::h1 or self::h2 or self::h3 or self::h4 or self::h5 or self::h6 or contains(@class, 'title')]"
-                    )
-                    title = heading[0].text_content().strip() if heading else ""
-
-                    if (
-                        img_src
-                        and not img_src.endswith(".svg")
-                        and "\n" not in title
-                        and title != text
-                    ):
-
-                        blocks.append({
-                            "img_src": img_src,
-                            "title": title,
-                            "description": text,
-                            "html": html.tostring(child, encoding="unicode"),
-                        })
-
-            if len(blocks) >= 2:
-                repeated_blocks.append(blocks)
-
-    # Flatten and deduplicate by title
+def is_heading_node(el) -> bool:
+    return el.tag in HEADING_TAGS or "title" in (el.get("class") or "")
+
+def first_descendants(root):
+    """Single bottom-up pass over root's subtree.
+
+    Returns its elements in document order with the first descendant <img>
+    and first descendant heading of every one of them.
+    """
+    nodes = [el for el in root.iter() if isinstance(el.tag, str)]
+    first_img = {}
+    first_heading = {}
+
+    # Reversed document order visits every descendant before its ancestors
+    for el in reversed(nodes):
+        img = None
+        heading = None
+        for child in el:
+            if not isinstance(child.tag, str):
+                continue
+            if img is None:
+                img = child if child.tag == "img" else first_img.get(child)
+            if heading is None:
+                heading = child if is_heading_node(child) else first_heading.get(child)
+            if img is not None and heading is not None:
+                break
+        if img is not None:
+            first_img[el] = img
+        if heading is not None:
+            first_heading[el] = heading
+
+    return nodes, first_img, first_heading
+
+def is_repeated_parent(el) -> bool:
+    # 3+ children sharing one tag; comments and other non-element children break the signature
+    if len(el) < 3:
+        return False
+    signature = {child.tag for child in el}
+    return len(signature) == 1 and isinstance(next(iter(signature)), str)
+
+def summarize_subtrees(root):
+    """Single bottom-up pass over the tree.
+
+    Returns the first descendant <img> and first descendant heading of every
+    element, plus the elements whose children share one tag (3+ children),
+    in document order.
+    """
+    nodes, first_img, first_heading = first_descendants(root)
+    repeated_parents = [el for el in nodes if is_repeated_parent(el)]
+    return first_img, first_heading, repeated_parents
+
+class FirstDescendant:
+    """first_descendants' lookup for single elements, found on demand.
+
+    The first matching descendant in document order, as the bottom-up pass
+    records it, without summarizing the rest of the tree.
+    """
+
+    def __init__(self, match, *tags):
+        self.match = match
+        self.tags = tags
+
+    def get(self, el):
+        for descendant in el.iterdescendants(*self.tags):
+            if isinstance(descendant.tag, str) and self.match(descendant):
+                return descendant
+        return None
+
+FIRST_IMG = FirstDescendant(lambda el: True, "img")
+FIRST_HEADING = FirstDescendant(is_heading_node)
+
+def section_blocks(parent, first_img: dict, first_heading: dict) -> list:
+    # Children of a repeated parent that look like cards: an image, a one-line title and more text
+    blocks = []
+    for child in parent:
+        img = first_img.get(child)
+        if img is None:
+            continue
+
+        img_src = img.get("data-src") or img.get("src")  # take first image
+        if not img_src or img_src.endswith(".svg"):
+            continue
+
+        heading = first_heading.get(child)
+        title = heading.text_content().strip() if heading is not None else ""
+        if "\n" in title:
+            continue
+
+        text = child.text_content().strip()
+        if title == text:
+            continue
+
+        blocks.append({
+            "img_src": img_src,
+            "title": title,
+            "description": text,
+            "node": child,
+        })
+    return blocks
+
+def flatten_sections(repeated_blocks: list, include_html: bool = False) -> list:
+    # Flatten and deduplicate by title; only the survivors get serialized
     flat_services = []
     seen_titles = set()
 
@@ -90,47 +155,169 @@ def extract_repeated_sections(raw_html):
             title_key = item["title"].strip().lower()
             if title_key and title_key not in seen_titles:
                 seen_titles.add(title_key)
+                node = item.pop("node")
+                if include_html:
+                    item["html"] = html.tostring(node, encoding="unicode")
                 flat_services.append(item)
 
     return flat_services
 
-def extract_basic_info(content):
-    raw_html = content.html
+def scan_repeated_blocks(root) -> list:
+    """(parent, blocks) for every repeated parent in the tree with 2+ card-like children."""
+    first_img, first_heading, repeated_parents = summarize_subtrees(root)
+    groups = []
+    for parent in repeated_parents:
+        blocks = section_blocks(parent, first_img, first_heading)
+        if len(blocks) >= 2:
+            groups.append((parent, blocks))
+    return groups
+
+def extract_repeated_sections(page, include_html: bool = False):
+    tree = as_document(page).tree
+    groups = scan_repeated_blocks(tree.getroottree().getroot())
+    return flatten_sections([blocks for _, blocks in groups], include_html)
+
+def _xpath_literal(value: str):
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return None
+
+def container_path(el) -> str:
+    """Absolute XPath of el by tag and class at every level, without positions.
+
+    Sibling pages of one site template put their card grid at the same path
+    even when the surrounding content shifts sibling positions.
+    """
+    steps = []
+    while el is not None:
+        step = el.tag
+        css = el.get("class")
+        literal = _xpath_literal(css) if css else None
+        if literal:
+            step += f"[@class={literal}]"
+        elif not css:
+            step += "[not(@class)]"
+        steps.append(step)
+        el = el.getparent()
+    return "/" + "/".join(reversed(steps))
+
+def extract_templated_sections(page, template: list = None, include_html: bool = False) -> tuple:
+    """extract_repeated_sections guided by a site template learned from sibling pages.
+
+    template holds the container_path of the card grids found on earlier
+    pages of the site. They are looked up directly and only their subtrees
+    summarized; when none of them yields cards on this page the full scan
+    runs instead. A hit is only kept when no other repeated parent on the
+    page yields cards (a page with an extra grid would lose its sections),
+    which looks into the children of repeated parents only; otherwise the
+    full scan runs and learns the extra grid. Returns (sections,
+    template_hit, learned), learned being the container paths of a full
+    scan that found cards (None otherwise).
+    """
+    root = as_document(page).tree.getroottree().getroot()
+    if template:
+        groups = []
+        seen = set()
+        for path in template:
+            try:
+                containers = root.xpath(path)
+            except etree.XPathError:
+                continue
+            for container in containers:
+                if container in seen or not is_repeated_parent(container):
+                    continue
+                seen.add(container)
+                _, first_img, first_heading = first_descendants(container)
+                blocks = section_blocks(container, first_img, first_heading)
+                if len(blocks) >= 2:
+                    groups.append((container, blocks))
+        if groups and not has_other_cards(root, seen):
+            # Template containers come back in document order, like the full scan
+            groups.sort(key=lambda group: order_key(group[0]))
+            return flatten_sections([blocks for _, blocks in groups], include_html), True, None
+
+    groups = scan_repeated_blocks(root)
+    learned = list(dict.fromkeys(container_path(parent) for parent, _ in groups)) or None
+    return flatten_sections([blocks for _, blocks in groups], include_html), False, learned
+
+def has_other_cards(root, containers: set) -> bool:
+    # Any repeated parent outside containers with 2+ card-like children. Cards start with a
+    # non-SVG image, so only the ancestors of those are looked at, each once
+    visited = set()
+    for img in root.iter("img"):
+        img_src = img.get("data-src") or img.get("src")
+        if not img_src or img_src.endswith(".svg"):
+            continue
+        for el in img.iterancestors():
+            if el in visited:
+                break
+            visited.add(el)
+            if el not in containers and is_repeated_parent(el) and len(section_blocks(el, FIRST_IMG, FIRST_HEADING)) >= 2:
+                return True
+    return False
+
+def order_key(el) -> list:
+    # Child positions from the root: sorts elements in document order
+    key = []
+    while el.getparent() is not None:
+        parent = el.getparent()
+        key.append(parent.index(el))
+        el = parent
+    return key[::-1]
+
+def extract_basic_info(content, document: PageDocument = None):
+    document = document or PageDocument(content.html)
     extracted_content = content.extracted_content
     console_messages = content.console_messages
+    js_execution_result = getattr(content, "js_execution_result", None)
 
-    tree = html.fromstring(raw_html)
-    text = tree.text_content()
-
-    contact_info = extract_contact_info(raw_html)
+    contact_info = extract_contact_info(document)
     email_phone = extract_email_tel_from_extracted(extracted_content)
-    fonts_colors = extact_fonts_colors_from_console(console_messages)
+    fonts_colors = extract_fonts_colors(js_execution_result, console_messages)
 
     email = email_phone.get("email")
     phone = email_phone.get("phone")
-    address = contact_info.get("address")
-    logo = tree.xpath(
-        '//img['
-            'contains(translate(@src, "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz"), "logo") or '
-            'contains(translate(@class, "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz"), "logo")'
-        ']/@src'
-    )
-    title = tree.xpath('//title/text()')
+    address = contact_info.get("address_details")
+    logo = [
+        img.get("src") for img in document.images
+        if img.get("src") is not None
+        and ("logo" in img.get("src").lower() or "logo" in (img.get("class") or "").lower())
+    ]
+    title = document.title
     fonts = fonts_colors.get("fonts")
     colors = fonts_colors.get("colors")
     
     return {
-        "name": title[0].strip() if title else "",
+        "name": title,
         "email": email if email else None,
         "phone": phone if phone else None,
-        "address": extract_address_details(address[0]) if address else None,
+        "address": address[0] if address else None,
         "logo": logo[0] if logo else None,
         "fonts": fonts,
-        "colors": colors
+        "colors": colors,
+        "contacts": {
+            "emails": contact_info.get("email"),
+            "phones": contact_info.get("phone"),
+            "addresses": address
+        }
     }
 
-def extract_contact_info(raw_html):
-    tree = html.fromstring(raw_html)
+def merge_site_contacts(basic_info: dict, page_contacts: list) -> dict:
+    # Contacts found on any crawled page; the base page's own values still win
+    contacts = merge_contacts([basic_info.get("contacts"), *page_contacts])
+    basic_info["contacts"] = contacts
+    if not basic_info.get("email") and contacts["emails"]:
+        basic_info["email"] = contacts["emails"][0]
+    if not basic_info.get("phone") and contacts["phones"]:
+        basic_info["phone"] = contacts["phones"][0]
+    if not basic_info.get("address") and contacts["addresses"]:
+        basic_info["address"] = contacts["addresses"][0]
+    return basic_info
+
+def extract_contact_info(page):
+    document = as_document(page)
 
     # Extract text from <footer> and nearby elements
     # footer = tree.xpath('//footer')
@@ -172,86 +359,20 @@ def extract_contact_info(raw_html):
     #     "phone": list(set(phones)),
     #     "address": list(set(address_matches))
     # }
-    # Try to extract text from <footer>
-    footer_elements = tree.xpath('//footer')
-    text_sources = []
-
-    if footer_elements:
-        text_sources.append(footer_elements[0].text_content())
-    else:
-        # Check common footer containers
-        possible_footers = tree.xpath('//div[contains(translate(@class, "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz"), "footer")]')
-        if possible_footers:
-            text_sources.append(" ".join(el.text_content() for el in possible_footers))
-        else:
-            # Fallback: last few elements in <body>
-            last_elements = tree.xpath('//body//*[position() > last()-5]')
-            text_sources.append(" ".join(el.text_content() for el in last_elements))
-
-    # Merge and normalize text
-    full_text = " ".join(text_sources)
-    text = re.sub(r'\s+', ' ', full_text)
-
-    # Extract email
-    emails = re.findall(r'[\w\.-]+@[\w\.-]+\.\w+', text)
-
-    # Extract phone numbers
-    phones = re.findall(r'(\+?\d[\d\s\-\(\)]{7,}\d)', text)
-
-    address_pattern = re.compile(
-        r'\d{1,5}\s[\w\s.,#&-]+?,\s*[\w\s]+?,\s*'
-        r'(?:[A-Z]{2}|Alabama|Alaska|Arizona|Arkansas|California|Colorado|Connecticut|Delaware|Florida|Georgia|Hawaii|Idaho|Illinois|Indiana|Iowa|Kansas|Kentucky|Louisiana|Maine|Maryland|Massachusetts|Michigan|Minnesota|Mississippi|Missouri|Montana|Nebraska|Nevada|New Hampshire|New Jersey|New Mexico|New York|North Carolina|North Dakota|Ohio|Oklahoma|Oregon|Pennsylvania|Rhode Island|South Carolina|South Dakota|Tennessee|Texas|Utah|Vermont|Virginia|Washington|West Virginia|Wisconsin|Wyoming)'
-        r'(?:\s+\d{5})?',
-        re.IGNORECASE
-    )
-
-
-    # Improved US-style address regex (very heuristic!)
-    address_matches = address_pattern.findall(text)
+    # Footer text (or its nearest fallback), already whitespace-normalized;
+    # the precompiled engine in app.contacts scans it once
+    contacts = extract_contacts(document.footer_text)
 
     return {
-        "email": list(set(emails)),
-        "phone": list(set(phones)),
-        "address": list(address_matches)
+        "email": contacts["emails"],
+        "phone": contacts["phones"],
+        "address": [address["full_address"] for address in contacts["addresses"]],
+        "address_details": contacts["addresses"]
     }
 
 
 def extract_address_details(address):
-    full_address = address
-    street_address = None
-    city = None
-    state = None
-    zip_code = None
-
-    if address:
-        # Match with optional ZIP and full/abbreviated state
-        pattern = re.compile(
-            r'^(.*?),?\s+([\w\s]+),?\s+'
-            r'(?:'  # Start non-capturing group for state
-                r'(?P<state>[A-Z]{2})|'  # e.g., NJ
-                r'(?P<state_full>'
-                r'Alabama|Alaska|Arizona|Arkansas|California|Colorado|Connecticut|Delaware|Florida|Georgia|Hawaii|Idaho|Illinois|Indiana|Iowa|Kansas|Kentucky|Louisiana|Maine|Maryland|Massachusetts|Michigan|Minnesota|Mississippi|Missouri|Montana|Nebraska|Nevada|New Hampshire|New Jersey|New Mexico|New York|North Carolina|North Dakota|Ohio|Oklahoma|Oregon|Pennsylvania|Rhode Island|South Carolina|South Dakota|Tennessee|Texas|Utah|Vermont|Virginia|Washington|West Virginia|Wisconsin|Wyoming'
-                r')'
-            r')'
-            r'(?:\s+(?P<zip>\d{5}))?$',  # Optional ZIP
-            re.IGNORECASE
-        )
-
-        match = pattern.match(address.strip())
-
-        if match:
-            street_address = match.group(1).strip()
-            city = match.group(2).strip()
-            state = match.group('state') or match.group('state_full')
-            zip_code = match.group('zip')
-
-    return {
-        "full_address": full_address,
-        "street_address": street_address,
-        "city": city,
-        "state": state,
-        "zip_code": zip_code
-    }
+    return parse_address(address)
 
 
 def extact_fonts_colors_from_console(console_messages):
@@ -297,58 +418,103 @@ def extract_email_tel_from_extracted(extracted_content):
         "phone": phone
     }
 
-def js_fonts_colors_extractor():
-    return """function extractFont() {
-        const fonts = new Set();
-
-        document.querySelectorAll('*').forEach(el => {
-            const font = window.getComputedStyle(el).getPropertyValue('font-family');
-            if (font) fonts.add(font.trim());
-        });
-
-        console.info("fonts", [...fonts]);
-        return fonts;
-    } 
-
-    function extractColors(minCount = 20) {
-        const rgbToHex = (rgb) => {
-            const match = rgb.match(/\d+/g);
-            if (!match || match.length < 3) return null;
-
-            return (
-                '#' +
-                match.slice(0, 3)
-                    .map(x => parseInt(x).toString(16).padStart(2, '0'))
-                    .join('')
-                    .toUpperCase()
-            );
-        };
-
-        const elements = document.querySelectorAll('*');
-        const colorCount = {};
-
-        elements.forEach(el => {
-            const style = window.getComputedStyle(el);
-            ['color', 'backgroundColor', 'borderColor'].forEach(prop => {
-                const rgb = style[prop];
-                if (rgb && rgb.startsWith('rgb')) {
-                    const hex = rgbToHex(rgb);
-                    if (hex) {
-                        colorCount[hex] = (colorCount[hex] || 0) + 1;
-                    }
+FONTS_COLORS_SCRIPT = """
+    const maxElements = __MAX_ELEMENTS__;
+    const timeBudgetMs = __TIME_BUDGET_MS__;
+    const minCount = __MIN_COUNT__;
+    const emitConsole = __EMIT_CONSOLE__;
+
+    const rgbToHex = (rgb) => {
+        const match = rgb.match(/\\d+/g);
+        if (!match || match.length < 3) return null;
+
+        return (
+            '#' +
+            match.slice(0, 3)
+                .map(x => parseInt(x).toString(16).padStart(2, '0'))
+                .join('')
+                .toUpperCase()
+        );
+    };
+
+    const started = performance.now();
+    const elements = document.querySelectorAll('*');
+    const total = elements.length;
+    // Stride sampling keeps huge DOMs within maxElements computed styles
+    const step = Math.max(1, Math.ceil(total / maxElements));
+
+    const fonts = new Set();
+    const colorCount = {};
+    let sampled = 0;
+    let truncated = false;
+
+    for (let i = 0; i < total; i += step) {
+        // Every 256th visit, visible or not: checkVisibility() costs time too
+        if (((i / step) & 255) === 255 && performance.now() - started > timeBudgetMs) {
+            truncated = true;
+            break;
+        }
+        const el = elements[i];
+        if (el.checkVisibility && !el.checkVisibility()) continue;
+        sampled++;
+
+        const style = window.getComputedStyle(el);
+        const font = style.getPropertyValue('font-family');
+        if (font) fonts.add(font.trim());
+
+        for (const prop of ['color', 'backgroundColor', 'borderColor']) {
+            const rgb = style[prop];
+            if (rgb && rgb.startsWith('rgb')) {
+                const hex = rgbToHex(rgb);
+                if (hex) {
+                    colorCount[hex] = (colorCount[hex] || 0) + 1;
                 }
-            });
-        });
+            }
+        }
+    }
 
-        const colors =  Object.entries(colorCount)
-            .filter(([, count]) => count > minCount)
-            .sort((a, b) => b[1] - a[1])
-            .map(([hex, count]) => hex);
+    const threshold = minCount / step;
+    const colors = Object.entries(colorCount)
+        .filter(([, count]) => count > threshold)
+        .sort((a, b) => b[1] - a[1])
+        .map(([hex, count]) => hex);
 
+    if (emitConsole) {
+        console.info("fonts", [...fonts]);
         console.info("colors", colors);
-        return colors;
     }
-    
-    extractFont();
-    extractColors();
-    """
\ No newline at end of file
+
+    return {
+        fonts: [...fonts],
+        colors: colors,
+        total: total,
+        sampled: sampled,
+        truncated: truncated,
+        elapsedMs: Math.round(performance.now() - started)
+    };
+"""
+
+def js_fonts_colors_extractor(
+    max_elements: int = config.FONTS_COLORS_MAX_ELEMENTS,
+    time_budget_ms: int = config.FONTS_COLORS_TIME_BUDGET_MS,
+    min_count: int = 20,
+    emit_console: bool = config.FONTS_COLORS_CONSOLE,
+):
+    """One budgeted pass over visible elements; the result comes back as the script's return value."""
+    return (
+        FONTS_COLORS_SCRIPT
+        .replace("__MAX_ELEMENTS__", str(int(max_elements)))
+        .replace("__TIME_BUDGET_MS__", str(int(time_budget_ms)))
+        .replace("__MIN_COUNT__", str(int(min_count)))
+        .replace("__EMIT_CONSOLE__", "true" if emit_console else "false")
+    )
+
+def extract_fonts_colors(js_execution_result, console_messages) -> dict:
+    for result in (js_execution_result or {}).get("results") or []:
+        if isinstance(result, dict) and "fonts" in result:
+            return {
+                "fonts": result.get("fonts") or [],
+                "colors": result.get("colors") or []
+            }
+    # Older scripts reported through console.info
+    return extact_fonts_colors_from_console(console_messages or [])
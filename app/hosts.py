@@ -0,0 +1,189 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+from app import config
+
+THROTTLE_STATUSES = (429, 503)
+IDLE_HOST_TTL = 600.0
+
+
+def host_of(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostState:
+    def __init__(self, max_concurrency: int, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttle_streak = 0
+
+        self.turn = asyncio.Lock()
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.last_used = time.monotonic()
+        self.requests = 0
+        self.throttled = 0
+
+    def delay(self, now: float) -> float:
+        # Seconds until this host may start another request
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Permit:
+    def __init__(self, scheduler: "HostScheduler", state: HostState):
+        self._scheduler = scheduler
+        self._state = state
+        self.throttled = False
+
+    def report(self, status_code: Optional[int], headers: Optional[dict] = None):
+        """Feed the response status back so 429/503 pause the whole host."""
+        if status_code in THROTTLE_STATUSES:
+            self.throttled = True
+            headers = {name.lower(): value for name, value in (headers or {}).items()}
+            self._scheduler._throttle(self._state, parse_retry_after(headers.get("retry-after")))
+        elif status_code:
+            self._state.throttle_streak = 0
+
+
+class HostScheduler:
+    """Process-wide gate every page fetch goes through.
+
+    Each host gets a concurrency cap, a token bucket and a Retry-After/backoff
+    pause; a global cap bounds total fetches. A request takes its host permit
+    before queueing for a global slot, so a busy host can hold at most its own
+    cap of global waiters and cannot starve other hosts.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = config.HOST_MAX_CONCURRENCY,
+        rate: float = config.HOST_RATE,
+        burst: int = config.HOST_BURST,
+        global_concurrency: int = config.GLOBAL_MAX_FETCHES,
+        max_retries: int = config.HOST_MAX_RETRIES,
+        backoff_base: float = config.HOST_BACKOFF_BASE,
+        backoff_max: float = config.HOST_BACKOFF_MAX,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.global_concurrency = max(1, global_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._global = asyncio.Semaphore(self.global_concurrency)
+        self._hosts: Dict[str, HostState] = {}
+        self.active = 0
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        state = self._state(host_of(url))
+        state.waiting += 1
+        try:
+            async with state.turn:
+                await state.slots.acquire()
+                try:
+                    while True:
+                        delay = state.delay(time.monotonic())
+                        if delay <= 0:
+                            break
+                        await asyncio.sleep(delay)
+                    if state.rate > 0:
+                        state.tokens -= 1
+                except BaseException:
+                    state.slots.release()
+                    raise
+        finally:
+            state.waiting -= 1
+
+        try:
+            async with self._global:
+                state.active += 1
+                state.requests += 1
+                self.active += 1
+                try:
+                    yield Permit(self, state)
+                finally:
+                    state.active -= 1
+                    self.active -= 1
+                    state.last_used = time.monotonic()
+        finally:
+            state.slots.release()
+
+    async def run(self, url: str, fetch: Callable[[Permit], Awaitable]):
+        """Run fetch(permit) in a slot, retrying while the host throttles us."""
+        for attempt in range(self.max_retries + 1):
+            async with self.slot(url) as permit:
+                result = await fetch(permit)
+            if not permit.throttled or attempt >= self.max_retries:
+                return result
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "active": self.active,
+            "global_concurrency": self.global_concurrency,
+            "hosts": {
+                host: {
+                    "active": state.active,
+                    "waiting": state.waiting,
+                    "tokens": round(state.tokens, 2),
+                    "blocked_for": round(max(0.0, state.blocked_until - now), 2),
+                    "requests": state.requests,
+                    "throttled": state.throttled,
+                }
+                for host, state in self._hosts.items()
+            },
+        }
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            self._prune()
+            state = HostState(self.max_concurrency, self.rate, self.burst)
+            self._hosts[host] = state
+        return state
+
+    def _prune(self):
+        cutoff = time.monotonic() - IDLE_HOST_TTL
+        for host in [
+            host for host, state in self._hosts.items()
+            if not state.active and not state.waiting and state.last_used < cutoff
+        ]:
+            del self._hosts[host]
+
+    def _throttle(self, state: HostState, retry_after: Optional[float]):
+        state.throttled += 1
+        state.throttle_streak += 1
+        if retry_after is None:
+            retry_after = self.backoff_base * 2 ** (state.throttle_streak - 1)
+        state.blocked_until = max(state.blocked_until, time.monotonic() + min(retry_after, self.backoff_max))
@@ -0,0 +1,384 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPES = ("crawl", "deep")
+FINISHED_STATES = ("succeeded", "failed", "cancelled", "timeout")
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class Job:
+    def __init__(
+        self,
+        type: str,
+        params: dict,
+        priority: int = 0,
+        timeout: float = config.JOB_TIMEOUT,
+        id: str = None,
+        status: str = "queued",
+        result=None,
+        error: str = None,
+        created_at: float = None,
+        started_at: float = None,
+        finished_at: float = None,
+        worker: int = None,
+    ):
+        self.id = id or uuid.uuid4().hex
+        self.type = type
+        self.params = params
+        self.priority = priority
+        self.timeout = timeout
+        self.status = status
+        self.result = result
+        self.error = error
+        self.created_at = created_at or time.time()
+        self.started_at = started_at
+        self.finished_at = finished_at
+        # pid of the worker process whose queue holds the job
+        self.worker = worker or os.getpid()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "type": self.type,
+            "params": self.params,
+            "priority": self.priority,
+            "timeout": self.timeout,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "worker": self.worker,
+        }
+
+
+def worker_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobBackend:
+    """Storage for job state; the queue itself always lives in the scheduler."""
+
+    async def save(self, job: Job):
+        raise NotImplementedError
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+    async def prune(self, finished_before: float):
+        raise NotImplementedError
+
+    async def recover(self):
+        # Jobs left queued/running by a previous process will never run
+        pass
+
+    # Backends shared by several worker processes pass cancellations to the job's owner
+    shared = False
+
+    async def request_cancel(self, job_id: str):
+        pass
+
+    async def cancel_requests(self) -> List[str]:
+        """Unfinished jobs another worker was asked to cancel."""
+        return []
+
+    def close(self):
+        pass
+
+
+class InMemoryJobBackend(JobBackend):
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+
+    async def save(self, job: Job):
+        self._jobs[job.id] = job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def prune(self, finished_before: float):
+        for job_id in [
+            job.id for job in self._jobs.values()
+            if job.finished and job.finished_at < finished_before
+        ]:
+            del self._jobs[job_id]
+
+
+class SQLiteJobBackend(JobBackend):
+    shared = True
+
+    def __init__(self, path: str = config.JOB_SQLITE_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = asyncio.Lock()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, finished_at REAL, data TEXT NOT NULL, "
+            "cancel_requested INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+        if "cancel_requested" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    async def save(self, job: Job):
+        async with self._lock:
+            await asyncio.to_thread(self._save, job)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        async with self._lock:
+            row = await asyncio.to_thread(self._get, job_id)
+        return Job(**json.loads(row[0])) if row else None
+
+    async def prune(self, finished_before: float):
+        async with self._lock:
+            await asyncio.to_thread(self._prune, finished_before)
+
+    async def recover(self):
+        async with self._lock:
+            rows = await asyncio.to_thread(self._unfinished)
+        for (data,) in rows:
+            job = Job(**json.loads(data))
+            if config.WORKERS > 1 and worker_alive(job.worker):
+                # A sibling worker sharing the database still owns it
+                continue
+            job.status = "failed"
+            job.error = "Interrupted by a service restart"
+            job.finished_at = time.time()
+            await self.save(job)
+
+    async def request_cancel(self, job_id: str):
+        async with self._lock:
+            await asyncio.to_thread(self._request_cancel, job_id)
+
+    async def cancel_requests(self) -> List[str]:
+        async with self._lock:
+            rows = await asyncio.to_thread(self._cancel_requests)
+        return [job_id for (job_id,) in rows]
+
+    def close(self):
+        self._conn.close()
+
+    def _save(self, job):
+        # An upsert, so the owner saving a job does not clear a cancellation another worker set
+        self._conn.execute(
+            "INSERT INTO jobs (id, status, finished_at, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET status = excluded.status, finished_at = excluded.finished_at, "
+            "data = excluded.data",
+            (job.id, job.status, job.finished_at, json.dumps(job.to_dict())),
+        )
+        self._conn.commit()
+
+    def _request_cancel(self, job_id):
+        self._conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+        self._conn.commit()
+
+    def _cancel_requests(self):
+        return self._conn.execute(
+            "SELECT id FROM jobs WHERE cancel_requested = 1 AND status IN ('queued', 'running')"
+        ).fetchall()
+
+    def _get(self, job_id):
+        return self._conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def _prune(self, finished_before):
+        self._conn.execute("DELETE FROM jobs WHERE finished_at < ?", (finished_before,))
+        self._conn.commit()
+
+    def _unfinished(self):
+        return self._conn.execute(
+            "SELECT data FROM jobs WHERE status IN ('queued', 'running')"
+        ).fetchall()
+
+
+def create_job_backend(kind: str = config.JOB_BACKEND) -> JobBackend:
+    if kind == "memory":
+        return InMemoryJobBackend()
+    if kind == "sqlite":
+        return SQLiteJobBackend()
+    raise ValueError(f"Unknown job backend: {kind}")
+
+
+class JobScheduler:
+    """Fixed pool of workers draining a bounded priority queue.
+
+    Higher priority jobs run first, ties run in submission order. submit()
+    raises QueueFullError instead of queueing past max_queue queued jobs;
+    a cancelled job stops counting at once, though its queue entry is only
+    dropped when a worker reaches it. With a shared backend, cancelling a
+    job another worker process owns sets a flag that the owner picks up
+    within cancel_poll_interval.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[Job], Awaitable],
+        backend: JobBackend = None,
+        workers: int = config.JOB_WORKERS,
+        max_queue: int = config.JOB_QUEUE_SIZE,
+        retention: float = config.JOB_RETENTION,
+        cancel_poll_interval: float = config.JOB_CANCEL_POLL_INTERVAL,
+    ):
+        self.runner = runner
+        self.backend = backend or create_job_backend()
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.retention = retention
+        self.cancel_poll_interval = cancel_poll_interval
+
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._queued = 0
+        self._sequence = itertools.count()
+        self._jobs: Dict[str, Job] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._workers = []
+        self.counters = {
+            "submitted": 0,
+            "rejected": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "timeout": 0,
+        }
+
+    async def start(self):
+        await self.backend.recover()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        if self.backend.shared and self.cancel_poll_interval:
+            self._workers.append(asyncio.create_task(self._poll_cancellations()))
+        return self
+
+    async def close(self):
+        # Cancelling a worker also cancels the job it is awaiting
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self.backend.close()
+
+    async def submit(self, type: str, params: dict, priority: int = 0, timeout: float = None) -> Job:
+        if type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type: {type}")
+        if self._queued >= self.max_queue:
+            self.counters["rejected"] += 1
+            raise QueueFullError(f"Job queue is full ({self.max_queue} jobs)")
+        job = Job(type, params, priority, timeout or config.JOB_TIMEOUT)
+        self._queue.put_nowait((-priority, next(self._sequence), job.id))
+        self._queued += 1
+        self._jobs[job.id] = job
+        self.counters["submitted"] += 1
+        await self.backend.save(job)
+        await self.backend.prune(time.time() - self.retention)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id) or await self.backend.get(job_id)
+
+    def owns(self, job_id: str) -> bool:
+        """Whether the job is queued or running in this worker process."""
+        return job_id in self._jobs
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = await self.backend.get(job_id)
+            if job is not None and not job.finished:
+                # Another worker owns it and stops it on its next poll
+                await self.backend.request_cancel(job_id)
+            return job
+        if job.status == "queued":
+            # The worker drops it when it comes off the queue
+            self._queued -= 1
+            await self._finish(job, "cancelled")
+        elif job.status == "running" and job_id in self._running:
+            # Not yet in _running while its start is being saved; a polled cancellation retries
+            self._running[job_id].cancel()
+        return job
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "workers": self.workers,
+            "running": len(self._running),
+            "queued": self._queued,
+            "max_queue": self.max_queue,
+        }
+
+    async def _work(self):
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                continue
+
+            self._queued -= 1
+            job.status = "running"
+            job.started_at = time.time()
+            await self.backend.save(job)
+
+            task = asyncio.create_task(asyncio.wait_for(self.runner(job), timeout=job.timeout))
+            self._running[job_id] = task
+            try:
+                job.result = await task
+                await self._finish(job, "succeeded")
+            except asyncio.TimeoutError:
+                await self._finish(job, "timeout", f"Job exceeded {job.timeout}s")
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    # The worker itself is being shut down
+                    raise
+                await self._finish(job, "cancelled")
+            except Exception as e:
+                logger.exception("Job %s failed", job_id)
+                await self._finish(job, "failed", str(e))
+            finally:
+                self._running.pop(job_id, None)
+
+    async def _poll_cancellations(self):
+        while True:
+            await asyncio.sleep(self.cancel_poll_interval)
+            if not self._jobs:
+                continue
+            try:
+                job_ids = await self.backend.cancel_requests()
+            except sqlite3.Error as e:
+                logger.warning("Failed to poll job cancellations: %s", e)
+                continue
+            for job_id in job_ids:
+                if job_id in self._jobs:
+                    await self.cancel(job_id)
+
+    async def _finish(self, job: Job, status: str, error: str = None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        self.counters[status] += 1
+        await self.backend.save(job)
+        # Finished jobs are served from the backend from here on
+        self._jobs.pop(job.id, None)
@@ -0,0 +1,147 @@
+import re
+from typing import Iterable, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from app.urls import canonical_parts, host_key, parts_key, url_key
+
+EXCLUDED_KEYWORDS = (
+    "contact", "about", "blog", "faq", "team", "terms", "privacy", "financing", "login", "signup",
+    "register", "cart", "checkout", "account", "dashboard", "profile", "search", "policy", "cookie",
+    "sitemap", "appointment", "careers", "news", "press", "testimonials", "reviews", "gallery",
+    "events", "admin", "rss", "help", "support", "partners", "legal", "newsletter", "subscribe",
+    "unsubscribe", "disclaimer",
+)
+# Links to files rather than pages
+ASSET_EXTENSIONS = (
+    "pdf", "jpg", "jpeg", "png", "gif", "webp", "svg", "ico", "css", "js", "json", "xml",
+    "zip", "gz", "mp3", "mp4", "mov", "avi", "doc", "docx", "xls", "xlsx", "ppt", "pptx", "txt",
+)
+
+
+# Service words that contain an excluded keyword ("press", "team", "account", ...)
+ALLOWED_WORDS = (
+    "pressure", "express", "compress", "steam", "accountant", "accounting", "paralegal", "research",
+    "cartridge",
+)
+
+
+class KeywordMatcher:
+    """Matches any keyword inside a path or text, the allowed words aside.
+
+    Keywords match anywhere in a segment, as the original substring test
+    did, so run-together slugs such as "/aboutus", "/contactus",
+    "/privacypolicy" and "/ourteam" match along with "/contact-us" and
+    "/Blog/". Allowed words are blanked out first, so "/pressure-washing"
+    and "/steam-cleaning" do not match for "press" and "team". search()
+    returns a match or None, like a compiled pattern's.
+    """
+
+    def __init__(self, keywords: Iterable[str], allowed: Iterable[str] = ()):
+        words = sorted({keyword.lower() for keyword in keywords}, key=len, reverse=True)
+        self.pattern = re.compile("|".join(map(re.escape, words)))
+        allowed = sorted({word.lower() for word in allowed}, key=len, reverse=True)
+        self.allowed = re.compile("|".join(map(re.escape, allowed))) if allowed else None
+
+    def search(self, text: str) -> Optional[re.Match]:
+        text = text.lower()
+        if self.allowed:
+            text = self.allowed.sub("/", text)
+        return self.pattern.search(text)
+
+
+def keyword_matcher(keywords: Iterable[str], allowed: Iterable[str] = ALLOWED_WORDS) -> KeywordMatcher:
+    return KeywordMatcher(keywords, allowed)
+
+
+EXCLUDED_RE = keyword_matcher(EXCLUDED_KEYWORDS)
+ASSET_RE = re.compile(r"\.(?:%s)$" % "|".join(ASSET_EXTENSIONS), re.IGNORECASE)
+
+
+class LinkSelection:
+    """Subpage URLs picked from a page's links, with what was dropped and why."""
+
+    def __init__(
+        self, urls: List[str], candidates: int, excluded: int, duplicates: int, truncated: int, source: str = "page"
+    ):
+        self.urls = urls
+        self.candidates = candidates
+        self.excluded = excluded
+        self.duplicates = duplicates
+        self.truncated = truncated
+        # "page" (the start page's links) or "sitemap"
+        self.source = source
+
+    @property
+    def saved_fetches(self) -> int:
+        # Duplicates would otherwise have taken fetch slots of their own
+        return self.duplicates
+
+    def as_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "candidates": self.candidates,
+            "excluded": self.excluded,
+            "duplicates": self.duplicates,
+            "truncated": self.truncated,
+            "selected": len(self.urls),
+            "savedFetches": self.saved_fetches,
+        }
+
+
+def select_subpages(
+    base_url: str,
+    links: Iterable[dict],
+    limit: int,
+    excluded: Optional[KeywordMatcher] = EXCLUDED_RE,
+    source: str = "page",
+) -> LinkSelection:
+    """Canonicalize, dedup, filter and rank a page's internal links.
+
+    Variants of one page (fragments, tracking parameters, trailing slashes,
+    http vs https, "www.") collapse into the first one seen, and a link back
+    to the base page counts as a duplicate. Remaining candidates are ranked
+    by path depth (section and service pages sit near the root), then by how
+    often the page links to them, then document order, before the limit is
+    applied. Links on the base host are rewritten to its scheme and host so
+    the fetch does not go through a redirect.
+    """
+    base = urlsplit(base_url)
+    base_host = host_key(base.hostname or "")
+    seen = {url_key(base_url)}
+    candidates = {}
+    total = dropped = duplicates = 0
+    for order, link in enumerate(links):
+        href = link.get("href")
+        if not href:
+            continue
+        total += 1
+        parts = canonical_parts(href, base_url)
+        if parts is None:
+            dropped += 1
+            continue
+        path = parts.path
+        if not path.strip("/") or ASSET_RE.search(path) or (excluded and excluded.search(path.lower())):
+            dropped += 1
+            continue
+        key = parts_key(parts)
+        if key in seen:
+            duplicates += 1
+            if key in candidates:
+                candidates[key][1] += 1
+            continue
+        if host_key(parts.hostname or "") == base_host:
+            parts = parts._replace(scheme=base.scheme, netloc=base.netloc)
+        url = urlunsplit(parts)
+        seen.add(key)
+        depth = len([segment for segment in path.split("/") if segment])
+        candidates[key] = [depth, 1, order, url]
+
+    ranked = sorted(candidates.values(), key=lambda candidate: (candidate[0], -candidate[1], candidate[2]))
+    return LinkSelection(
+        urls=[candidate[3] for candidate in ranked[:limit]],
+        candidates=total,
+        excluded=dropped,
+        duplicates=duplicates,
+        truncated=max(0, len(ranked) - limit),
+        source=source,
+    )
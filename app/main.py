@@ -1,10 +1,213 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from crawl4ai.deep_crawling.filters import URLPatternFilter
-from app.crawler import handle_crawl, handle_deep_crawl
+from app import config
+from app.compression import CompressionMiddleware
+from app.crawler import handle_crawl, handle_deep_crawl, stream_deep_crawl
+from app.deadline import NO_DEADLINE, Deadline
+from app.jobs import Job, JobScheduler, QueueFullError
+from app.metrics import REGISTRY, REQUESTS, Timings, new_timings, refresh_runtime_gauges
+from app.payload import FastJSONResponse, FieldSelection, dumps
+from app.runtime import CrawlRuntime
 import asyncio
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from typing import Awaitable, List, Optional
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    runtime = CrawlRuntime()
+    await runtime.start()
+    jobs = JobScheduler(lambda job: run_job(runtime, job))
+    await jobs.start()
+    app.state.runtime = runtime
+    app.state.jobs = jobs
+    try:
+        yield
+    finally:
+        await jobs.close()
+        await runtime.close()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware)
+
+DEFAULT_FILTER_PATTERNS = ["/service", "/services", "/product", "/products"]
+DISCONNECT_POLL_INTERVAL = 0.5
+CLIENT_CLOSED_REQUEST = 499
+PARTIAL_MESSAGE = "Deadline reached or an extraction failed; returning partial results."
+
+class ClientDisconnected(Exception):
+    pass
+
+async def cancel_on_disconnect(request: Request, work: Awaitable):
+    """Await work, cancelling it as soon as the HTTP client goes away."""
+    task = asyncio.ensure_future(work)
+
+    async def watch():
+        while not await request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+        task.cancel()
+
+    watcher = asyncio.create_task(watch())
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if watcher.done() and not watcher.cancelled():
+            raise ClientDisconnected()
+        raise
+    finally:
+        watcher.cancel()
+
+async def cached_crawl(runtime, key: str, url: str, cache_mode: str, compute, deadline: Deadline = NO_DEADLINE):
+    def lookup():
+        return runtime.cache.get_or_compute(key, url, cache_mode, compute, runtime.http_client, runtime.hosts)
+
+    if deadline:
+        # A crawl cut short by this caller's deadline must not be handed to callers without one
+        return await lookup()
+    # Identical concurrent requests share one cache lookup/crawl
+    return await runtime.single_flight.run(f"{cache_mode}:{key}", lookup)
+
+def project(selection: FieldSelection, response: dict) -> dict:
+    # The partial marker, and why basic info is missing, survive any field selection
+    projected = selection.project(response)
+    if response.get("partial"):
+        projected = {**projected, "partial": True}
+    page_content = response.get("pageContent") or {}
+    if "basicInfoError" in page_content and isinstance(projected.get("pageContent"), dict):
+        projected["pageContent"] = {**projected["pageContent"], "basicInfoError": page_content["basicInfoError"]}
+    return projected
+
+async def run_crawl(
+    runtime,
+    url: str,
+    cache_mode: str = "use",
+    fetch_mode: str = config.SUBPAGE_FETCH_MODE,
+    fields: Optional[List[str]] = None,
+    include_html: bool = True,
+    timings: Optional[Timings] = None,
+    deadline_ms: Optional[float] = None,
+    discover: bool = config.SITEMAP_DISCOVERY
+):
+    selection = FieldSelection(fields, include_html)
+    timings = timings or new_timings()
+    deadline = Deadline(deadline_ms)
+    # The key only carries what changes the crawl itself; the projection is applied per caller
+    key = runtime.cache.make_key(
+        "crawl", url,
+        fetch_mode=fetch_mode,
+        html=selection.wants("pageContent.html"),
+        basic_info=selection.wants("pageContent.basicInfo"),
+        subpages=selection.wants("services") or selection.wants("subpages"),
+        link_selection=selection.wants("linkSelection"),
+        discover=discover
+    )
+    response = await cached_crawl(
+        runtime,
+        key,
+        url,
+        cache_mode,
+        lambda validators: handle_crawl(
+            url, runtime, validators, fetch_mode, selection, timings, deadline, discover
+        ),
+        deadline
+    )
+    return project(selection, response)
+
+def deep_crawl_key(
+    runtime, url: str, max_pages: int, patterns: List[str], selection: FieldSelection, discover: bool
+) -> str:
+    # Also names the crawl's saved frontier in the page store
+    return runtime.cache.make_key(
+        "deep", url,
+        max_pages=max_pages,
+        filter_patterns=patterns,
+        html=selection.wants("pageContent.html"),
+        basic_info=selection.wants("pageContent.basicInfo"),
+        section_html=selection.wants("pages.extracted_content.html"),
+        discover=discover
+    )
+
+async def run_deep_crawl(
+    runtime,
+    url: str,
+    max_pages: int = 10,
+    filter_patterns: Optional[List[str]] = None,
+    cache_mode: str = "use",
+    fields: Optional[List[str]] = None,
+    include_html: bool = True,
+    timings: Optional[Timings] = None,
+    resume: bool = False,
+    deadline_ms: Optional[float] = None,
+    discover: bool = config.SITEMAP_DISCOVERY
+):
+    patterns = filter_patterns if filter_patterns else DEFAULT_FILTER_PATTERNS
+    deadline = Deadline(deadline_ms)
+
+    url_filter = URLPatternFilter(patterns=patterns)
+    selection = FieldSelection(fields, include_html)
+    timings = timings or new_timings()
+    key = deep_crawl_key(runtime, url, max_pages, patterns, selection, discover)
+
+    response = await cached_crawl(
+        runtime,
+        key,
+        url,
+        cache_mode,
+        lambda validators: handle_deep_crawl(
+            url, max_pages, url_filter, runtime, validators, selection, timings, key, resume, deadline, discover
+        ),
+        deadline
+    )
+    return project(selection, response)
+
+async def run_job(runtime, job: Job):
+    if job.type == "crawl":
+        return await run_crawl(runtime, **job.params)
+    return await run_deep_crawl(runtime, **job.params)
+
+class JobRequest(BaseModel):
+    type: str = Field("crawl", pattern="^(crawl|deep)$", description="crawl or deep")
+    url: str = Field(..., description="Target URL")
+    max_pages: int = Field(10, description="Maximum pages to crawl (deep only)")
+    filter_patterns: Optional[List[str]] = Field(None, description="URL patterns to filter (deep only)")
+    fetch_mode: str = Field(config.SUBPAGE_FETCH_MODE, pattern="^(http|browser)$", description="Subpage fetching (crawl only)")
+    cache: str = Field("use", pattern="^(use|bypass|refresh)$", description="Result cache mode")
+    fields: Optional[List[str]] = Field(None, description="Dotted result paths to return, e.g. pageContent.basicInfo")
+    include_html: bool = Field(True, description="Include serialized html in the result")
+    resume: bool = Field(False, description="Continue an interrupted deep crawl from its saved frontier (deep only)")
+    discover: bool = Field(config.SITEMAP_DISCOVERY, description="Find subpages in robots.txt and the sitemap")
+    priority: int = Field(0, description="Higher runs first")
+    timeout: Optional[float] = Field(None, gt=0, description="Seconds before the job is aborted")
+
+    def params(self) -> dict:
+        if self.type == "crawl":
+            return {
+                "url": self.url,
+                "cache_mode": self.cache,
+                "fetch_mode": self.fetch_mode,
+                "fields": self.fields,
+                "include_html": self.include_html,
+                "discover": self.discover
+            }
+        return {
+            "url": self.url,
+            "max_pages": self.max_pages,
+            "filter_patterns": self.filter_patterns,
+            "cache_mode": self.cache,
+            "fields": self.fields,
+            "include_html": self.include_html,
+            "resume": self.resume,
+            "discover": self.discover
+        }
+
+class BatchRequest(BaseModel):
+    urls: List[str] = Field(..., min_length=1, max_length=config.BATCH_MAX_URLS, description="Root URLs to crawl")
+    fetch_mode: str = Field(config.SUBPAGE_FETCH_MODE, pattern="^(http|browser)$", description="Subpage fetching")
+    cache: str = Field("use", pattern="^(use|bypass|refresh)$", description="Result cache mode")
+    fields: Optional[List[str]] = Field(None, description="Dotted result paths to return, e.g. pageContent.basicInfo")
+    include_html: bool = Field(True, description="Include serialized html in the results")
+    discover: bool = Field(config.SITEMAP_DISCOVERY, description="Find subpages in robots.txt and the sitemap")
 
 @app.get("/")
 def health_check():
@@ -13,48 +216,303 @@ def health_check():
         "message": "Health check successful"
     }
 
+@app.get("/ready")
+def readiness_check(request: Request):
+    # Unlike /, passes only once browsers and extraction workers are warm (see app.warmup)
+    startup = request.app.state.runtime.startup
+    data = startup.as_dict()
+    if not data["ready"]:
+        return JSONResponse(
+            status_code=503,
+            content={"status": 503, "data": data, "message": f"Worker {startup.status}."}
+        )
+    return {
+        "status": 200,
+        "data": data,
+        "message": "Ready."
+    }
+
+@app.get("/cache/stats")
+def cache_stats(request: Request):
+    runtime = request.app.state.runtime
+    return {
+        **runtime.cache.stats(),
+        "singleFlight": runtime.single_flight.stats(),
+        "pageStore": runtime.page_store.stats() if runtime.page_store else None,
+        "templates": runtime.templates.stats(),
+        "discovery": runtime.discovery.stats(),
+        "urlShapes": runtime.url_shapes.stats()
+    }
+
+@app.get("/hosts")
+def hosts_stats(request: Request):
+    return request.app.state.runtime.hosts.stats()
+
+@app.get("/concurrency")
+def concurrency_stats(request: Request):
+    return request.app.state.runtime.concurrency.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics(request: Request):
+    refresh_runtime_gauges(request.app.state.runtime, request.app.state.jobs)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/crawl")
 async def crawl_endpoint(
-    url: str = Query(..., description="Target URL")
+    request: Request,
+    url: str = Query(..., description="Target URL"),
+    cache_mode: str = Query(
+        "use", alias="cache", pattern="^(use|bypass|refresh)$", description="Result cache mode: use, bypass or refresh"
+    ),
+    fetch_mode: str = Query(
+        config.SUBPAGE_FETCH_MODE, pattern="^(http|browser)$",
+        description="Subpage fetching: http (plain HTTP with browser fallback) or browser"
+    ),
+    fields: Optional[List[str]] = Query(
+        None, description="Result paths to return, repeated or comma separated (e.g. pageContent.basicInfo,services.title)"
+    ),
+    include_html: bool = Query(True, description="Include serialized html in the result"),
+    timings: bool = Query(False, description="Add per-stage timings; stages are empty when served from cache"),
+    deadline_ms: Optional[int] = Query(
+        None, gt=0, description="Time budget; work still running is cancelled and what was collected returned as partial"
+    ),
+    discover: bool = Query(
+        config.SITEMAP_DISCOVERY, description="Find subpages in robots.txt and the sitemap instead of waiting for rendered links"
+    ),
 ):
+    stage_timings = new_timings(timings)
     try:
-        response = await handle_crawl(url)
-        return {
+        response = await cancel_on_disconnect(request, run_crawl(
+            request.app.state.runtime, url, cache_mode, fetch_mode, fields, include_html, stage_timings, deadline_ms,
+            discover
+        ))
+        REQUESTS.inc(endpoint="crawl", outcome="partial" if response.get("partial") else "ok")
+        body = {
             "status": 200, 
             "data": response, 
-            "message": "Successfully crawled."
+            "message": PARTIAL_MESSAGE if response.get("partial") else "Successfully crawled."
         }
+        if timings:
+            body["timings"] = stage_timings.as_dict()
+        # Returning the response directly skips FastAPI's jsonable_encoder pass
+        return FastJSONResponse(body)
+    except ClientDisconnected:
+        # Nobody is left to read a body; the crawl was cancelled
+        REQUESTS.inc(endpoint="crawl", outcome="disconnected")
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except Exception as e:
+        REQUESTS.inc(endpoint="crawl", outcome="error")
         return {
             "status": 500, 
-            "data": null, 
+            "data": None, 
             "message": str(e)
         }
 
 
 @app.get("/crawl/deep")
 async def deep_crawl_endpoint(
+    request: Request,
     url: str = Query(..., description="Target URL"),
     max_pages: int = Query(10, description="Maximum pages to crawl"),
     filter_patterns: Optional[List[str]] = Query(
         None, description="List of URL patterns to filter (e.g., *services*, *products*)"
-    )
+    ),
+    cache_mode: str = Query(
+        "use", alias="cache", pattern="^(use|bypass|refresh)$", description="Result cache mode: use, bypass or refresh"
+    ),
+    fields: Optional[List[str]] = Query(
+        None, description="Result paths to return, repeated or comma separated (e.g. pageContent.basicInfo,services.title)"
+    ),
+    include_html: bool = Query(True, description="Include serialized html in the result"),
+    timings: bool = Query(False, description="Add per-stage timings; stages are empty when served from cache"),
+    resume: bool = Query(False, description="Continue an interrupted crawl of the same url and options"),
+    deadline_ms: Optional[int] = Query(
+        None, gt=0, description="Time budget; work still running is cancelled and what was collected returned as partial"
+    ),
+    discover: bool = Query(
+        config.SITEMAP_DISCOVERY, description="Find subpages in robots.txt and the sitemap instead of waiting for rendered links"
+    ),
 ):
+    stage_timings = new_timings(timings)
     try:
-        patterns = filter_patterns if filter_patterns else ["/service", "/services", "/product", "/products"]
-
-        url_filter = URLPatternFilter(patterns=patterns)
-
-        response = await handle_deep_crawl(url, max_pages, url_filter)
-        return {
+        response = await cancel_on_disconnect(request, run_deep_crawl(
+            request.app.state.runtime, url, max_pages, filter_patterns, cache_mode, fields, include_html,
+            stage_timings, resume, deadline_ms, discover
+        ))
+        REQUESTS.inc(endpoint="deep", outcome="partial" if response.get("partial") else "ok")
+        body = {
             "status": 200, 
             "data": response, 
-            "message": "Successfully deep crawled."
+            "message": PARTIAL_MESSAGE if response.get("partial") else "Successfully deep crawled."
         }
+        if timings:
+            body["timings"] = stage_timings.as_dict()
+        return FastJSONResponse(body)
+
+    except ClientDisconnected:
+        REQUESTS.inc(endpoint="deep", outcome="disconnected")
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
 
     except Exception as e:
+        REQUESTS.inc(endpoint="deep", outcome="error")
         return {
             "status": 500, 
             "data": None, 
             "message": str(e)
-        } 
\ No newline at end of file
+        } 
+
+@app.get("/crawl/deep/stream")
+async def deep_crawl_stream_endpoint(
+    request: Request,
+    url: str = Query(..., description="Target URL"),
+    max_pages: int = Query(10, description="Maximum pages to crawl"),
+    filter_patterns: Optional[List[str]] = Query(
+        None, description="List of URL patterns to filter (e.g., *services*, *products*)"
+    ),
+    output: str = Query(
+        "ndjson", alias="format", pattern="^(ndjson|sse)$", description="Stream format: ndjson or sse"
+    ),
+    include_html: bool = Query(True, description="Include serialized html in page events"),
+    resume: bool = Query(False, description="Continue an interrupted crawl of the same url and options"),
+    deadline_ms: Optional[int] = Query(
+        None, gt=0, description="Time budget; work still running is cancelled and what was collected returned as partial"
+    ),
+    discover: bool = Query(
+        config.SITEMAP_DISCOVERY, description="Find subpages in robots.txt and the sitemap instead of waiting for rendered links"
+    ),
+):
+    runtime = request.app.state.runtime
+    patterns = filter_patterns if filter_patterns else DEFAULT_FILTER_PATTERNS
+    url_filter = URLPatternFilter(patterns=patterns)
+    selection = FieldSelection(include_html=include_html)
+    events = stream_deep_crawl(
+        url, max_pages, url_filter, runtime, selection=selection, timings=new_timings(),
+        resume_key=deep_crawl_key(runtime, url, max_pages, patterns, selection, discover), resume=resume,
+        deadline=Deadline(deadline_ms), discover=discover
+    )
+    REQUESTS.inc(endpoint="deep_stream", outcome="started")
+
+    async def body():
+        # Leaving this generator (client gone or crawl finished) closes the crawl
+        try:
+            async for event in events:
+                if await request.is_disconnected():
+                    break
+                payload = dumps(event)
+                if output == "sse":
+                    yield b"event: " + event["event"].encode() + b"\ndata: " + payload + b"\n\n"
+                else:
+                    yield payload + b"\n"
+        finally:
+            await events.aclose()
+
+    media_type = "text/event-stream" if output == "sse" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type)
+
+
+@app.post("/crawl/batch")
+async def crawl_batch_endpoint(
+    request: Request,
+    body: BatchRequest,
+    output: str = Query(
+        "ndjson", alias="format", pattern="^(ndjson|sse)$", description="Stream format: ndjson or sse"
+    )
+):
+    """Crawl many roots as /crawl would, streaming one "result" event per root as it finishes.
+
+    Roots share the browser pool under one process-wide limit (BATCH_CONCURRENCY, by
+    default the pool size: each root leases a pooled browser); a failed root yields
+    status 500 in its own event and the batch goes on.
+    """
+    runtime = request.app.state.runtime
+
+    async def crawl(url: str):
+        try:
+            response = await run_crawl(
+                runtime, url, body.cache, body.fetch_mode, body.fields, body.include_html, discover=body.discover
+            )
+        except Exception:
+            REQUESTS.inc(endpoint="batch_root", outcome="error")
+            raise
+        REQUESTS.inc(endpoint="batch_root", outcome="ok")
+        return response
+
+    events = runtime.batches.stream(body.urls, crawl)
+    REQUESTS.inc(endpoint="batch", outcome="started")
+
+    async def stream():
+        # Leaving this generator (client gone or batch finished) cancels the remaining roots
+        try:
+            async for event in events:
+                if await request.is_disconnected():
+                    break
+                payload = dumps(event)
+                if output == "sse":
+                    yield b"event: " + event["event"].encode() + b"\ndata: " + payload + b"\n\n"
+                else:
+                    yield payload + b"\n"
+        finally:
+            await events.aclose()
+
+    media_type = "text/event-stream" if output == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type)
+
+
+@app.post("/jobs")
+async def create_job(request: Request, body: JobRequest):
+    try:
+        job = await request.app.state.jobs.submit(body.type, body.params(), body.priority, body.timeout)
+    except QueueFullError as e:
+        return JSONResponse(
+            status_code=429,
+            content={"status": 429, "data": None, "message": str(e)}
+        )
+    return {
+        "status": 202,
+        "data": job.to_dict(),
+        "message": "Job queued."
+    }
+
+@app.get("/jobs/stats")
+def jobs_stats(request: Request):
+    return request.app.state.jobs.stats()
+
+@app.get("/jobs/{job_id}")
+async def get_job(request: Request, job_id: str):
+    job = await request.app.state.jobs.get(job_id)
+    if job is None:
+        return JSONResponse(
+            status_code=404,
+            content={"status": 404, "data": None, "message": "Job not found."}
+        )
+    return {
+        "status": 200,
+        "data": job.to_dict(),
+        "message": f"Job {job.status}."
+    }
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(request: Request, job_id: str):
+    jobs = request.app.state.jobs
+    owned = jobs.owns(job_id)
+    job = await jobs.cancel(job_id)
+    if job is None:
+        return JSONResponse(
+            status_code=404,
+            content={"status": 404, "data": None, "message": "Job not found."}
+        )
+    if not owned and not job.finished:
+        # Another worker runs it; the cancellation is stored for that worker to act on
+        return JSONResponse(
+            status_code=202,
+            content={
+                "status": 202,
+                "data": job.to_dict(),
+                "message": "Cancellation requested; the worker that owns the job will stop it."
+            }
+        )
+    return {
+        "status": 200,
+        "data": job.to_dict(),
+        "message": "Cancellation requested." if not job.finished else f"Job {job.status}."
+    }
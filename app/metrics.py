@@ -0,0 +1,260 @@
+import math
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterable, Tuple
+
+from app import config
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _label_key(labels: dict) -> Tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: Tuple, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class Gauge:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        self._values[_label_key(labels)] = value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = STAGE_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label key -> [per-bucket counts, sum, count]
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        series = self._values.get(key)
+        if series is None:
+            series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_format_labels(key, [('le', _format_value(bound))])} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(key)} {count}"
+
+
+class Registry:
+    """Minimal Prometheus text-format registry; metrics are process-wide."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._register(Counter(name, help))
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self._register(Gauge(name, help))
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = STAGE_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, buckets))
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics.values() for line in metric.render()) + "\n"
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram("crawl_stage_seconds", "Time spent in each crawl stage")
+REQUESTS = REGISTRY.counter("crawl_requests_total", "API crawl requests by endpoint and outcome")
+PAGES_FETCHED = REGISTRY.counter("crawl_pages_fetched_total", "Pages fetched, by fetch path")
+BYTES_DOWNLOADED = REGISTRY.counter(
+    "crawl_bytes_downloaded_total", "HTML downloaded, by fetch path (characters for rendered pages)"
+)
+FETCH_FAILURES = REGISTRY.counter("crawl_fetch_failures_total", "Failed page fetches, by fetch path and reason")
+BROWSER_REQUESTS = REGISTRY.counter(
+    "browser_requests_total", "Browser subresource requests by resource profile and blocked/allowed decision"
+)
+SUBPAGE_FETCHES_SAVED = REGISTRY.counter(
+    "crawl_subpage_fetches_saved_total", "Subpage fetches skipped because the link was a variant of a selected page"
+)
+CONCURRENCY_DECISIONS = REGISTRY.counter(
+    "browser_concurrency_decisions_total", "Adaptive browser page limit changes, by action and reason"
+)
+EXTRACTION_TEMPLATES = REGISTRY.counter(
+    "extraction_template_pages_total", "Subpage extractions by site template outcome: hit, miss or scan (no template yet)"
+)
+TEMPLATE_SAVED_SECONDS = REGISTRY.counter(
+    "extraction_template_saved_seconds_total", "Estimated full-scan time saved by site template hits"
+)
+SITEMAP_FETCHES = REGISTRY.counter(
+    "sitemap_fetches_total", "robots.txt and sitemap fetches of link discovery, by kind and outcome"
+)
+DEEP_CRAWL_PAGES = REGISTRY.counter(
+    "deep_crawl_pages_total", "Deep crawl pages, by whether they found a new service (new, none) or failed extraction"
+)
+DEEP_CRAWL_EARLY_STOPS = REGISTRY.counter(
+    "deep_crawl_early_stops_total", "Deep crawls stopped once new services leveled off"
+)
+STARTUP_SECONDS = REGISTRY.gauge(
+    "startup_seconds", "Seconds this worker spent in each startup stage, and from process start until ready"
+)
+
+# Refreshed from the runtime's stats() on every scrape
+POOL_BROWSERS = REGISTRY.gauge("browser_pool_browsers", "Browsers in the pool by state")
+EXECUTOR_TASKS = REGISTRY.gauge("extraction_executor_tasks", "Extraction tasks pending and the pending cap")
+EXTRACTION_TIMEOUTS = REGISTRY.gauge("extraction_timeouts", "Extraction tasks that exceeded their timeout")
+JOBS = REGISTRY.gauge("jobs", "Background jobs queued or running")
+JOB_OUTCOMES = REGISTRY.gauge("jobs_finished", "Background jobs finished since start, by outcome")
+HOST_FETCHES = REGISTRY.gauge("host_scheduler_active_fetches", "Fetches currently holding a host slot")
+CACHE = REGISTRY.gauge("result_cache", "Result cache entries and bytes")
+PAGE_STORE = REGISTRY.gauge("page_store", "Page store bytes (pages, extractions, frontiers) and counters since start")
+BATCH_ROOTS = REGISTRY.gauge("batch_roots", "Batch root crawls queued or running, and the shared limit")
+BROWSER_CONCURRENCY = REGISTRY.gauge(
+    "browser_page_concurrency", "Browser page loads running and waiting, and the adaptive limit"
+)
+MEMORY_RSS = REGISTRY.gauge("process_memory_rss_bytes", "Resident memory of this process and its browsers, and the limit")
+SINGLE_FLIGHT = REGISTRY.gauge("single_flight_in_flight", "Distinct crawls currently shared by coalesced callers")
+
+
+def record_page(via: str, size: int):
+    PAGES_FETCHED.inc(via=via)
+    BYTES_DOWNLOADED.inc(size, via=via)
+
+
+class Timings:
+    """Per-request stage timings; every span is also observed in STAGE_SECONDS.
+
+    A disabled instance hands out a shared no-op context, so instrumented
+    code pays one attribute check per span.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages: Dict[str, float] = {}
+        self.started = time.perf_counter() if enabled else 0.0
+
+    def span(self, stage: str):
+        if not self.enabled:
+            return _NO_SPAN
+        return self._span(stage)
+
+    @contextmanager
+    def _span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float):
+        # Repeated stages (one per subpage) add up
+        if not self.enabled:
+            return
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+    def as_dict(self) -> dict:
+        return {
+            "totalMs": round((time.perf_counter() - self.started) * 1000, 1),
+            "stages": {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()},
+        }
+
+
+_NO_SPAN = nullcontext()
+NO_TIMINGS = Timings(enabled=False)
+
+
+def new_timings(requested: bool = False) -> Timings:
+    return Timings() if requested or config.METRICS_ENABLED else NO_TIMINGS
+
+
+def refresh_runtime_gauges(runtime, jobs=None):
+    pool = runtime.browser_pool.stats()
+    for state in ("size", "idle", "leased", "missing"):
+        POOL_BROWSERS.set(pool.get(state, 0), state=state)
+    executor = runtime.executor.stats()
+    EXECUTOR_TASKS.set(executor["pending"], state="pending")
+    EXECUTOR_TASKS.set(executor["max_pending"], state="max_pending")
+    EXTRACTION_TIMEOUTS.set(executor["timeouts"])
+    HOST_FETCHES.set(runtime.hosts.active)
+    cache = runtime.cache.stats()
+    CACHE.set(cache["entries"], kind="entries")
+    CACHE.set(cache["bytes"], kind="bytes")
+    if "disk_bytes" in cache:
+        CACHE.set(cache["disk_bytes"], kind="disk_bytes")
+    SINGLE_FLIGHT.set(runtime.single_flight.stats()["in_flight"])
+    concurrency = runtime.concurrency.stats()
+    for state in ("limit", "active", "waiting"):
+        BROWSER_CONCURRENCY.set(concurrency[state], state=state)
+    MEMORY_RSS.set(concurrency["rss_bytes"], kind="process")
+    MEMORY_RSS.set(concurrency["browser_rss_bytes"], kind="browsers")
+    MEMORY_RSS.set(concurrency["memory_limit_bytes"], kind="limit")
+    batches = runtime.batches.stats()
+    for state in ("queued", "active", "concurrency"):
+        BATCH_ROOTS.set(batches[state], state=state)
+    if runtime.page_store:
+        for name, value in runtime.page_store.stats().items():
+            PAGE_STORE.set(value, kind=name)
+    if jobs is not None:
+        job_stats = jobs.stats()
+        JOBS.set(job_stats["queued"], state="queued")
+        JOBS.set(job_stats["running"], state="running")
+        for outcome in ("succeeded", "failed", "cancelled", "timeout", "rejected"):
+            JOB_OUTCOMES.set(job_stats[outcome], outcome=outcome)
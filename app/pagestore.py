@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import time
+import zlib
+from typing import List, Optional, Tuple
+
+from app import config
+from app.payload import dumps, loads
+from app.urls import url_key
+
+logger = logging.getLogger(__name__)
+
+# The stored size is re-read from SQLite whenever this much of max_bytes was written here,
+# since other workers may write to the same file
+SYNC_FRACTION = 0.05
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8", errors="replace")).hexdigest()
+
+
+class StoredPage:
+    def __init__(self, url: str, hash: str, fetched_at: float, etag: str = None, last_modified: str = None):
+        self.url = url
+        self.hash = hash
+        self.fetched_at = fetched_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class PageStore:
+    """Content-addressed store of crawled pages for incremental recrawls.
+
+    HTML is kept zlib-compressed under its SHA-256, with an index of URL ->
+    hash, fetch time and validators, so a recrawl can send conditional
+    requests and reuse the stored page on 304. Extraction results are keyed
+    by content hash and kind, so unchanged content is never re-extracted,
+    whichever URL it came from. Deep crawl frontiers are saved as they
+    advance so an interrupted crawl can be resumed.
+
+    max_bytes bounds page blobs, extractions and saved frontiers together.
+    Once they exceed it, rows older than max_age and orphans go first, then
+    the least recently used of: a blob (with its index rows and
+    extractions), the extractions of content with no stored blob, or a
+    saved frontier (with its events), down to 90% of the limit. Several
+    worker processes may share the file, so the size is re-read from SQLite
+    before evicting and every SYNC_FRACTION of max_bytes written. Calls run
+    in a thread behind a lock, like the result cache's SQLite tier.
+    """
+
+    def __init__(
+        self,
+        path: str = config.PAGE_STORE_PATH,
+        max_bytes: int = config.PAGE_STORE_MAX_BYTES,
+        max_age: float = config.PAGE_STORE_MAX_AGE,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = asyncio.Lock()
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url_key TEXT PRIMARY KEY, url TEXT NOT NULL, hash TEXT NOT NULL, fetched_at REAL NOT NULL, "
+            "etag TEXT, last_modified TEXT);"
+            "CREATE INDEX IF NOT EXISTS pages_hash ON pages (hash);"
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "hash TEXT PRIMARY KEY, html BLOB NOT NULL, size INTEGER NOT NULL, used_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS blobs_used_at ON blobs (used_at);"
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            "hash TEXT NOT NULL, kind TEXT NOT NULL, value BLOB NOT NULL, stored_at REAL NOT NULL, "
+            "PRIMARY KEY (hash, kind));"
+            "CREATE TABLE IF NOT EXISTS frontiers (key TEXT PRIMARY KEY, state BLOB NOT NULL, updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS frontier_events ("
+            "key TEXT NOT NULL, url_key TEXT NOT NULL, event BLOB NOT NULL, PRIMARY KEY (key, url_key));"
+        )
+        self._conn.commit()
+        self._bytes = self._stored_bytes()
+        self._written = 0
+        self.counters = {
+            "stores": 0,
+            "unchanged": 0,
+            "revalidated": 0,
+            "extraction_hits": 0,
+            "extraction_misses": 0,
+            "evictions": 0,
+        }
+
+    async def lookup(self, url: str) -> Optional[StoredPage]:
+        row = await self._run(self._lookup, url_key(url))
+        if row is None or row[2] < time.time() - self.max_age:
+            return None
+        return StoredPage(*row)
+
+    async def html(self, hash: str) -> Optional[str]:
+        return await self._run(self._html, hash)
+
+    async def put_page(self, url: str, html: str, validators: dict) -> str:
+        """Index url at the hash of html; the blob is only written when the content is new."""
+        hash = content_hash(html)
+        if await self._run(self._put_page, url, hash, html, validators, time.time()):
+            self.counters["stores"] += 1
+        else:
+            self.counters["unchanged"] += 1
+        return hash
+
+    async def touch(self, url: str):
+        # The stored page was revalidated (304): it is as fresh as a new fetch
+        self.counters["revalidated"] += 1
+        await self._run(self._touch, url_key(url), time.time())
+
+    async def extraction(self, hash: str, kind: str):
+        payload = await self._run(self._extraction, hash, kind)
+        if payload is None:
+            self.counters["extraction_misses"] += 1
+            return None
+        self.counters["extraction_hits"] += 1
+        return loads(zlib.decompress(payload))
+
+    async def put_extraction(self, hash: str, kind: str, value):
+        await self._run(self._put_extraction, hash, kind, zlib.compress(dumps(value)), time.time())
+
+    async def frontier(self, key: str) -> Optional[Tuple[dict, List[dict]]]:
+        """The saved (crawler state, emitted events) of an unfinished deep crawl."""
+        row = await self._run(self._frontier, key)
+        if row is None:
+            return None
+        state, events = row
+        return loads(zlib.decompress(state)), [loads(zlib.decompress(event)) for event in events]
+
+    async def save_frontier(self, key: str, state: dict):
+        await self._run(self._save_frontier, key, zlib.compress(dumps(state)), time.time())
+
+    async def save_frontier_event(self, key: str, url: str, event: dict):
+        await self._run(self._save_frontier_event, key, url_key(url), zlib.compress(dumps(event)))
+
+    async def drop_frontier(self, key: str):
+        await self._run(self._drop_frontier, key)
+
+    def close(self):
+        self._conn.close()
+
+    def stats(self) -> dict:
+        return {**self.counters, "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+    async def _run(self, fn, *args):
+        async with self._lock:
+            return await asyncio.to_thread(fn, *args)
+
+    def _lookup(self, key):
+        return self._conn.execute(
+            "SELECT url, hash, fetched_at, etag, last_modified FROM pages WHERE url_key = ?", (key,)
+        ).fetchone()
+
+    def _html(self, hash):
+        row = self._conn.execute("SELECT html FROM blobs WHERE hash = ?", (hash,)).fetchone()
+        if row is None:
+            return None
+        self._conn.execute("UPDATE blobs SET used_at = ? WHERE hash = ?", (time.time(), hash))
+        self._conn.commit()
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def _put_page(self, url, hash, html, validators, now):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO pages (url_key, url, hash, fetched_at, etag, last_modified) VALUES (?, ?, ?, ?, ?, ?)",
+            (url_key(url), url, hash, now, validators.get("etag"), validators.get("last_modified")),
+        )
+        updated = self._conn.execute("UPDATE blobs SET used_at = ? WHERE hash = ?", (now, hash)).rowcount
+        if not updated:
+            blob = zlib.compress(html.encode("utf-8"), 6)
+            self._conn.execute(
+                "INSERT INTO blobs (hash, html, size, used_at) VALUES (?, ?, ?, ?)", (hash, blob, len(blob), now)
+            )
+        self._conn.commit()
+        if not updated:
+            self._grew(len(blob), now)
+        return not updated
+
+    def _touch(self, key, now):
+        self._conn.execute("UPDATE pages SET fetched_at = ? WHERE url_key = ?", (now, key))
+        self._conn.commit()
+
+    def _extraction(self, hash, kind):
+        row = self._conn.execute("SELECT value FROM extractions WHERE hash = ? AND kind = ?", (hash, kind)).fetchone()
+        return row[0] if row else None
+
+    def _put_extraction(self, hash, kind, payload, now):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO extractions (hash, kind, value, stored_at) VALUES (?, ?, ?, ?)",
+            (hash, kind, payload, now),
+        )
+        self._conn.commit()
+        self._grew(len(payload), now)
+
+    def _frontier(self, key):
+        row = self._conn.execute("SELECT state FROM frontiers WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        events = [event for event, in self._conn.execute("SELECT event FROM frontier_events WHERE key = ?", (key,))]
+        return row[0], events
+
+    def _save_frontier(self, key, state, now):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO frontiers (key, state, updated_at) VALUES (?, ?, ?)", (key, state, now)
+        )
+        self._conn.commit()
+        self._grew(len(state), now)
+
+    def _save_frontier_event(self, key, page_key, event):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO frontier_events (key, url_key, event) VALUES (?, ?, ?)", (key, page_key, event)
+        )
+        self._conn.commit()
+        self._grew(len(event), time.time())
+
+    def _drop_frontier(self, key):
+        self._conn.execute("DELETE FROM frontiers WHERE key = ?", (key,))
+        self._conn.execute("DELETE FROM frontier_events WHERE key = ?", (key,))
+        self._conn.commit()
+
+    def _stored_bytes(self) -> int:
+        return self._conn.execute(
+            "SELECT (SELECT COALESCE(SUM(size), 0) FROM blobs)"
+            " + (SELECT COALESCE(SUM(LENGTH(value)), 0) FROM extractions)"
+            " + (SELECT COALESCE(SUM(LENGTH(state)), 0) FROM frontiers)"
+            " + (SELECT COALESCE(SUM(LENGTH(event)), 0) FROM frontier_events)"
+        ).fetchone()[0]
+
+    def _grew(self, size, now):
+        # Replaced rows are counted again until the next re-read, which errs on the side of evicting
+        self._bytes += size
+        self._written += size
+        if self._bytes > self.max_bytes or self._written > self.max_bytes * SYNC_FRACTION:
+            self._bytes = self._stored_bytes()
+            self._written = 0
+            if self._bytes > self.max_bytes:
+                self._evict(now)
+
+    def _evict(self, now):
+        # Expired rows and orphans first, then the least recently used entries down to 90% of the limit
+        self._conn.execute("DELETE FROM pages WHERE fetched_at < ?", (now - self.max_age,))
+        self._conn.execute("DELETE FROM extractions WHERE stored_at < ?", (now - self.max_age,))
+        self._conn.execute("DELETE FROM frontiers WHERE updated_at < ?", (now - self.max_age,))
+        self._conn.execute("DELETE FROM frontier_events WHERE key NOT IN (SELECT key FROM frontiers)")
+        orphans = self._conn.execute("SELECT hash FROM blobs WHERE hash NOT IN (SELECT hash FROM pages)").fetchall()
+        self._conn.executemany("DELETE FROM blobs WHERE hash = ?", orphans)
+        self._conn.executemany("DELETE FROM extractions WHERE hash = ?", orphans)
+        evicted = len(orphans)
+
+        remaining = self._stored_bytes()
+        target = self.max_bytes * 0.9
+        doomed = {"blob": [], "extraction": [], "frontier": []}
+        if remaining > target:
+            entries = self._conn.execute(
+                "SELECT 'blob', hash, size"
+                " + COALESCE((SELECT SUM(LENGTH(value)) FROM extractions x WHERE x.hash = b.hash), 0), used_at"
+                " FROM blobs b"
+                " UNION ALL SELECT 'extraction', hash, SUM(LENGTH(value)), MAX(stored_at) FROM extractions"
+                " WHERE hash NOT IN (SELECT hash FROM blobs) GROUP BY hash"
+                " UNION ALL SELECT 'frontier', key, LENGTH(state)"
+                " + COALESCE((SELECT SUM(LENGTH(event)) FROM frontier_events e WHERE e.key = f.key), 0), updated_at"
+                " FROM frontiers f"
+                " ORDER BY 4"
+            )
+            for kind, key, size, _ in entries:
+                if remaining <= target:
+                    break
+                doomed[kind].append((key,))
+                remaining -= size
+        self._conn.executemany("DELETE FROM blobs WHERE hash = ?", doomed["blob"])
+        self._conn.executemany("DELETE FROM pages WHERE hash = ?", doomed["blob"])
+        self._conn.executemany("DELETE FROM extractions WHERE hash = ?", doomed["blob"] + doomed["extraction"])
+        self._conn.executemany("DELETE FROM frontiers WHERE key = ?", doomed["frontier"])
+        self._conn.executemany("DELETE FROM frontier_events WHERE key = ?", doomed["frontier"])
+        self._conn.commit()
+        self._bytes = self._stored_bytes()
+        self.counters["evictions"] += evicted + sum(len(keys) for keys in doomed.values())
+        logger.info("Page store evicted %d entries, %d bytes left", self.counters["evictions"], self._bytes)
@@ -0,0 +1,102 @@
+import json
+from typing import Iterable, List, Optional
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(payload):
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed.
+
+    Returning one from an endpoint also skips FastAPI's jsonable_encoder
+    pass, which dominates serialization time on multi-MB crawl results.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: Optional[Iterable[str]]) -> Optional[List[str]]:
+    # Accepts repeated and comma separated values: fields=a,b&fields=c.d
+    if not fields:
+        return None
+    paths = [path.strip() for value in fields for path in value.split(",") if path.strip()]
+    return paths or None
+
+
+class FieldSelection:
+    """Which parts of a crawl result the caller asked for.
+
+    Paths are dotted and relative to the response data, e.g.
+    "pageContent.basicInfo" or "services.title"; lists are traversed
+    transparently. No paths means everything. Producers ask wants() before
+    building a part, so unrequested data is never computed; project() then
+    trims whatever was built (or read from the cache) down to the selection.
+    """
+
+    def __init__(self, fields: Optional[Iterable[str]] = None, include_html: bool = True):
+        self.paths = parse_fields(fields)
+        self.include_html = include_html
+        self._tree = None
+        if self.paths:
+            self._tree = {}
+            # Nested dict of selected keys; an empty dict selects the whole subtree
+            for path in self.paths:
+                node = self._tree
+                *parents, last = path.split(".")
+                for part in parents:
+                    if node.get(part) == {}:
+                        break
+                    node = node.setdefault(part, {})
+                else:
+                    node[last] = {}
+
+    def wants(self, path: str) -> bool:
+        if path.split(".")[-1] == "html" and not self.include_html:
+            return False
+        if self._tree is None:
+            return True
+        node = self._tree
+        for part in path.split("."):
+            if not node:
+                return True
+            if part not in node:
+                return False
+            node = node[part]
+        return True
+
+    def project(self, data):
+        if self._tree is None and self.include_html:
+            return data
+        return self._project(data, self._tree)
+
+    def _project(self, value, tree):
+        if isinstance(value, list):
+            return [self._project(item, tree) for item in value]
+        if not isinstance(value, dict):
+            return value
+        if not tree:
+            if self.include_html:
+                return value
+            return {key: self._project(item, None) for key, item in value.items() if key != "html"}
+        return {
+            key: self._project(value[key], subtree)
+            for key, subtree in tree.items()
+            if key in value and (self.include_html or key != "html")
+        }
@@ -0,0 +1,125 @@
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from app import config
+from app.metrics import BROWSER_REQUESTS
+from app.urls import host_key, url_key
+
+logger = logging.getLogger(__name__)
+
+# Playwright resource types aborted per profile. Extraction only reads the
+# html and img src/data-src attributes, so image bytes are never needed;
+# "styles-only" keeps stylesheets for the fonts/colors extractor, which reads
+# computed styles (declared font families resolve without the font files).
+PROFILES = {
+    "full": frozenset(),
+    "styles-only": frozenset({"image", "media", "font"}),
+    "minimal": frozenset({"image", "media", "font", "stylesheet", "texttrack", "manifest"}),
+}
+
+# Analytics, ad and tracking hosts (and their subdomains), blocked as third parties by every profile but "full"
+TRACKER_DOMAINS = frozenset({
+    "google-analytics.com", "googletagmanager.com", "googleadservices.com", "googlesyndication.com",
+    "doubleclick.net", "adservice.google.com", "connect.facebook.net", "facebook.com", "analytics.tiktok.com",
+    "bat.bing.com", "clarity.ms", "hotjar.com", "hotjar.io", "segment.io", "segment.com", "mixpanel.com",
+    "hs-analytics.net", "hs-scripts.com", "hsadspixel.net", "hubspot.com", "intercom.io", "intercomcdn.com",
+    "fullstory.com", "mouseflow.com", "crazyegg.com", "newrelic.com", "nr-data.net", "optimizely.com",
+    "quantserve.com", "scorecardresearch.com", "taboola.com", "outbrain.com", "criteo.com", "criteo.net",
+    "adsrvr.org", "ads-twitter.com", "static.ads-twitter.com", "snap.licdn.com", "px.ads.linkedin.com",
+    "pinimg.com", "ct.pinterest.com", "callrail.com", "calltrk.com", "yandex.ru", "mc.yandex.ru",
+})
+
+
+SHARED_DATA_KEY = "resource_policy"
+
+
+def is_tracker(host: str) -> bool:
+    while host:
+        if host in TRACKER_DOMAINS:
+            return True
+        _, _, host = host.partition(".")
+    return False
+
+
+def check_profile(name: str) -> str:
+    if name not in PROFILES:
+        raise ValueError(f"Unknown resource profile {name!r}; expected one of {', '.join(PROFILES)}")
+    return name
+
+
+class ResourcePolicy:
+    """Which requests the browser may make for one crawl, with per-page counts.
+
+    The start page gets base_profile (it runs the fonts/colors extractor),
+    every other page profile. The policy travels to the browser in the run
+    config's shared_data and is applied by route_resources, the before_goto
+    hook every pooled browser is launched with.
+    """
+
+    def __init__(self, profile: str = config.SUBPAGE_RESOURCE_PROFILE, base_url: str = None, base_profile: str = None):
+        self.profile = check_profile(profile)
+        self.base_key = url_key(base_url) if base_url else None
+        self.base_profile = check_profile(base_profile or profile)
+        self._pages: Dict[str, list] = {}
+
+    def profile_for(self, url: str) -> str:
+        return self.base_profile if self.base_key and url_key(url) == self.base_key else self.profile
+
+    def run_data(self) -> dict:
+        return {SHARED_DATA_KEY: self}
+
+    def page_stats(self, url: str) -> Optional[dict]:
+        """{"profile", "blocked", "allowed"} for a page this policy routed, or None."""
+        counts = self._pages.pop(url_key(url), None)
+        if counts is None:
+            return None
+        profile, blocked, allowed = counts
+        return {"profile": profile, "blocked": blocked, "allowed": allowed}
+
+    def start_page(self, url: str) -> Optional[list]:
+        # [profile, blocked, allowed] for the navigation to url; None when nothing is routed
+        profile = self.profile_for(url)
+        if profile == "full":
+            return None
+        counts = self._pages[url_key(url)] = [profile, 0, 0]
+        return counts
+
+
+async def route_resources(page, context=None, url: str = None, config=None, **kwargs):
+    """before_goto hook: abort the requests the run's ResourcePolicy blocks.
+
+    One route is installed per page; it reads the counts of the navigation
+    in progress from the page, so a reused page is not routed twice.
+    """
+    policy = (getattr(config, "shared_data", None) or {}).get(SHARED_DATA_KEY)
+    counts = policy.start_page(url) if policy and url else None
+    page._resource_counts = counts
+    page._resource_site = host_key(urlsplit(url).hostname or "") if url else ""
+    if counts is None or getattr(page, "_resource_routed", False):
+        return page
+
+    async def handle(route):
+        counts = page._resource_counts
+        request = route.request
+        if counts is None:
+            await route.continue_()
+            return
+        profile, resource_type = counts[0], request.resource_type
+        host = host_key(urlsplit(request.url).hostname or "")
+        blocked = resource_type in PROFILES[profile] or (host != page._resource_site and is_tracker(host))
+        try:
+            if blocked:
+                counts[1] += 1
+                await route.abort()
+            else:
+                counts[2] += 1
+                await route.continue_()
+        except Exception as e:
+            # The page may have navigated or closed while the request was pending
+            logger.debug("Route for %s not handled: %s", request.url, e)
+        BROWSER_REQUESTS.inc(profile=profile, decision="blocked" if blocked else "allowed")
+
+    await page.route("**/*", handle)
+    page._resource_routed = True
+    return page
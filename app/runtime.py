@@ -0,0 +1,68 @@
+import asyncio
+
+import httpx
+
+from app import config
+from app.batch import BatchRunner
+from app.browser_pool import BrowserPool
+from app.cache import ResultCache
+from app.concurrency import AdaptiveConcurrency
+from app.discovery import SitemapDiscovery
+from app.executor import ExtractionExecutor
+from app.hosts import HostScheduler
+from app.pagestore import PageStore
+from app.scoring import URLShapeStats
+from app.singleflight import SingleFlight
+from app.site_templates import SiteTemplates
+from app.warmup import Startup, warm_start
+
+
+class CrawlRuntime:
+    """Process-wide crawl resources, owned by the FastAPI lifespan."""
+
+    def __init__(self):
+        self.browser_pool = BrowserPool()
+        self.executor = ExtractionExecutor()
+        self.cache = ResultCache()
+        self.single_flight = SingleFlight()
+        self.batches = BatchRunner()
+        self.hosts = HostScheduler()
+        self.templates = SiteTemplates()
+        self.discovery = SitemapDiscovery()
+        self.url_shapes = URLShapeStats()
+        self.concurrency = AdaptiveConcurrency()
+        self.page_store = PageStore() if config.PAGE_STORE_PATH else None
+        self.http_client = None
+        self.startup = Startup()
+        self._warm_start = None
+
+    async def start(self):
+        # Returns once the app can answer; browsers launch and warm up in the
+        # background, and self.startup tells when this worker is ready
+        self.executor.start()
+        self.http_client = httpx.AsyncClient(
+            follow_redirects=True,
+            headers={"User-Agent": config.HTTP_USER_AGENT},
+            timeout=config.HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=config.HTTP_MAX_CONNECTIONS),
+        )
+        self.concurrency.start()
+        self._warm_start = asyncio.create_task(warm_start(self))
+        return self
+
+    async def close(self):
+        self.startup.close()
+        if self._warm_start:
+            self._warm_start.cancel()
+            try:
+                await self._warm_start
+            except asyncio.CancelledError:
+                pass
+        await self.concurrency.close()
+        await self.browser_pool.close()
+        if self.http_client:
+            await self.http_client.aclose()
+        self.executor.close()
+        self.cache.close()
+        if self.page_store:
+            self.page_store.close()
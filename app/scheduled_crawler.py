@@ -0,0 +1,164 @@
+import asyncio
+import time
+from typing import Iterable, List, Optional
+
+import httpx
+
+from crawl4ai import AsyncWebCrawler, CacheMode
+from crawl4ai.async_configs import CrawlerRunConfig
+from crawl4ai.deep_crawling import BestFirstCrawlingStrategy
+
+from app.cache import not_modified, response_validators
+from app.concurrency import AdaptiveConcurrency
+from app.hosts import HostScheduler
+from app.metrics import FETCH_FAILURES, PAGES_FETCHED, record_page
+from app.pagestore import PageStore
+from app.urls import url_key
+
+
+class ScheduledCrawler:
+    """Wraps a leased crawler so every page it fetches goes through the HostScheduler.
+
+    arun_many fans out to per-URL arun calls instead of crawl4ai's own
+    dispatcher, which knows nothing about other in-flight requests. With a
+    concurrency controller, browser page loads also wait for one of its
+    slots, taken before the host slot so a page held back for memory does
+    not hold up other fetches to its host, and report their load time.
+
+    With a page store, rendered pages are stored, and a page stored with
+    validators is first revalidated with a conditional GET: on 304 the
+    stored html is processed again without loading it in the browser.
+    URLs in always_render (pages whose in-browser JS results are needed)
+    skip that shortcut.
+    """
+
+    def __init__(
+        self,
+        crawler: AsyncWebCrawler,
+        hosts: HostScheduler,
+        store: Optional[PageStore] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        always_render: Iterable[str] = (),
+        concurrency: Optional[AdaptiveConcurrency] = None,
+    ):
+        self.crawler = crawler
+        self.hosts = hosts
+        self.store = store
+        self.http_client = http_client
+        self.concurrency = concurrency
+        self.always_render = {url_key(url) for url in always_render}
+
+    def __getattr__(self, name):
+        return getattr(self.crawler, name)
+
+    async def arun(self, url: str, config: CrawlerRunConfig = None, **kwargs):
+        if self.store and self.http_client and url_key(url) not in self.always_render:
+            result = await self._replay_unchanged(url, config, **kwargs)
+            if result is not None:
+                return result
+
+        async def fetch(permit):
+            start = time.perf_counter()
+            result = await self.crawler.arun(url, config=config, **kwargs)
+            if self.concurrency:
+                self.concurrency.observe(time.perf_counter() - start)
+            permit.report(result.status_code, result.response_headers)
+            if result.success:
+                record_page("browser", len(result.html or ""))
+            else:
+                reason = f"status-{result.status_code}" if result.status_code else "error"
+                FETCH_FAILURES.inc(via="browser", reason=reason)
+            return result
+
+        if self.concurrency:
+            async with self.concurrency.slot():
+                result = await self.hosts.run(url, fetch)
+        else:
+            result = await self.hosts.run(url, fetch)
+        if self.store and result.success and result.status_code == 200 and result.html:
+            await self.store.put_page(url, result.html, response_validators(result.response_headers))
+        return result
+
+    async def _replay_unchanged(self, url: str, config: Optional[CrawlerRunConfig], **kwargs):
+        stored = await self.store.lookup(url)
+        if stored is None or not stored.has_validators:
+            return None
+        unchanged = await self.hosts.run(
+            url, lambda permit: not_modified(self.http_client, url, stored.etag, stored.last_modified, permit)
+        )
+        html = await self.store.html(stored.hash) if unchanged else None
+        if html is None:
+            return None
+
+        # raw: html without in-page JS is processed by crawl4ai without a browser page
+        replay_config = (config or CrawlerRunConfig()).clone(
+            base_url=url, js_code=None, capture_console_messages=False, cache_mode=CacheMode.BYPASS
+        )
+        result = await self.crawler.arun("raw:" + html, config=replay_config, **kwargs)
+        for page in result._results:
+            # Deep crawl strategies match results to their queue by url
+            page.url = url
+            page.redirected_url = url
+            page.response_headers = {"etag": stored.etag, "last-modified": stored.last_modified}
+        await self.store.touch(url)
+        PAGES_FETCHED.inc(via="store")
+        return result
+
+    async def arun_many(self, urls: List[str], config: CrawlerRunConfig = None, **kwargs):
+        config = config or CrawlerRunConfig()
+        page_config = config.clone(stream=False)
+        tasks = [asyncio.create_task(self.arun(url, config=page_config)) for url in urls]
+
+        if not config.stream:
+            return await asyncio.gather(*tasks)
+
+        async def results():
+            try:
+                for next_result in asyncio.as_completed(tasks):
+                    yield await next_result
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        return results()
+
+
+class ScheduledBestFirstStrategy(BestFirstCrawlingStrategy):
+    """BestFirstCrawlingStrategy whose page batches go through the HostScheduler
+    and, with one, the concurrency controller.
+
+    With a page store, unchanged pages other than the start page are
+    revalidated instead of rendered (see ScheduledCrawler). A url_scorer with
+    observe_links is handed each page's internal links (and their anchor
+    text) before the new ones are scored.
+    """
+
+    def __init__(
+        self,
+        *args,
+        hosts: HostScheduler,
+        store: Optional[PageStore] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.hosts = hosts
+        self.store = store
+        self.http_client = http_client
+        self.concurrency = concurrency
+
+    async def link_discovery(self, result, source_url, current_depth, visited, next_links, depths):
+        # Scorers that read anchor text see the links before their targets are scored
+        observe = getattr(self.url_scorer, "observe_links", None)
+        if observe is not None:
+            observe(result.links.get("internal", []), source_url)
+        await super().link_discovery(result, source_url, current_depth, visited, next_links, depths)
+
+    async def arun(self, start_url: str, crawler: AsyncWebCrawler, config: CrawlerRunConfig = None):
+        if not isinstance(crawler, ScheduledCrawler):
+            crawler = ScheduledCrawler(
+                crawler, self.hosts, self.store, self.http_client,
+                always_render=[start_url], concurrency=self.concurrency
+            )
+        return await super().arun(start_url, crawler, config)
@@ -0,0 +1,228 @@
+import re
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from crawl4ai.deep_crawling.scorers import KeywordRelevanceScorer, URLScorer
+from crawl4ai.utils import normalize_url_for_deep_crawl
+
+from app import config
+from app.links import ASSET_RE, EXCLUDED_RE, keyword_matcher
+from app.urls import host_key
+
+# Path and anchor words of pages that list what a business offers
+SERVICE_KEYWORDS = (
+    "service", "product", "solution", "offering", "treatment", "repair", "installation", "install",
+    "cleaning", "maintenance", "menu", "pricing", "package", "plan", "catalog", "collection", "shop",
+    "what-we-do", "capability", "capabilities", "specialty", "specialties",
+)
+SERVICE_RE = keyword_matcher(SERVICE_KEYWORDS)
+WORD_RE = re.compile(r"[a-z]+|\d+")
+MAX_DEPTH_FEATURE = 4
+# Feature counts below this are not trusted to move a score
+MIN_FEATURE_PAGES = 3
+LEARNED_WEIGHT = 2.0
+MAX_ANCHORS = 10000
+
+
+def url_features(url: str, anchor: Optional[str] = None) -> List[str]:
+    """Shape of a URL, as learned by URLShapeStats.
+
+    Path words (numbers collapse to "#"), anchor words, path depth, and the
+    first path segment with the depth both across sites and on the URL's
+    own site, so "acme.test|services|2" learns that acme's second-level
+    service pages carry cards while "|blog|2" learns that nobody's blog
+    posts do.
+    """
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.lower().split("/") if segment]
+    depth = min(len(segments), MAX_DEPTH_FEATURE)
+    head = segments[0] if segments else ""
+    words = {"#" if word.isdigit() else word for segment in segments for word in WORD_RE.findall(segment)}
+    features = [f"word:{word}" for word in sorted(words)]
+    if anchor:
+        features += [f"anchor:{word}" for word in sorted(set(WORD_RE.findall(anchor.lower())))]
+    features += [
+        f"depth:{depth}",
+        f"|{head}|{depth}",
+        f"{host_key(parts.hostname or '')}|{head}|{depth}",
+    ]
+    return features
+
+
+class URLShapeStats:
+    """Which URL shapes produced repeated-section hits, learned across crawls.
+
+    Every extracted subpage (from /crawl and deep crawls) records its
+    url_features with whether extraction found any section. A feature's
+    smoothed hit rate against the overall rate, weighted by how many pages
+    back it, nudges the score of URLs that share it. Features are kept least
+    recently used first up to max_features, in memory only: a restart
+    starts from the path and anchor heuristics again.
+    """
+
+    def __init__(self, max_features: int = config.URL_SCORER_MAX_FEATURES):
+        self.max_features = max(1, max_features)
+        self._features: OrderedDict = OrderedDict()
+        self.pages = 0
+        self.hits = 0
+
+    def record(self, url: str, hit: bool, anchor: Optional[str] = None):
+        self.pages += 1
+        self.hits += hit
+        for feature in url_features(url, anchor):
+            counts = self._features.get(feature)
+            if counts is None:
+                counts = self._features[feature] = [0, 0]
+                while len(self._features) > self.max_features:
+                    self._features.popitem(last=False)
+            else:
+                self._features.move_to_end(feature)
+            counts[0] += 1
+            counts[1] += hit
+
+    def adjustment(self, features: Iterable[str]) -> float:
+        """How much likelier than average (-1..1) pages with these features were to have sections."""
+        if not self.pages:
+            return 0.0
+        base = (self.hits + 1) / (self.pages + 2)
+        total = weights = 0.0
+        for feature in features:
+            counts = self._features.get(feature)
+            if counts is None or counts[0] < MIN_FEATURE_PAGES:
+                continue
+            pages, hits = counts
+            weight = pages / (pages + 5)
+            total += weight * ((hits + 1) / (pages + 2) - base)
+            weights += weight
+        return total / weights if weights else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "features": len(self._features),
+            "pages": self.pages,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.pages, 3) if self.pages else None,
+        }
+
+
+class ServiceURLScorer(URLScorer):
+    """Scores frontier URLs by how likely they are to list services or products.
+
+    Service words in the path or the link's anchor text raise the score,
+    the words select_subpages excludes (about, blog, careers, ...) and
+    asset files lower it, deep paths cost a little, and learned URL shapes
+    (see URLShapeStats) move it by up to LEARNED_WEIGHT either way. Anchor
+    texts are noted by the crawl strategy as it discovers links.
+    """
+
+    __slots__ = ("_learned", "_anchors")
+
+    def __init__(self, learned: Optional[URLShapeStats] = None, weight: float = 1.0):
+        super().__init__(weight=weight)
+        self._learned = learned
+        self._anchors: Dict[str, str] = {}
+
+    def observe_links(self, links: Iterable[dict], source_url: str):
+        for link in links:
+            url = normalize_url_for_deep_crawl(link.get("href"), source_url)
+            text = (link.get("text") or link.get("title") or "").strip()
+            if url and text and url not in self._anchors and len(self._anchors) < MAX_ANCHORS:
+                self._anchors[url] = text
+
+    def anchor_text(self, url: str) -> Optional[str]:
+        return self._anchors.get(url)
+
+    def _calculate_score(self, url: str) -> float:
+        path = urlsplit(url).path.lower()
+        anchor = self._anchors.get(url, "").lower()
+        if ASSET_RE.search(path):
+            return -2.0
+        score = 0.0
+        if SERVICE_RE.search(path):
+            score += 1.0
+        if anchor and SERVICE_RE.search(anchor):
+            score += 0.5
+        if EXCLUDED_RE.search(path):
+            score -= 1.0
+        if anchor and EXCLUDED_RE.search(anchor):
+            score -= 0.5
+        depth = len([segment for segment in path.split("/") if segment])
+        score -= 0.15 * max(0, depth - 2)
+        if self._learned is not None:
+            score += LEARNED_WEIGHT * self._learned.adjustment(url_features(url, anchor))
+        return score
+
+
+def keyword_scorer(learned: Optional[URLShapeStats] = None) -> URLScorer:
+    # The original placeholder keywords, kept selectable for comparison
+    return KeywordRelevanceScorer(keywords=["crawl", "example", "async", "configuration"], weight=0.7)
+
+
+URL_SCORERS = {
+    "service": ServiceURLScorer,
+    "keyword": keyword_scorer,
+}
+
+
+def make_url_scorer(name: str = config.DEEP_CRAWL_SCORER, learned: Optional[URLShapeStats] = None) -> URLScorer:
+    if name not in URL_SCORERS:
+        raise ValueError(f"Unknown URL scorer {name!r}; expected one of {', '.join(URL_SCORERS)}")
+    return URL_SCORERS[name](learned)
+
+
+class ServiceYield:
+    """New services found per page as a deep crawl advances.
+
+    Services are told apart by title, as in the /crawl response. Once
+    min_pages pages are extracted and the last window of them found no new
+    service, should_stop() asks the crawl to stop queueing pages. A window
+    of 0 never stops. The window should be longer than a best-first batch
+    (10 pages): a batch is picked before the links of its productive pages
+    are scored, so one batch alone can hold a run of empty pages.
+    """
+
+    def __init__(self, window: int = config.DEEP_CRAWL_PLATEAU_PAGES, min_pages: int = config.DEEP_CRAWL_MIN_PAGES):
+        self.window = window
+        self.min_pages = min_pages
+        self.titles = set()
+        self.pages = 0
+        self.recent = deque(maxlen=max(1, window))
+        self.stopped = False
+
+    def add(self, sections: List[dict]) -> int:
+        new = 0
+        for item in sections:
+            title = (item.get("title") or "").strip()
+            if title and title not in self.titles:
+                self.titles.add(title)
+                new += 1
+        self.pages += 1
+        self.recent.append(new)
+        return new
+
+    @property
+    def services(self) -> int:
+        return len(self.titles)
+
+    @property
+    def plateaued(self) -> bool:
+        return (
+            self.window > 0
+            and self.pages >= self.min_pages
+            and len(self.recent) == self.window
+            and not any(self.recent)
+        )
+
+    def should_stop(self) -> bool:
+        if self.plateaued:
+            self.stopped = True
+        return self.stopped
+
+    def as_dict(self) -> dict:
+        return {
+            "pages": self.pages,
+            "services": self.services,
+            "pagesPerService": round(self.pages / self.services, 2) if self.services else None,
+            "stoppedEarly": self.stopped,
+        }
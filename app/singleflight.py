@@ -0,0 +1,61 @@
+import asyncio
+from typing import Awaitable, Callable, Dict
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one shared task.
+
+    Each caller awaits the task through asyncio.shield, so a caller that is
+    cancelled (e.g. its client disconnected) leaves the work running for the
+    others. The shared task is only cancelled once every caller is gone.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, fn: Callable[[], Awaitable]):
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._finish(key, flight))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Last caller gone: abandon the work and let new callers start fresh
+                flight.task.cancel()
+                self._forget(key, flight)
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+    def _finish(self, key: str, flight: _Flight):
+        if not flight.task.cancelled():
+            # Mark the exception retrieved even if every caller already left
+            flight.task.exception()
+        self._forget(key, flight)
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+from app import config
+from app.metrics import EXTRACTION_TEMPLATES, TEMPLATE_SAVED_SECONDS
+from app.urls import host_key
+
+# Container paths kept per site, most recently learned first
+MAX_TEMPLATE_PATHS = 8
+
+
+class SiteTemplate:
+    def __init__(self):
+        self.paths: List[str] = []
+        # Full-scan cost on this site, to estimate what a template hit saved
+        self.full_seconds = 0.0
+        self.full_bytes = 0
+
+    def learn(self, paths: List[str], max_paths: int):
+        self.paths = list(dict.fromkeys(paths + self.paths))[:max_paths]
+
+
+class SiteTemplates:
+    """Card-grid container paths learned per site by the subpage extractor.
+
+    The subpages of one site mostly share a template, so the paths where a
+    full scan found repeated cards on one page are handed to the extraction
+    of the next page of that site, which looks them up directly and falls
+    back to the full scan when they yield nothing or the page has a grid
+    they miss (see helper.extract_templated_sections). Sites are kept least recently used
+    first up to max_sites.
+
+    Time saved by a hit is estimated from the site's full-scan cost per byte
+    on earlier pages; the parse, done either way, is not counted.
+    """
+
+    def __init__(
+        self,
+        max_sites: int = config.EXTRACTION_TEMPLATE_SITES,
+        max_paths: int = MAX_TEMPLATE_PATHS,
+        enabled: bool = config.EXTRACTION_TEMPLATES,
+    ):
+        self.max_sites = max(1, max_sites)
+        self.max_paths = max(1, max_paths)
+        self.enabled = enabled
+        self._sites: OrderedDict = OrderedDict()
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "scans": 0,
+            "learned": 0,
+        }
+        self.saved_seconds = 0.0
+
+    def get(self, url: str) -> Optional[List[str]]:
+        if not self.enabled:
+            return None
+        site = self._sites.get(self._key(url))
+        if site is None or not site.paths:
+            return None
+        self._sites.move_to_end(self._key(url))
+        return site.paths
+
+    def record(self, url: str, size: int, outcome: Optional[dict]):
+        """Feed back a subpage extraction: {"tried", "hit", "learned", "seconds"} from the worker."""
+        if not self.enabled or not outcome:
+            return
+        site = self._site(url)
+        if outcome["hit"]:
+            self.counters["hits"] += 1
+            EXTRACTION_TEMPLATES.inc(outcome="hit")
+            if site.full_bytes:
+                expected = site.full_seconds / site.full_bytes * size
+                saved = max(0.0, expected - outcome["seconds"])
+                self.saved_seconds += saved
+                TEMPLATE_SAVED_SECONDS.inc(saved)
+            return
+
+        self.counters["misses" if outcome["tried"] else "scans"] += 1
+        EXTRACTION_TEMPLATES.inc(outcome="miss" if outcome["tried"] else "scan")
+        site.full_seconds += outcome["seconds"]
+        site.full_bytes += size
+        if outcome["learned"]:
+            self.counters["learned"] += 1
+            site.learn(outcome["learned"], self.max_paths)
+
+    def stats(self) -> dict:
+        hits, misses = self.counters["hits"], self.counters["misses"]
+        return {
+            **self.counters,
+            "enabled": self.enabled,
+            "sites": len(self._sites),
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "saved_ms": round(self.saved_seconds * 1000, 1),
+            "saved_ms_per_hit": round(self.saved_seconds * 1000 / hits, 2) if hits else None,
+        }
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return host_key(urlsplit(url).hostname or "")
+
+    def _site(self, url: str) -> SiteTemplate:
+        key = self._key(url)
+        site = self._sites.get(key)
+        if site is None:
+            site = self._sites[key] = SiteTemplate()
+            while len(self._sites) > self.max_sites:
+                self._sites.popitem(last=False)
+        else:
+            self._sites.move_to_end(key)
+        return site
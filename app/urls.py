@@ -0,0 +1,85 @@
+from typing import Optional
+from urllib.parse import SplitResult, parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that only track where a click came from; the page is the same without them
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "twclid", "ttclid", "li_fat_id",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "igshid", "ref", "ref_src", "srsltid",
+})
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_")
+INDEX_PAGES = ("/index.html", "/index.htm", "/index.php", "/default.aspx")
+ABSOLUTE_PREFIXES = ("http://", "https://")
+
+
+def normalize_url(url: str) -> str:
+    # Case-insensitive parts lowered, default port, fragment and trailing slash dropped
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/")
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def host_key(host: str) -> str:
+    host = host.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def clean_query(query: str) -> str:
+    if not query:
+        return ""
+    return urlencode([
+        (name, value) for name, value in parse_qsl(query, keep_blank_values=True) if not is_tracking_param(name)
+    ])
+
+
+def canonical_parts(href: str, base: Optional[str] = None) -> Optional[SplitResult]:
+    """Split absolute URL of a link with its fragment and tracking parameters dropped.
+
+    Returns None for links that are not http(s) pages (mailto:, tel:,
+    javascript:, ...). The result is still fetchable: host and path case are
+    left as the site wrote them.
+    """
+    href = href.strip()
+    if base and not href.lower().startswith(ABSOLUTE_PREFIXES):
+        href = urljoin(base, href)
+    parts = urlsplit(href)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.netloc:
+        return None
+    return SplitResult(scheme, parts.netloc, parts.path or "/", clean_query(parts.query), "")
+
+
+def canonical_url(href: str, base: Optional[str] = None) -> Optional[str]:
+    parts = canonical_parts(href, base)
+    return urlunsplit(parts) if parts else None
+
+
+def parts_key(parts: SplitResult) -> str:
+    """Dedup key under which variants of the same page collide.
+
+    On top of normalize_url, http and https, a "www." prefix, index pages
+    and tracking parameters are treated as the same page.
+    """
+    host = host_key(parts.hostname or "")
+    if parts.port and parts.port != DEFAULT_PORTS.get(parts.scheme.lower() or "http"):
+        host = f"{host}:{parts.port}"
+    path = parts.path
+    if path.lower().endswith(INDEX_PAGES):
+        path = path[:path.rfind("/") + 1]
+    query = "&".join(sorted(clean_query(parts.query).split("&"))) if parts.query else ""
+    return f"{host}{path.rstrip('/')}?{query}" if query else f"{host}{path.rstrip('/')}"
+
+
+def url_key(url: str) -> str:
+    return parts_key(urlsplit(url.strip()))
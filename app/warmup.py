@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from crawl4ai import RegexExtractionStrategy
+from crawl4ai.async_configs import CrawlerRunConfig
+from crawl4ai.content_scraping_strategy import LXMLWebScrapingStrategy
+
+from app import config
+from app.helper import js_fonts_colors_extractor
+from app.metrics import STARTUP_SECONDS
+from app.resources import ResourcePolicy
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+IMPORTED_AT = time.time()
+
+WARMUP_CARD = (
+    '<div class="card"><a href="/services/{n}"><img src="/img/{n}.jpg" alt="Service {n}"></a>'
+    '<div class="card-body"><h3>Service {n}</h3><p>Licensed, insured and on time, with upfront pricing.</p>'
+    "</div></div>"
+)
+# A small service page served from loopback: styles for the fonts/colors script, a card grid
+# for the section extractors and a footer for the contact extractors, so every stage of a
+# real /crawl runs once
+WARMUP_PAGE = (
+    "<!DOCTYPE html><html><head><title>Warmup Services</title><style>"
+    "body{font-family:Georgia,serif;color:#222;background:#fafafa}"
+    "h3{font-family:Arial,sans-serif;color:#0a5}.card{border:1px solid #ddd}"
+    "</style></head><body><header><img class='logo' src='/logo.png'>"
+    "<nav><a href='/services'>Services</a><a href='/about'>About</a><a href='/contact'>Contact</a></nav></header>"
+    "<main><h2>Our services</h2><div class='grid'>"
+    + "".join(WARMUP_CARD.format(n=n) for n in range(6))
+    + "</div></main><footer><p>Warmup Services, 100 Main St, Springfield, IL 62701</p>"
+    "<p><a href='mailto:hello@warmup.test'>hello@warmup.test</a> "
+    "<a href='tel:+12175550100'>(217) 555-0100</a></p></footer></body></html>"
+)
+
+
+def process_started_at() -> float:
+    # Startup is timed from process start, so interpreter and module imports count too
+    if psutil is not None:
+        try:
+            return psutil.Process(os.getpid()).create_time()
+        except psutil.Error:
+            pass
+    return IMPORTED_AT
+
+
+def is_live_marker(path: str, pid: int) -> bool:
+    # A marker names a worker pid and holds its start time; a recycled pid starts later
+    try:
+        with open(path) as f:
+            started_at = float(f.read())
+    except (OSError, ValueError):
+        return False
+    if psutil is not None:
+        try:
+            return abs(psutil.Process(pid).create_time() - started_at) < 1.0
+        except psutil.Error:
+            return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Startup:
+    """Startup stages of this worker, timed from process start, and whether it is ready.
+
+    GET / answers as soon as the app is up; GET /ready only once the pooled
+    browsers are launched and warm_start has warmed them. With several
+    workers each one drops a marker in ready_dir once it is ready, and
+    ready holds only while every one of them has, so a pod is not sent
+    traffic that would land on a cold worker. Markers of workers that
+    exited are ignored and removed.
+    """
+
+    def __init__(self, workers: int = config.WORKERS, ready_dir: str = config.READY_DIR):
+        self.workers = max(1, workers)
+        self.ready_dir = ready_dir
+        self.started_at = process_started_at()
+        self.stages: Dict[str, float] = {}
+        self.status = "starting"
+        self.error: Optional[str] = None
+        self._marker: Optional[str] = None
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    async def timed(self, stage: str, work):
+        with self.span(stage):
+            return await work
+
+    def record(self, stage: str, seconds: float):
+        self.stages[stage] = seconds
+        STARTUP_SECONDS.set(seconds, stage=stage)
+
+    def mark_ready(self):
+        self.status = "ready"
+        self.record("ready", time.time() - self.started_at)
+        if self.workers > 1:
+            os.makedirs(self.ready_dir, exist_ok=True)
+            self._marker = os.path.join(self.ready_dir, str(os.getpid()))
+            with open(self._marker, "w") as f:
+                f.write(repr(self.started_at))
+
+    def fail(self, error: str):
+        self.status = "failed"
+        self.error = error
+
+    def ready_workers(self) -> int:
+        if self.workers == 1:
+            return int(self.status == "ready")
+        try:
+            names = os.listdir(self.ready_dir)
+        except OSError:
+            return 0
+        ready = 0
+        for name in names:
+            path = os.path.join(self.ready_dir, name)
+            if name.isdigit() and is_live_marker(path, int(name)):
+                ready += 1
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return ready
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready" and self.ready_workers() >= self.workers
+
+    def close(self):
+        if self._marker:
+            try:
+                os.remove(self._marker)
+            except OSError:
+                pass
+            self._marker = None
+
+    def as_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "ready": self.ready,
+            "error": self.error,
+            "worker": os.getpid(),
+            "workers": {"ready": self.ready_workers(), "expected": self.workers},
+            "startupMs": {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()},
+        }
+
+
+async def serve_fixture(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    # Every path gets the warmup page: images and the favicon are blocked or ignored anyway
+    body = WARMUP_PAGE.encode()
+    try:
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+            b"Content-Length: %d\r\nConnection: close\r\n\r\n" % len(body) + body
+        )
+        await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def render_fixture(runtime, url: str):
+    # The base page configuration of handle_crawl, without the host scheduler:
+    # loopback needs no politeness and the warmup must not count as traffic
+    policy = ResourcePolicy(config.BASE_PAGE_RESOURCE_PROFILE)
+    run_config = CrawlerRunConfig(
+        exclude_external_links=True,
+        scraping_strategy=LXMLWebScrapingStrategy(),
+        extraction_strategy=RegexExtractionStrategy(
+            pattern=RegexExtractionStrategy.Email | RegexExtractionStrategy.PhoneUS
+        ),
+        js_code=js_fonts_colors_extractor(),
+        shared_data=policy.run_data(),
+    )
+    async with runtime.browser_pool.lease() as crawler:
+        result = await crawler.arun(url, config=run_config)
+    content = result._results[0] if result and result._results else None
+    if content is None or not content.success:
+        raise RuntimeError(f"Warmup render failed: {getattr(content, 'error_message', 'no result')}")
+    return content
+
+
+async def warm_up(runtime):
+    """Render the warmup page in every idle pooled browser and extract it, over loopback."""
+    startup = runtime.startup
+    server = await asyncio.start_server(serve_fixture, "127.0.0.1", 0)
+    url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+    try:
+        with startup.span("http_client"):
+            response = await runtime.http_client.get(url)
+            response.raise_for_status()
+        with startup.span("render"):
+            # Leased all at once, so each browser opens its first page now
+            browsers = runtime.browser_pool.stats()["idle"]
+            pages = await asyncio.gather(*(render_fixture(runtime, url) for _ in range(browsers)))
+        if pages:
+            with startup.span("basic_info"):
+                await runtime.executor.basic_info(pages[0])
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+async def warm_start(runtime, warmup: bool = config.WARMUP, timeout: float = config.WARMUP_TIMEOUT):
+    """Launch the pooled browsers, warm up, then mark this worker ready.
+
+    Runs in the background once the app is up. Extraction workers start
+    while the browsers launch; with warmup every pooled browser then
+    renders WARMUP_PAGE and the executor extracts it. A warmup that fails
+    or takes longer than timeout is logged and the worker is marked ready
+    anyway, as it can still serve; a pool with no browser at all leaves
+    the worker failed and /ready failing.
+    """
+    startup = runtime.startup
+    workers = None
+    if warmup:
+        workers = asyncio.create_task(startup.timed("extraction_workers", runtime.executor.warm_up(WARMUP_PAGE)))
+    try:
+        await startup.timed("browsers", runtime.browser_pool.start())
+    except Exception as e:
+        logger.exception("Browser pool failed to start")
+        startup.fail(f"Browser launch failed: {e}")
+        if workers:
+            workers.cancel()
+        return
+    if warmup:
+        try:
+            await asyncio.wait_for(asyncio.gather(workers, warm_up(runtime)), timeout=timeout)
+        except Exception as e:
+            logger.warning("Warmup did not complete, serving without it: %s", e)
+    startup.mark_ready()
+    logger.info(
+        "Worker %s ready %.2fs after process start (%s)",
+        os.getpid(),
+        startup.stages["ready"],
+        ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in startup.stages.items() if stage != "ready"),
+    )
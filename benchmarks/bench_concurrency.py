@@ -0,0 +1,113 @@
+"""Peak memory and wall time of browser page loads with and without the adaptive limit.
+
+    python -m benchmarks.bench_concurrency [--requests N] [--pages N] [--out results.json]
+
+Simulates several /crawl requests fanning out their subpages at once on a
+container with a fixed memory limit: every page in flight adds
+--page-mb to a --base-mb baseline and loads slower the more pages share
+the CPU. Runs the same load unbounded (every subpage at once, as
+arun_many does per request), with a fixed limit, and through
+AdaptiveConcurrency fed the simulated RSS, and reports peak memory,
+whether it crossed the limit (an OOM kill in a real container), wall time
+and the controller's decisions. No browser is started: it measures the
+control loop, not Chromium.
+"""
+import argparse
+import asyncio
+import time
+
+from app.concurrency import AdaptiveConcurrency
+from benchmarks.report import latency_summary, save_results
+
+MB = 1024 * 1024
+
+
+class SimulatedBrowsers:
+    def __init__(self, args):
+        self.args = args
+        self.loading = 0
+        self.peak = 0
+
+    def rss(self) -> tuple:
+        return self.args.base_mb * MB, self.loading * self.args.page_mb * MB
+
+    async def load(self, concurrency=None) -> float:
+        self.loading += 1
+        self.peak = max(self.peak, self.loading)
+        start = time.perf_counter()
+        try:
+            # Pages share the CPU: each one in flight slows the others down
+            await asyncio.sleep(self.args.page_seconds * (1 + self.args.contention * (self.loading - 1)))
+        finally:
+            self.loading -= 1
+        elapsed = time.perf_counter() - start
+        if concurrency:
+            concurrency.observe(elapsed)
+        return elapsed
+
+
+async def run_load(args, mode: str) -> dict:
+    browsers = SimulatedBrowsers(args)
+    limit_bytes = args.limit_mb * MB
+    concurrency = None
+    if mode != "unbounded":
+        concurrency = AdaptiveConcurrency(
+            initial=args.fixed if mode == "fixed" else 2,
+            max_concurrency=args.fixed if mode == "fixed" else args.requests * args.pages,
+            memory_limit=limit_bytes,
+            latency_high=args.page_seconds * 4,
+            interval=args.page_seconds / 5,
+            cooldown=args.page_seconds,
+            enabled=mode == "adaptive",
+            sampler=browsers.rss,
+        ).start()
+
+    async def page():
+        if concurrency is None:
+            return await browsers.load()
+        async with concurrency.slot():
+            return await browsers.load(concurrency)
+
+    start = time.perf_counter()
+    timings = await asyncio.gather(*(page() for _ in range(args.requests * args.pages)))
+    elapsed = time.perf_counter() - start
+    if concurrency:
+        await concurrency.close()
+    peak_mb = args.base_mb + browsers.peak * args.page_mb
+    return {
+        "name": mode,
+        **latency_summary(timings),
+        "wall_s": round(elapsed, 2),
+        "peak_pages": browsers.peak,
+        "peak_mb": peak_mb,
+        "over_limit": peak_mb > args.limit_mb,
+        "decisions": len(concurrency.decisions) if concurrency else 0,
+        "final_limit": concurrency.limit if concurrency else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=4, help="Concurrent /crawl requests")
+    parser.add_argument("--pages", type=int, default=25, help="Subpages per request")
+    parser.add_argument("--limit-mb", type=int, default=2048, help="Container memory limit")
+    parser.add_argument("--base-mb", type=int, default=500, help="Service and idle browsers")
+    parser.add_argument("--page-mb", type=int, default=90, help="Memory per page in flight")
+    parser.add_argument("--page-seconds", type=float, default=0.05, help="Load time of a page alone")
+    parser.add_argument("--contention", type=float, default=0.05, help="Slowdown per other page in flight")
+    parser.add_argument("--fixed", type=int, default=8, help="Limit of the fixed run")
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/concurrency-<time>.json)")
+    args = parser.parse_args()
+
+    results = [asyncio.run(run_load(args, mode)) for mode in ("unbounded", "fixed", "adaptive")]
+    print(f"{'mode':<11}{'wall s':>8}{'p50 ms':>9}{'p95 ms':>9}{'peak pages':>12}{'peak MB':>9}{'OOM':>5}{'decisions':>11}")
+    for row in results:
+        print(
+            f"{row['name']:<11}{row['wall_s']:>8.2f}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}"
+            f"{row['peak_pages']:>12}{row['peak_mb']:>9}{'yes' if row['over_limit'] else 'no':>5}{row['decisions']:>11}"
+        )
+    print(f"saved {save_results('concurrency', results, vars(args), args.out)}")
+
+
+if __name__ == "__main__":
+    main()
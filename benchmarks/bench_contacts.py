@@ -0,0 +1,115 @@
+"""Old vs new contact/address extraction on the fixture footers.
+
+    python -m benchmarks.bench_contacts [--repeat N] [--out results.json]
+
+Both run over the same normalized footer text (PageDocument.footer_text), so
+only the regex/matching work is compared. The legacy functions compiled the
+50-state alternation per call and re-parsed each address with a second one.
+"""
+import argparse
+import re
+import time
+
+from app.contacts import extract_contacts, merge_contacts
+from app.document import PageDocument
+from benchmarks.fixtures import corpus, locations_page
+from benchmarks.report import latency_summary, save_results
+
+STATES = (
+    "Alabama|Alaska|Arizona|Arkansas|California|Colorado|Connecticut|Delaware|Florida|Georgia|Hawaii|Idaho|"
+    "Illinois|Indiana|Iowa|Kansas|Kentucky|Louisiana|Maine|Maryland|Massachusetts|Michigan|Minnesota|"
+    "Mississippi|Missouri|Montana|Nebraska|Nevada|New Hampshire|New Jersey|New Mexico|New York|"
+    "North Carolina|North Dakota|Ohio|Oklahoma|Oregon|Pennsylvania|Rhode Island|South Carolina|South Dakota|"
+    "Tennessee|Texas|Utah|Vermont|Virginia|Washington|West Virginia|Wisconsin|Wyoming"
+)
+
+
+def legacy_extract_address_details(address):
+    pattern = re.compile(
+        r'^(.*?),?\s+([\w\s]+),?\s+'
+        r'(?:(?P<state>[A-Z]{2})|(?P<state_full>' + STATES + r'))'
+        r'(?:\s+(?P<zip>\d{5}))?$',
+        re.IGNORECASE
+    )
+    match = pattern.match(address.strip())
+    if not match:
+        return {"full_address": address, "street_address": None, "city": None, "state": None, "zip_code": None}
+    return {
+        "full_address": address,
+        "street_address": match.group(1).strip(),
+        "city": match.group(2).strip(),
+        "state": match.group("state") or match.group("state_full"),
+        "zip_code": match.group("zip"),
+    }
+
+
+def legacy_extract_contacts(text):
+    emails = re.findall(r'[\w\.-]+@[\w\.-]+\.\w+', text)
+    phones = re.findall(r'(\+?\d[\d\s\-\(\)]{7,}\d)', text)
+    address_pattern = re.compile(
+        r'\d{1,5}\s[\w\s.,#&-]+?,\s*[\w\s]+?,\s*(?:[A-Z]{2}|' + STATES + r')(?:\s+\d{5})?',
+        re.IGNORECASE
+    )
+    addresses = address_pattern.findall(text)
+    return {
+        "email": list(set(emails)),
+        "phone": list(set(phones)),
+        "address": [legacy_extract_address_details(address) for address in addresses],
+    }
+
+
+def timed(fn, text, repeat):
+    fn(text)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        timings.append(time.perf_counter() - start)
+    return latency_summary(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/contacts-<time>.json)")
+    args = parser.parse_args()
+
+    pages = dict(corpus())
+    pages["locations_60"] = locations_page()
+    pages["locations_600"] = locations_page(branches=600)
+    texts = {name: PageDocument(raw_html).footer_text for name, raw_html in pages.items()}
+
+    results = []
+    print(f"{'page':<22}{'KB':>6}{'legacy ms':>11}{'new ms':>9}{'speedup':>9}{'legacy addr':>13}{'new addr':>10}")
+    for name, text in texts.items():
+        legacy = timed(legacy_extract_contacts, text, args.repeat)
+        new = timed(extract_contacts, text, args.repeat)
+        legacy_found = len(legacy_extract_contacts(text)["address"])
+        new_found = len(extract_contacts(text)["addresses"])
+        speedup = legacy["p50_ms"] / new["p50_ms"] if new["p50_ms"] else 0.0
+        results.append({
+            "name": name,
+            "text_kb": round(len(text) / 1024, 1),
+            "legacy_p50_ms": legacy["p50_ms"],
+            "p50_ms": new["p50_ms"],
+            "p95_ms": new["p95_ms"],
+            "p99_ms": new["p99_ms"],
+            "speedup": round(speedup, 2),
+            "legacy_addresses": legacy_found,
+            "addresses": new_found,
+        })
+        print(
+            f"{name:<22}{len(text) / 1024:>6.1f}{legacy['p50_ms']:>11.3f}{new['p50_ms']:>9.3f}"
+            f"{speedup:>8.1f}x{legacy_found:>13}{new_found:>10}"
+        )
+
+    merged = merge_contacts(extract_contacts(text) for text in texts.values())
+    print(
+        f"merged across {len(texts)} pages: {len(merged['emails'])} emails, "
+        f"{len(merged['phones'])} phones, {len(merged['addresses'])} addresses"
+    )
+    print(f"saved {save_results('contacts', results, vars(args), args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Wall time to reach every page of a site: following links hop by hop vs sitemap discovery.
+
+    python -m benchmarks.bench_discovery [--latency S] [--depth N] [--fanout N] [--out results.json]
+
+Serves a site whose service pages sit --depth links below the home page,
+--fanout per level, plus robots.txt and a gzipped sitemap index, from the
+fixture server with --latency seconds per response standing in for a page
+render (robots.txt and sitemaps answer at once). "links" fetches one depth at a time, every page of a depth in
+parallel, the way the deep crawl's best-first batches find pages; "sitemap"
+reads robots.txt and the sitemaps through SitemapDiscovery, then fetches
+all listed pages in one parallel round. Both go through the HostScheduler
+with its host limits raised so politeness does not dominate; no browser
+is started.
+"""
+import argparse
+import asyncio
+import gzip
+import re
+import time
+
+import httpx
+
+from app.discovery import SitemapDiscovery
+from app.hosts import HostScheduler
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.fixtures import page
+from benchmarks.report import save_results
+
+HREF_RE = re.compile(r'href="([^"]+)"')
+
+
+def linked_site(depth: int, fanout: int) -> dict:
+    # /s0, /s0/1, /s0/1/2, ...: every page links to fanout children one level down
+    site = {}
+    level = [""]
+    for _ in range(depth):
+        children = []
+        for parent in level:
+            paths = [f"{parent}/s{i}" for i in range(fanout)]
+            links = "".join(f'<a href="{path}">{path}</a>' for path in paths)
+            site[parent or "/"] = page(f"<nav>{links}</nav>")
+            children.extend(paths)
+        level = children
+    for path in level:
+        site[path] = page("<p>Leaf service page</p>")
+    return site
+
+
+def add_sitemaps(site: dict, base_url: str):
+    paths = [path for path in site if path != "/"]
+    half = len(paths) // 2
+    for name, chunk in (("pages-1", paths[:half]), ("pages-2", paths[half:])):
+        urls = "".join(f"<url><loc>{base_url}{path}</loc></url>" for path in chunk)
+        xml = f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+        site[f"/{name}.xml.gz"] = ("application/x-gzip", gzip.compress(xml.encode()))
+    index = "".join(f"<sitemap><loc>{base_url}/{name}.xml.gz</loc></sitemap>" for name in ("pages-1", "pages-2"))
+    site["/sitemap_index.xml"] = ("application/xml", f"<sitemapindex>{index}</sitemapindex>".encode())
+    site["/robots.txt"] = ("text/plain", f"User-agent: *\nSitemap: {base_url}/sitemap_index.xml\n".encode())
+
+
+async def fetch(client: httpx.AsyncClient, hosts: HostScheduler, url: str) -> str:
+    async def get(permit):
+        response = await client.get(url)
+        permit.report(response.status_code, response.headers)
+        return response.text
+
+    return await hosts.run(url, get)
+
+
+async def follow_links(client: httpx.AsyncClient, hosts: HostScheduler, base_url: str) -> int:
+    seen = {base_url + "/"}
+    level = [base_url + "/"]
+    while level:
+        bodies = await asyncio.gather(*(fetch(client, hosts, url) for url in level))
+        level = []
+        for body in bodies:
+            for href in HREF_RE.findall(body):
+                url = base_url + href
+                if url not in seen:
+                    seen.add(url)
+                    level.append(url)
+    return len(seen)
+
+
+async def from_sitemap(client: httpx.AsyncClient, hosts: HostScheduler, base_url: str) -> int:
+    urls = await SitemapDiscovery().discover(base_url + "/", client, hosts)
+    await asyncio.gather(*(fetch(client, hosts, url) for url in [base_url + "/"] + urls))
+    return len(urls) + 1
+
+
+async def run(args, server: FixtureServer) -> list:
+    results = []
+    limits = httpx.Limits(max_connections=200)
+    for name, crawl in (("links", follow_links), ("sitemap", from_sitemap)):
+        hosts = HostScheduler(max_concurrency=200, rate=0, global_concurrency=200)
+        async with httpx.AsyncClient(limits=limits) as client:
+            requests = server.requests
+            start = time.perf_counter()
+            pages = await crawl(client, hosts, server.base_url)
+            elapsed = time.perf_counter() - start
+        results.append({
+            "name": name,
+            "pages": pages,
+            "requests": server.requests - requests,
+            "wall_s": round(elapsed, 3),
+            "rounds": round(elapsed / args.latency, 1),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per response, standing in for a render")
+    parser.add_argument("--depth", type=int, default=3, help="Link hops from the home page to the leaf pages")
+    parser.add_argument("--fanout", type=int, default=4, help="Links per page")
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/discovery-<time>.json)")
+    args = parser.parse_args()
+
+    site = linked_site(args.depth, args.fanout)
+    # Only pages pay the render stand-in; robots.txt and sitemaps are plain HTTP
+    def latency(path: str) -> float:
+        return 0.0 if path == "/robots.txt" or "sitemap" in path or ".xml" in path else args.latency
+
+    with FixtureServer(site, latency=latency) as server:
+        add_sitemaps(site, server.base_url)
+        results = asyncio.run(run(args, server))
+    print(f"{'discovery':<11}{'pages':>7}{'requests':>10}{'wall s':>9}{'rounds':>8}")
+    for row in results:
+        print(f"{row['name']:<11}{row['pages']:>7}{row['requests']:>10}{row['wall_s']:>9.2f}{row['rounds']:>8.1f}")
+    print(f"saved {save_results('discovery', results, vars(args), args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Micro-benchmarks for the in-process extraction helpers.
+
+    python -m benchmarks.bench_extraction [--repeat N] [--out results.json]
+
+Times extract_repeated_sections, extract_basic_info and extract_contact_info
+on every fixture page, each call parsing the page from scratch as a request
+would, and saves the latency percentiles as JSON under benchmarks/results/.
+"""
+import argparse
+import json
+import time
+from types import SimpleNamespace
+
+from app.helper import extract_basic_info, extract_contact_info, extract_repeated_sections
+from benchmarks.fixtures import corpus, fixture_site
+from benchmarks.report import latency_summary, save_results
+
+EXTRACTED_CONTENT = json.dumps([
+    {"label": "email", "value": "info@acme.test"},
+    {"label": "phone_us", "value": "+1 (555) 010-2030"},
+])
+JS_RESULT = {"success": True, "results": [{"fonts": ["Inter, sans-serif"], "colors": ["#112233"]}]}
+
+
+def crawl_result(raw_html: str):
+    # The attributes extract_basic_info reads from a crawl4ai CrawlResult
+    return SimpleNamespace(
+        html=raw_html,
+        extracted_content=EXTRACTED_CONTENT,
+        console_messages=[],
+        js_execution_result=JS_RESULT,
+    )
+
+
+BENCHMARKS = {
+    "extract_repeated_sections": lambda raw_html: extract_repeated_sections(raw_html),
+    "extract_repeated_sections+html": lambda raw_html: extract_repeated_sections(raw_html, include_html=True),
+    "extract_basic_info": lambda raw_html: extract_basic_info(crawl_result(raw_html)),
+    "extract_contact_info": lambda raw_html: extract_contact_info(raw_html),
+}
+
+
+def pages() -> dict:
+    fixtures = dict(corpus())
+    site = fixture_site()
+    fixtures["home"] = site["/"]
+    fixtures["js_rendered_shell"] = site["/services/app"]
+    return fixtures
+
+
+def run(repeat: int) -> list:
+    results = []
+    for page_name, raw_html in pages().items():
+        for name, fn in BENCHMARKS.items():
+            fn(raw_html)  # warm-up
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn(raw_html)
+                timings.append(time.perf_counter() - start)
+            results.append({
+                "name": f"{name}/{page_name}",
+                "page_kb": round(len(raw_html) / 1024, 1),
+                **latency_summary(timings),
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/extraction-<time>.json)")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print(f"{'benchmark':<56}{'KB':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for row in results:
+        print(f"{row['name']:<56}{row['page_kb']:>8.0f}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}")
+    print(f"saved {save_results('extraction', results, vars(args), args.out)}")
+
+
+if __name__ == "__main__":
+    main()
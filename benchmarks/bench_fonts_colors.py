@@ -0,0 +1,124 @@
+"""Legacy two-pass vs single-pass budgeted fonts/colors script in headless Chromium.
+
+    python -m benchmarks.bench_fonts_colors
+
+Needs Playwright's Chromium (playwright install chromium); pages are loaded
+with set_content, so no network is used.
+"""
+import asyncio
+import time
+
+from playwright.async_api import async_playwright
+
+from app.helper import js_fonts_colors_extractor
+from benchmarks.fixtures import deeply_nested, huge_dom, service_listing
+
+LEGACY_SCRIPT = """function extractFont() {
+        const fonts = new Set();
+
+        document.querySelectorAll('*').forEach(el => {
+            const font = window.getComputedStyle(el).getPropertyValue('font-family');
+            if (font) fonts.add(font.trim());
+        });
+
+        console.info("fonts", [...fonts]);
+        return fonts;
+    } 
+
+    function extractColors(minCount = 20) {
+        const rgbToHex = (rgb) => {
+            const match = rgb.match(/\\d+/g);
+            if (!match || match.length < 3) return null;
+
+            return (
+                '#' +
+                match.slice(0, 3)
+                    .map(x => parseInt(x).toString(16).padStart(2, '0'))
+                    .join('')
+                    .toUpperCase()
+            );
+        };
+
+        const elements = document.querySelectorAll('*');
+        const colorCount = {};
+
+        elements.forEach(el => {
+            const style = window.getComputedStyle(el);
+            ['color', 'backgroundColor', 'borderColor'].forEach(prop => {
+                const rgb = style[prop];
+                if (rgb && rgb.startsWith('rgb')) {
+                    const hex = rgbToHex(rgb);
+                    if (hex) {
+                        colorCount[hex] = (colorCount[hex] || 0) + 1;
+                    }
+                }
+            });
+        });
+
+        const colors =  Object.entries(colorCount)
+            .filter(([, count]) => count > minCount)
+            .sort((a, b) => b[1] - a[1])
+            .map(([hex, count]) => hex);
+
+        console.info("colors", colors);
+        return colors;
+    }
+    
+    extractFont();
+    extractColors();
+    """
+
+REPEAT = 3
+
+
+def wrap(script: str) -> str:
+    # Same wrapper crawl4ai uses for js_code
+    return f"""
+    (async () => {{
+        try {{
+            return await (async () => {{
+                {script}
+            }})();
+        }} catch (err) {{
+            return {{ success: false, error: err.toString() }};
+        }}
+    }})();
+    """
+
+
+async def time_script(page, script: str):
+    timings = []
+    result = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = await page.evaluate(wrap(script))
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+
+async def main():
+    pages = {
+        "service_listing": service_listing(),
+        "huge_dom_2k_cards": huge_dom(cards=2000),
+        "huge_dom_8k_cards": huge_dom(cards=8000, depth=6),
+        "deeply_nested": deeply_nested(),
+    }
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        page = await browser.new_page()
+        print(f"{'page':<22}{'elements':>10}{'legacy ms':>12}{'new ms':>10}{'sampled':>9}  fonts/colors match")
+        for name, raw_html in pages.items():
+            await page.set_content(raw_html)
+            legacy_ms, _ = await time_script(page, LEGACY_SCRIPT)
+            new_ms, result = await time_script(page, js_fonts_colors_extractor())
+            full = await page.evaluate(wrap(js_fonts_colors_extractor(max_elements=10 ** 9, time_budget_ms=10 ** 9)))
+            match = set(result["fonts"]) == set(full["fonts"]) and result["colors"][:5] == full["colors"][:5]
+            print(
+                f"{name:<22}{result['total']:>10}{legacy_ms:>12.1f}{new_ms:>10.1f}"
+                f"{result['sampled']:>9}  {'yes' if match else 'no'}"
+            )
+        await browser.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+"""HostScheduler against a fixture server that enforces a rate limit.
+
+    python -m benchmarks.bench_host_scheduler
+
+Fetches the same batch of pages once unscheduled (plain asyncio.gather) and
+once through the HostScheduler, and reports 429s, failed pages and wall time.
+"""
+import asyncio
+import time
+
+import httpx
+
+from app.fetcher import fetch_static_page
+from app.hosts import HostScheduler
+from benchmarks.fixtures import service_listing
+from benchmarks.fixture_server import FixtureServer
+
+PAGES = 30
+SERVER_RATE = 10.0
+
+
+async def unscheduled(client, urls):
+    async def fetch(url):
+        response = await client.get(url)
+        return response.status_code == 200
+
+    return await asyncio.gather(*(fetch(url) for url in urls))
+
+
+async def scheduled(client, urls, hosts):
+    results = await asyncio.gather(*(fetch_static_page(client, url, hosts) for url in urls))
+    return [page is not None for page, _ in results]
+
+
+async def main():
+    pages = {f"/services/{i}": service_listing(cards=12, seed=i) for i in range(PAGES)}
+    async with httpx.AsyncClient() as client:
+        for name in ("unscheduled", "scheduled"):
+            with FixtureServer(pages, rate_limit=SERVER_RATE, burst=2) as server:
+                urls = [server.url(path) for path in pages]
+                start = time.perf_counter()
+                if name == "unscheduled":
+                    ok = await unscheduled(client, urls)
+                else:
+                    hosts = HostScheduler(max_concurrency=4, rate=SERVER_RATE * 0.9, burst=2)
+                    ok = await scheduled(client, urls, hosts)
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{name:<12} fetched {sum(ok):>3}/{len(urls)}  "
+                    f"429s {server.rejected:>3}  requests {server.requests:>3}  {elapsed:.2f}s"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""Old vs new subpage link selection on generated home-page link lists.
+
+    python -m benchmarks.bench_links [--repeat N] [--limit 25] [--out results.json]
+
+The legacy selection substring-matched 38 keywords against every href and
+took the first 25, so URL variants of one page each used a fetch slot.
+Reports both selections' latency and how many of their fetches land on
+distinct pages.
+"""
+import argparse
+import time
+from urllib.parse import urljoin, urlparse
+
+from app.links import EXCLUDED_KEYWORDS, select_subpages
+from app.urls import url_key
+from benchmarks.fixtures import site_links
+from benchmarks.report import latency_summary, save_results
+
+BASE_URL = "https://www.acme.test/"
+
+
+def legacy_select(base_url, links, limit):
+    return [
+        link["href"] for link in links
+        if (href := link.get("href"))
+        and not any(x in href.lower() for x in EXCLUDED_KEYWORDS)
+        and urlparse(urljoin(base_url, href)).path.strip('/')
+    ][:limit]
+
+
+def timed(fn, repeat):
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return latency_summary(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=25)
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/links-<time>.json)")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'links':<12}{'legacy ms':>11}{'new ms':>9}{'legacy fetches':>16}{'distinct':>10}"
+          f"{'new fetches':>13}{'saved':>7}")
+    for services in (10, 30, 100):
+        links = site_links(services=services)
+        legacy_urls = legacy_select(BASE_URL, links, args.limit)
+        selection = select_subpages(BASE_URL, links, args.limit)
+        legacy_distinct = len({url_key(url) for url in legacy_urls})
+        legacy = timed(lambda: legacy_select(BASE_URL, links, args.limit), args.repeat)
+        new = timed(lambda: select_subpages(BASE_URL, links, args.limit), args.repeat)
+        name = f"services_{services}"
+        results.append({
+            "name": name,
+            "links": len(links),
+            "legacy_p50_ms": legacy["p50_ms"],
+            "p50_ms": new["p50_ms"],
+            "p95_ms": new["p95_ms"],
+            "p99_ms": new["p99_ms"],
+            "legacy_fetches": len(legacy_urls),
+            "legacy_distinct_pages": legacy_distinct,
+            "fetches": len(selection.urls),
+            "saved_fetches": selection.saved_fetches,
+        })
+        print(
+            f"{name:<12}{legacy['p50_ms']:>11.3f}{new['p50_ms']:>9.3f}{len(legacy_urls):>16}{legacy_distinct:>10}"
+            f"{len(selection.urls):>13}{selection.saved_fetches:>7}"
+        )
+    print(f"saved {save_results('links', results, vars(args), args.out)}")
+
+
+if __name__ == "__main__":
+    main()
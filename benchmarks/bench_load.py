@@ -0,0 +1,169 @@
+"""End-to-end load test of /crawl, /crawl/deep and /crawl/batch against the local fixture site.
+
+    python -m benchmarks.bench_load [--requests N] [--concurrency C] [--endpoint crawl|deep|batch ...]
+    python -m benchmarks.bench_load --target http://127.0.0.1:8000   # an already running server
+
+Serves benchmarks.fixtures.fixture_site() from a local HTTP server, so no
+network access is needed (the browser still has to be installed). By default
+the app runs in-process with its full lifespan (browser pool, executor) and
+peak RSS covers this process plus its browsers and extraction workers. Every
+request uses cache=bypass unless --cache use is given. Reports p50/p95/p99
+latency, throughput and errors per endpoint and saves them as JSON.
+
+"batch" sends the --requests roots (distinct query strings on the fixture
+home page) as one POST /crawl/batch; its latencies are per root, so its
+throughput compares directly with --concurrency parallel /crawl calls.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+# The fixture server lives on one host; lift the politeness limits so the
+# benchmark measures the crawler rather than the per-host token bucket
+os.environ.setdefault("HOST_RATE", "0")
+os.environ.setdefault("HOST_MAX_CONCURRENCY", "64")
+
+import httpx
+
+from benchmarks.fixtures import fixture_site
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.report import RSSSampler, latency_summary, save_results
+
+ENDPOINTS = {
+    "crawl": "/crawl",
+    "deep": "/crawl/deep",
+    "batch": "/crawl/batch",
+}
+
+
+async def load(client: httpx.AsyncClient, path: str, params: dict, requests: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.get(path, params=params)
+                ok = response.status_code == 200 and response.json().get("status") == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        **latency_summary(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+    }
+
+
+async def load_batch(client: httpx.AsyncClient, path: str, params: dict, requests: int) -> dict:
+    body = {"urls": [f"{params['url']}?root={i}" for i in range(requests)], "cache": params["cache"]}
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    try:
+        async with client.stream("POST", path, json=body) as response:
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event["event"] == "result":
+                    latencies.append(event["elapsedMs"] / 1000)
+                    errors += event["status"] != 200
+    except httpx.HTTPError:
+        errors = requests - len(latencies) + errors
+    elapsed = time.perf_counter() - start
+    return {
+        **latency_summary(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+    }
+
+
+async def run(args) -> list:
+    results = []
+    with FixtureServer(fixture_site(), latency=args.latency) as server:
+        base_params = {"url": server.url("/"), "cache": args.cache}
+        endpoint_params = {
+            "crawl": base_params,
+            "deep": {**base_params, "max_pages": args.max_pages},
+            "batch": base_params,
+        }
+
+        if args.target:
+            client = httpx.AsyncClient(base_url=args.target, timeout=args.timeout)
+            lifespan = None
+        else:
+            from app.main import app
+
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=args.timeout
+            )
+            lifespan = app.router.lifespan_context(app)
+
+        async with client:
+            if lifespan:
+                await lifespan.__aenter__()
+            try:
+                for name in args.endpoint:
+                    path = ENDPOINTS[name]
+                    # One untimed request warms the browser pool and executor
+                    warm = "crawl" if name == "batch" else name
+                    await client.get(ENDPOINTS[warm], params=endpoint_params[warm])
+                    server.requests = 0
+                    with RSSSampler() as rss:
+                        if name == "batch":
+                            row = await load_batch(client, path, endpoint_params[name], args.requests)
+                        else:
+                            row = await load(client, path, endpoint_params[name], args.requests, args.concurrency)
+                    results.append({
+                        "name": name,
+                        **row,
+                        "peak_rss_mb": None if args.target else rss.peak_mb,
+                        "fixture_requests": server.requests,
+                    })
+            finally:
+                if lifespan:
+                    await lifespan.__aexit__(None, None, None)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoint", nargs="+", choices=sorted(ENDPOINTS), default=["crawl", "deep"])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-pages", type=int, default=10)
+    parser.add_argument("--cache", choices=["use", "bypass", "refresh"], default="bypass")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds the fixture server waits per page")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--target", help="Base URL of a running server instead of the in-process app")
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/load-<time>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{'endpoint':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}{'errors':>8}{'peak RSS MB':>13}")
+    for row in results:
+        print(
+            f"{row['name']:<10}{row['p50_ms']:>10.0f}{row['p95_ms']:>10.0f}{row['p99_ms']:>10.0f}"
+            f"{row['throughput_rps']:>9.2f}{row['errors']:>8}{row['peak_rss_mb'] or 0:>13.0f}"
+        )
+    print(f"saved {save_results('load', results, vars(args), args.out)}")
+
+
+if __name__ == "__main__":
+    main()
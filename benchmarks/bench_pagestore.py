@@ -0,0 +1,94 @@
+"""First crawl vs unchanged recrawl of subpages through the page store.
+
+    python -m benchmarks.bench_pagestore [--repeat N] [--out results.json]
+
+For every fixture page, times the extraction a first crawl pays (executor
+parse of the html, plus storing the page and its extraction) against what a
+recrawl of unchanged content pays (hash and stored-extraction lookup), and
+reports the compressed size of the stored html. The browser and network
+parts of a recrawl (conditional GET instead of a render) are not included.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from app.crawler import extract_subpage
+from app.executor import ExtractionExecutor
+from app.pagestore import PageStore
+from benchmarks.fixtures import corpus, locations_page
+from benchmarks.report import latency_summary, save_results
+
+
+async def timed(fn, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - start)
+    return latency_summary(timings)
+
+
+async def run(args) -> list:
+    pages = dict(corpus())
+    pages["locations_60"] = locations_page()
+    executor = ExtractionExecutor(kind="thread", max_workers=1)
+    executor.start()
+    path = os.path.join(tempfile.mkdtemp(), "pages.db")
+    store = PageStore(path)
+    runtime = SimpleNamespace(executor=executor, page_store=None)
+    stored = SimpleNamespace(executor=executor, page_store=store)
+    results = []
+    try:
+        for name, raw_html in pages.items():
+            url = f"https://acme.test/{name}"
+
+            async def first_crawl():
+                # A fresh page: parse it, then keep html and extraction
+                await extract_subpage(runtime, raw_html)
+                await store.put_page(url, raw_html, {"etag": '"v1"'})
+
+            async def recrawl():
+                await extract_subpage(stored, raw_html)
+
+            first = await timed(first_crawl, args.repeat)
+            await extract_subpage(stored, raw_html)
+            again = await timed(recrawl, args.repeat)
+            size = store.stats()["bytes"]
+            results.append({
+                "name": name,
+                "html_kb": round(len(raw_html) / 1024, 1),
+                "first_p50_ms": first["p50_ms"],
+                "p50_ms": again["p50_ms"],
+                "p95_ms": again["p95_ms"],
+                "p99_ms": again["p99_ms"],
+                "speedup": round(first["p50_ms"] / again["p50_ms"], 1) if again["p50_ms"] else 0.0,
+                "store_kb": round(size / 1024, 1),
+            })
+    finally:
+        executor.close()
+        store.close()
+        os.remove(path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/pagestore-<time>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{'page':<22}{'KB':>7}{'first ms':>10}{'recrawl ms':>12}{'speedup':>9}{'store KB':>10}")
+    for row in results:
+        print(
+            f"{row['name']:<22}{row['html_kb']:>7.1f}{row['first_p50_ms']:>10.2f}{row['p50_ms']:>12.2f}"
+            f"{row['speedup']:>8.1f}x{row['store_kb']:>10.1f}"
+        )
+    print(f"saved {save_results('pagestore', results, vars(args), args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Response payload cost: field selection, JSON encoding and compression.
+
+    python -m benchmarks.bench_payload
+
+Builds /crawl-shaped results from the fixture corpus and times the old path
+(jsonable_encoder + json.dumps, full payload) against FastJSONResponse with
+and without html, plus the wire size under gzip and zstd.
+"""
+import json
+import time
+import zlib
+
+from fastapi.encoders import jsonable_encoder
+
+from app.compression import _Compressor, supported_encodings
+from app.helper import extract_repeated_sections
+from app.payload import FieldSelection, dumps
+from benchmarks.fixtures import corpus
+
+REPEAT = 5
+
+
+def crawl_result(pages: dict) -> dict:
+    # The same shape handle_crawl returns, with one base page and every fixture as a subpage
+    base_html = max(pages.values(), key=len)
+    return {
+        "status": 200,
+        "data": {
+            "pageContent": {"url": "https://acme.test/", "html": base_html, "basicInfo": {"title": "Acme"}},
+            "services": [
+                {**item, "url_source": f"https://acme.test/{name}"}
+                for name, raw_html in pages.items()
+                for item in extract_repeated_sections(raw_html, include_html=True)
+            ],
+            "subpages": [{"url": f"https://acme.test/{name}", "fetchedWith": "http"} for name in pages],
+        },
+        "message": "Successfully crawled.",
+    }
+
+
+def best_ms(fn) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def compressed_size(payload: bytes, encoding: str) -> int:
+    compressor = _Compressor(encoding, 6, 3)
+    return len(compressor.compress(payload, False) + compressor.finish())
+
+
+def main():
+    result = crawl_result(corpus())
+    data = result["data"]
+    variants = {
+        "full (legacy encoder)": (result, lambda: json.dumps(jsonable_encoder(result)).encode()),
+        "full": (result, lambda: dumps(result)),
+        "include_html=false": (
+            {**result, "data": FieldSelection(include_html=False).project(data)}, None
+        ),
+        "basicInfo+titles": (
+            {**result, "data": FieldSelection(["pageContent.basicInfo", "services.title"]).project(data)}, None
+        ),
+    }
+
+    encodings = supported_encodings()
+    header = f"{'variant':<24}{'KB':>10}{'encode ms':>11}" + "".join(f"{e + ' KB':>10}" for e in encodings)
+    print(header)
+    for name, (content, encode) in variants.items():
+        encode = encode or (lambda content=content: dumps(content))
+        payload = encode()
+        row = f"{name:<24}{len(payload) / 1024:>10.0f}{best_ms(encode):>11.1f}"
+        row += "".join(f"{compressed_size(payload, e) / 1024:>10.0f}" for e in encodings)
+        print(row)
+    print(f"zlib {zlib.ZLIB_VERSION}, encodings: {', '.join(encodings)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Old vs new extract_repeated_sections on the fixture corpus.
+
+    python -m benchmarks.bench_repeated_sections [page.html ...]
+
+Extra HTML files passed on the command line are added to the corpus. Every
+page is checked for identical output before it is timed.
+"""
+import sys
+import time
+from pathlib import Path
+
+from lxml import html
+
+from app.document import PageDocument
+from app.helper import extract_repeated_sections
+from benchmarks.fixtures import corpus
+
+
+def legacy_extract_repeated_sections(raw_html):
+    # The XPath-per-child implementation this engine replaced
+    tree = html.fromstring(raw_html)
+    repeated_blocks = []
+
+    for parent in tree.xpath("//*[count(*) > 2]"):
+        children = parent.getchildren()
+
+        tag_names = [child.tag for child in children]
+        if len(set(tag_names)) == 1 and len(children) >= 3:
+            blocks = []
+            for child in children:
+                imgs = child.xpath(".//img")
+                if imgs:
+                    img_src = imgs[0].get("data-src") if imgs[0].get("data-src") else imgs[0].get("src")
+                    text = child.text_content().strip()
+                    heading = child.xpath(
+                        ".//*[self::h1 or self::h2 or self::h3 or self::h4 or self::h5 or self::h6 or contains(@class, 'title')]"
+                    )
+                    title = heading[0].text_content().strip() if heading else ""
+
+                    if (
+                        img_src
+                        and not img_src.endswith(".svg")
+                        and "\n" not in title
+                        and title != text
+                    ):
+                        blocks.append({
+                            "img_src": img_src,
+                            "title": title,
+                            "description": text,
+                            "html": html.tostring(child, encoding="unicode"),
+                        })
+
+            if len(blocks) >= 2:
+                repeated_blocks.append(blocks)
+
+    flat_services = []
+    seen_titles = set()
+
+    for block_group in repeated_blocks:
+        for item in block_group:
+            title_key = item["title"].strip().lower()
+            if title_key and title_key not in seen_titles:
+                seen_titles.add(title_key)
+                flat_services.append(item)
+
+    return flat_services
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(pages: dict, repeat: int = 5) -> list:
+    rows = []
+    for name, raw_html in pages.items():
+        expected = legacy_extract_repeated_sections(raw_html)
+        actual = extract_repeated_sections(PageDocument(raw_html), include_html=True)
+        if actual != expected:
+            raise AssertionError(f"{name}: output differs from the legacy implementation")
+
+        legacy = best_of(lambda: legacy_extract_repeated_sections(raw_html), repeat)
+        current = best_of(lambda: extract_repeated_sections(PageDocument(raw_html)), repeat)
+        current_html = best_of(lambda: extract_repeated_sections(PageDocument(raw_html), include_html=True), repeat)
+        rows.append({
+            "page": name,
+            "bytes": len(raw_html),
+            "blocks": len(expected),
+            "legacy_ms": legacy * 1000,
+            "new_ms": current * 1000,
+            "new_with_html_ms": current_html * 1000,
+            "speedup": legacy / current if current else float("inf"),
+        })
+    return rows
+
+
+def main(argv):
+    pages = corpus()
+    for path in argv:
+        pages[Path(path).name] = Path(path).read_text(encoding="utf-8", errors="replace")
+
+    print(f"{'page':<28}{'KB':>8}{'blocks':>8}{'legacy ms':>12}{'new ms':>10}{'+html ms':>10}{'speedup':>9}")
+    for row in run(pages):
+        print(
+            f"{row['page']:<28}{row['bytes'] / 1024:>8.0f}{row['blocks']:>8}"
+            f"{row['legacy_ms']:>12.1f}{row['new_ms']:>10.1f}{row['new_with_html_ms']:>10.1f}"
+            f"{row['speedup']:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,86 @@
+"""Page load time and bytes served per browser resource profile.
+
+    python -m benchmarks.bench_resources [--repeat N] [--out results.json]
+
+Loads benchmarks.fixtures.asset_heavy_site() from the local fixture server
+in headless Chromium with each profile's route installed the way pooled
+browsers install it, and reports load latency, bytes the server sent and
+the blocked/allowed request counts. Needs Playwright's Chromium
+(playwright install chromium). Tracker blocking is not exercised: the
+fixture server only answers on 127.0.0.1.
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from playwright.async_api import async_playwright
+
+from app.resources import PROFILES, ResourcePolicy, route_resources
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.fixtures import asset_heavy_site
+from benchmarks.report import latency_summary, save_results
+
+
+async def load_page(browser, url: str, profile: str) -> tuple:
+    policy = ResourcePolicy(profile)
+    context = await browser.new_context()
+    page = await context.new_page()
+    try:
+        await route_resources(page, context=context, url=url, config=SimpleNamespace(shared_data=policy.run_data()))
+        start = time.perf_counter()
+        await page.goto(url, wait_until="load")
+        elapsed = time.perf_counter() - start
+    finally:
+        await context.close()
+    return elapsed, policy.page_stats(url)
+
+
+async def run(args) -> list:
+    results = []
+    with FixtureServer(asset_heavy_site(), latency=args.latency) as server:
+        url = server.url("/")
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch()
+            try:
+                for profile in PROFILES:
+                    await load_page(browser, url, profile)
+                    server.bytes_sent = 0
+                    server.requests = 0
+                    timings = []
+                    stats = None
+                    for _ in range(args.repeat):
+                        elapsed, stats = await load_page(browser, url, profile)
+                        timings.append(elapsed)
+                    results.append({
+                        "name": profile,
+                        **latency_summary(timings),
+                        "kb_served": round(server.bytes_sent / args.repeat / 1024, 1),
+                        "requests_served": server.requests / args.repeat,
+                        "blocked": stats["blocked"] if stats else 0,
+                        "allowed": stats["allowed"] if stats else server.requests // args.repeat,
+                    })
+            finally:
+                await browser.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the fixture server waits per request")
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/resources-<time>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{'profile':<13}{'p50 ms':>9}{'p95 ms':>9}{'KB served':>11}{'requests':>10}{'blocked':>9}{'allowed':>9}")
+    for row in results:
+        print(
+            f"{row['name']:<13}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['kb_served']:>11.1f}"
+            f"{row['requests_served']:>10.1f}{row['blocked']:>9}{row['allowed']:>9}"
+        )
+    print(f"saved {save_results('resources', results, vars(args), args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Time from launch until the service answers, is ready, and serves its first crawls at full speed.
+
+    python -m benchmarks.bench_startup [--workers 1 2 ...] [--requests N] [--out results.json]
+
+Starts the service with uvicorn for each --workers count (WEB_CONCURRENCY),
+once with WARMUP=0 and once with warmup on, against the local fixture site.
+Reports seconds until GET / answers and until GET /ready passes, the
+startup stages a worker reports, and the latency of --requests parallel
+/crawl calls sent the moment the service is taken into rotation (without
+warmup when / answers, the only signal there was before /ready; with it
+when /ready passes) next to the same calls once warm. Every call renders
+the home page and extracts its basic info, with cache=bypass. Needs the
+browser installed (playwright install chromium).
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.fixtures import fixture_site
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.report import latency_summary, save_results
+
+POLL_INTERVAL = 0.05
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for(client: httpx.AsyncClient, path: str, timeout: float) -> dict:
+    # Polls until path answers 200; a worker reporting a failed start ends the run
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get(path)
+            if response.status_code == 200:
+                return response.json()
+            data = response.json().get("data") or {}
+            if data.get("status") == "failed":
+                raise RuntimeError(f"Service failed to start: {data.get('error')}")
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(POLL_INTERVAL)
+    raise TimeoutError(f"{path} did not pass within {timeout}s")
+
+
+async def crawl_round(client: httpx.AsyncClient, url: str, requests: int, tag: str) -> dict:
+    async def crawl(i: int):
+        start = time.perf_counter()
+        response = await client.get("/crawl", params={
+            "url": f"{url}?{tag}={i}",
+            "cache": "bypass",
+            "fields": "pageContent.basicInfo",
+            "discover": "false",
+        })
+        ok = response.status_code == 200 and response.json().get("status") == 200
+        return time.perf_counter() - start, ok
+
+    outcomes = await asyncio.gather(*(crawl(i) for i in range(requests)))
+    return {
+        **latency_summary([seconds for seconds, _ in outcomes]),
+        "errors": sum(not ok for _, ok in outcomes),
+    }
+
+
+async def measure(args, workers: int, warmup: bool, url: str) -> dict:
+    port = free_port()
+    scratch = tempfile.mkdtemp(prefix="bench-startup-")
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "WARMUP": "1" if warmup else "0",
+        "READY_DIR": os.path.join(scratch, "ready"),
+        "JOB_SQLITE_PATH": os.path.join(scratch, "jobs.db"),
+        "PAGE_STORE_PATH": "",
+        # One fixture host: lift the politeness limits, as bench_load does
+        "HOST_RATE": "0",
+        "HOST_MAX_CONCURRENCY": "64",
+    }
+    launched = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=args.timeout) as client:
+            await wait_for(client, "/", args.timeout)
+            health_s = time.perf_counter() - launched
+            if warmup:
+                ready = await wait_for(client, "/ready", args.timeout)
+                in_rotation_s = time.perf_counter() - launched
+            first = await crawl_round(client, url, args.requests, "first")
+            if not warmup:
+                ready = await wait_for(client, "/ready", args.timeout)
+                in_rotation_s = health_s
+            warm = await crawl_round(client, url, args.requests, "warm")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return {
+        "name": f"{workers}w {'warmup' if warmup else 'cold'}",
+        "workers": workers,
+        "warmup": warmup,
+        "health_s": round(health_s, 3),
+        "ready_s": round(ready["data"]["startupMs"]["ready"] / 1000, 3),
+        "in_rotation_s": round(in_rotation_s, 3),
+        "startup_ms": ready["data"]["startupMs"],
+        "first_p50_ms": first["p50_ms"],
+        "first_max_ms": first["max_ms"],
+        "warm_p50_ms": warm["p50_ms"],
+        "errors": first["errors"] + warm["errors"],
+    }
+
+
+async def run(args) -> list:
+    results = []
+    with FixtureServer(fixture_site()) as fixtures:
+        for workers in args.workers:
+            for warmup in (False, True):
+                results.append(await measure(args, workers, warmup, fixtures.url("/")))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--requests", type=int, default=4, help="Parallel /crawl calls per round")
+    parser.add_argument("--timeout", type=float, default=180.0)
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/startup-<time>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{'mode':<12}{'/ s':>7}{'ready s':>9}{'rotation s':>12}{'first p50':>11}{'first max':>11}{'warm p50':>10}{'errors':>8}")
+    for row in results:
+        print(
+            f"{row['name']:<12}{row['health_s']:>7.2f}{row['ready_s']:>9.2f}{row['in_rotation_s']:>12.2f}"
+            f"{row['first_p50_ms']:>11.0f}{row['first_max_ms']:>11.0f}{row['warm_p50_ms']:>10.0f}{row['errors']:>8}"
+        )
+    print(f"saved {save_results('startup', results, vars(args), args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Full-tree section scan vs site-template lookups on sibling pages.
+
+    python -m benchmarks.bench_templates [--pages N] [--repeat N] [--out results.json]
+
+Extracts benchmarks.fixtures.template_site() the way subpages of one /crawl
+are extracted: the first page is scanned in full and teaches the site its
+card-grid paths, later pages try those paths first. Every page's sections
+are checked against extract_repeated_sections before timing. The parse,
+shared by both paths, is excluded. Reports per-page timings, the template
+hit rate and the time SiteTemplates estimates it saved.
+"""
+import argparse
+import time
+
+from app.document import PageDocument
+from app.helper import extract_repeated_sections, extract_templated_sections
+from app.site_templates import SiteTemplates
+from benchmarks.fixtures import template_site
+from benchmarks.report import latency_summary, save_results
+
+SITE = "https://acme.test"
+
+
+def timed(fn, document, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(document)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(args) -> list:
+    pages = template_site(args.pages)
+    templates = SiteTemplates(enabled=True)
+    full_timings, templated_timings = [], []
+    mismatches = 0
+    for path, raw_html in pages.items():
+        url = SITE + path
+        document = PageDocument(raw_html)
+        document.tree
+        template = templates.get(url)
+        start = time.perf_counter()
+        sections, hit, learned = extract_templated_sections(document, template)
+        elapsed = time.perf_counter() - start
+        if sections != extract_repeated_sections(PageDocument(raw_html)):
+            mismatches += 1
+        templates.record(url, len(raw_html), {"tried": bool(template), "hit": hit, "learned": learned, "seconds": elapsed})
+
+        full_timings += timed(extract_repeated_sections, document, args.repeat)
+        if template:
+            templated_timings += timed(lambda doc: extract_templated_sections(doc, template), document, args.repeat)
+
+    full = latency_summary(full_timings)
+    templated = latency_summary(templated_timings)
+    stats = templates.stats()
+    return [{
+        "name": "template_site",
+        "pages": len(pages),
+        "mismatches": mismatches,
+        "full_p50_ms": full["p50_ms"],
+        "p50_ms": templated["p50_ms"],
+        "p95_ms": templated["p95_ms"],
+        "speedup": round(full["p50_ms"] / templated["p50_ms"], 1) if templated["p50_ms"] else 0.0,
+        "hit_rate": stats["hit_rate"],
+        "saved_ms_per_hit": stats["saved_ms_per_hit"],
+    }]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/templates-<time>.json)")
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"{'site':<15}{'pages':>7}{'full ms':>9}{'tmpl ms':>9}{'speedup':>9}{'hit rate':>10}{'saved/hit':>11}{'diffs':>7}")
+    for row in results:
+        print(
+            f"{row['name']:<15}{row['pages']:>7}{row['full_p50_ms']:>9.2f}{row['p50_ms']:>9.2f}"
+            f"{row['speedup']:>8.1f}x{row['hit_rate']:>10}{row['saved_ms_per_hit']:>11}{row['mismatches']:>7}"
+        )
+    print(f"saved {save_results('templates', results, vars(args), args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Pages fetched per service found by the deep crawl frontier scorers.
+
+    python -m benchmarks.bench_url_scoring [--sites N] [--max-pages N] [--out results.json]
+
+Builds link graphs of small-business sites: service and product pages
+(some under non-obvious paths such as /what-we-do/ or /our-work/) carry
+service cards, while blog posts, locations, team and legal pages do not.
+Each site is crawled with a best-first loop like the deep crawl's (batches
+of 10, depth limit 3) under the original keyword scorer, the service
+scorer starting cold on every site, and the service scorer keeping what
+it learned on the sites before, with the early stop on. Reports pages
+fetched, the share of each site's services found, and pages per service.
+No network or browser: pages are looked up in the graph.
+"""
+import argparse
+import heapq
+import random
+
+from app.scoring import ServiceURLScorer, ServiceYield, URLShapeStats, make_url_scorer
+from benchmarks.report import save_results
+
+BATCH_SIZE = 10
+MAX_DEPTH = 3
+
+SERVICE_HEADS = ("services", "products", "what-we-do", "our-work", "solutions", "treatments")
+PLAIN_PAGES = ("about", "team", "contact", "careers", "privacy", "terms", "faq", "gallery", "reviews")
+
+
+def build_site(rng: random.Random, index: int) -> dict:
+    """url -> (service titles on the page, [(link url, anchor text)])."""
+    base = f"https://site{index}.test"
+    pages = {}
+    heads = rng.sample(SERVICE_HEADS, 2)
+    nav = []
+    for head in heads:
+        children = []
+        for n in range(rng.randint(4, 9)):
+            url = f"{base}/{head}/offer-{n}"
+            titles = [f"site{index} {head} {n} card {card}" for card in range(rng.randint(3, 8))]
+            pages[url] = (titles, [])
+            children.append((url, f"Offer {n}"))
+        # The hub lists a few of its children's cards itself
+        pages[f"{base}/{head}"] = ([f"site{index} {head} hub {card}" for card in range(3)], children)
+        nav.append((f"{base}/{head}", head.replace("-", " ").title()))
+    posts = []
+    for n in range(rng.randint(20, 40)):
+        url = f"{base}/blog/{2020 + n % 5}/post-{n}"
+        pages[url] = ([], [])
+        posts.append((url, f"Read more: post {n}"))
+    pages[f"{base}/blog"] = ([], posts)
+    locations = []
+    for n in range(rng.randint(5, 15)):
+        url = f"{base}/locations/city-{n}"
+        pages[url] = ([], [])
+        locations.append((url, f"City {n}"))
+    pages[f"{base}/locations"] = ([], locations)
+    for slug in PLAIN_PAGES:
+        pages[f"{base}/{slug}"] = ([], [])
+    links = nav + [(f"{base}/blog", "Blog"), (f"{base}/locations", "Locations")]
+    links += [(f"{base}/{slug}", slug.title()) for slug in PLAIN_PAGES]
+    # Footers link the latest posts from every page
+    footer = posts[:6]
+    for url, (titles, page_links) in pages.items():
+        page_links.extend(footer)
+    pages[base + "/"] = ([], rng.sample(links, len(links)) + footer)
+    return pages
+
+
+def crawl(site: dict, start: str, scorer, services: ServiceYield, max_pages: int, learned: URLShapeStats = None) -> int:
+    queue = [(0.0, 0, start)]
+    depths = {start: 0}
+    visited = set()
+    fetched = 0
+    while queue and fetched < max_pages and not services.should_stop():
+        batch = []
+        while queue and len(batch) < min(BATCH_SIZE, max_pages - fetched):
+            _, depth, url = heapq.heappop(queue)
+            if url not in visited:
+                visited.add(url)
+                batch.append((depth, url))
+        for depth, url in batch:
+            titles, links = site[url]
+            fetched += 1
+            if url != start:
+                sections = [{"title": title} for title in titles]
+                services.add(sections)
+                if learned is not None:
+                    anchor = scorer.anchor_text(url) if isinstance(scorer, ServiceURLScorer) else None
+                    learned.record(url, bool(sections), anchor)
+            if depth + 1 > MAX_DEPTH:
+                continue
+            if isinstance(scorer, ServiceURLScorer):
+                scorer.observe_links([{"href": link, "text": text} for link, text in links], url)
+            for link, _ in links:
+                if link in visited or depths.get(link, MAX_DEPTH + 1) <= depth + 1:
+                    continue
+                depths[link] = depth + 1
+                heapq.heappush(queue, (-scorer.score(link), depth + 1, link))
+    return fetched
+
+
+def run(args) -> list:
+    rng = random.Random(args.seed)
+    sites = [build_site(rng, index) for index in range(args.sites)]
+    # name -> (scorer, learns, keeps what it learned across sites, stops early)
+    modes = {
+        "keyword": ("keyword", False, False, False),
+        "service-cold": ("service", True, False, True),
+        "service-warm": ("service", True, True, True),
+    }
+    results = []
+    for name, (scorer_name, learns, keeps, stops) in modes.items():
+        kept = URLShapeStats()
+        pages = found = total = stopped = 0
+        for index, site in enumerate(sites):
+            learned = (kept if keeps else URLShapeStats()) if learns else None
+            scorer = make_url_scorer(scorer_name, learned)
+            services = ServiceYield() if stops else ServiceYield(window=0)
+            pages += crawl(site, f"https://site{index}.test/", scorer, services, args.max_pages, learned)
+            found += services.services
+            total += len({title for titles, _ in site.values() for title in titles})
+            stopped += services.stopped
+        results.append({
+            "name": name,
+            "pages": pages,
+            "services": found,
+            "coverage": round(found / total, 3),
+            "pages_per_service": round(pages / found, 3) if found else None,
+            "early_stops": stopped,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", type=int, default=40)
+    parser.add_argument("--max-pages", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/url_scoring-<time>.json)")
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"{'scorer':<14}{'pages':>7}{'services':>10}{'coverage':>10}{'pages/svc':>11}{'stops':>7}")
+    for row in results:
+        print(
+            f"{row['name']:<14}{row['pages']:>7}{row['services']:>10}{row['coverage']:>10.1%}"
+            f"{row['pages_per_service'] or 0:>11.3f}{row['early_stops']:>7}"
+        )
+    print(f"saved {save_results('url_scoring', results, vars(args), args.out)}")
+
+
+if __name__ == "__main__":
+    main()
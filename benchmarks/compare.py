@@ -0,0 +1,46 @@
+"""Compare two saved benchmark result files.
+
+    python -m benchmarks.compare baseline.json candidate.json [--metric p50_ms ...]
+
+Rows are matched by name; for every shared metric the relative change is
+printed, negative meaning the candidate is lower (faster / smaller).
+"""
+import argparse
+import json
+
+DEFAULT_METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "peak_rss_mb")
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        data = json.load(f)
+    return {row["name"]: row for row in data["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", nargs="+", default=list(DEFAULT_METRICS))
+    args = parser.parse_args()
+
+    baseline = load(args.baseline)
+    candidate = load(args.candidate)
+    print(f"{'benchmark':<56}{'metric':>16}{'baseline':>12}{'candidate':>12}{'change':>9}")
+    for name, row in baseline.items():
+        other = candidate.get(name)
+        if other is None:
+            continue
+        for metric in args.metric:
+            old, new = row.get(metric), other.get(metric)
+            if old is None or new is None:
+                continue
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"{name:<56}{metric:>16}{old:>12.2f}{new:>12.2f}{change:>9}")
+
+    for name in sorted(set(baseline) ^ set(candidate)):
+        print(f"{name:<56}  only in {'baseline' if name in baseline else 'candidate'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Local HTTP server for fixture pages, optionally enforcing a rate limit.
+
+    with FixtureServer(pages, rate_limit=5) as server:
+        server.url("/services")
+
+Pages are html strings; other resources can be given as (content type, bytes).
+latency is seconds per response, or a function of the path returning them.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class RateLimit:
+    """Token bucket shared by all clients; over the limit the server answers 429."""
+
+    def __init__(self, rate: float, burst: int, retry_after: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.retry_after = retry_after
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+            self.refilled_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class FixtureHTTPServer(ThreadingHTTPServer):
+    # socketserver's default backlog of 5 stalls bursts of parallel connections
+    request_queue_size = 256
+    daemon_threads = True
+
+
+class FixtureServer:
+    def __init__(self, pages: dict, rate_limit: float = None, burst: int = 1, latency=0.0):
+        self.pages = pages
+        self.limit = RateLimit(rate_limit, burst) if rate_limit else None
+        self.latency = latency
+        self.requests = 0
+        self.rejected = 0
+        self.bytes_sent = 0
+        self._server = None
+
+    def __enter__(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                fixture.requests += 1
+                if fixture.limit and not fixture.limit.allow():
+                    fixture.rejected += 1
+                    self.send_response(429)
+                    self.send_header("Retry-After", str(fixture.limit.retry_after))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body = fixture.pages.get(self.path.split("?")[0])
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                latency = fixture.latency(self.path) if callable(fixture.latency) else fixture.latency
+                if latency:
+                    time.sleep(latency)
+                if isinstance(body, tuple):
+                    content_type, payload = body
+                else:
+                    content_type, payload = "text/html; charset=utf-8", body.encode("utf-8")
+                fixture.bytes_sent += len(payload)
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = FixtureHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
@@ -0,0 +1,235 @@
+import random
+
+SERVICE_WORDS = [
+    "Plumbing", "Roofing", "Heating", "Cooling", "Drain", "Cleaning", "Repair",
+    "Installation", "Inspection", "Remodeling", "Painting", "Landscaping",
+    "Electrical", "Flooring", "Windows", "Gutters", "Insulation", "Siding",
+]
+
+FILLER = (
+    "We provide reliable, licensed and insured work for homes and businesses "
+    "across the region with upfront pricing and same-day appointments."
+)
+
+
+def service_card(rng: random.Random, index: int, tag: str = "div") -> str:
+    title = f"{rng.choice(SERVICE_WORDS)} {rng.choice(SERVICE_WORDS)} {index}"
+    img_attr = "data-src" if index % 3 == 0 else "src"
+    heading = (
+        f'<h3>{title}</h3>' if index % 2 else f'<span class="card-title">{title}</span>'
+    )
+    return (
+        f'<{tag} class="card"><a href="/services/{index}">'
+        f'<img {img_attr}="/img/service-{index}.jpg" alt="{title}"></a>'
+        f'<div class="card-body">{heading}<p>{FILLER}</p>'
+        f'<ul><li>Fast</li><li>Local</li><li>Trusted</li></ul></div></{tag}>'
+    )
+
+
+def nested_filler(rng: random.Random, depth: int, breadth: int) -> str:
+    if depth == 0:
+        return f"<p>{FILLER}</p><img src='/icons/{rng.randint(0, 99)}.svg'>"
+    inner = "".join(nested_filler(rng, depth - 1, breadth) for _ in range(breadth))
+    return f"<div class='section-{depth}'>{inner}</div>"
+
+
+def page(body: str, title: str = "Acme Home Services") -> str:
+    return (
+        f"<html><head><title>{title}</title></head><body>"
+        "<header><img class='logo' src='/logo.png'><nav><ul>"
+        + "".join(f"<li><a href='/p/{i}'>Link {i}</a></li>" for i in range(12))
+        + f"</ul></nav></header><main>{body}</main>"
+        "<footer>Acme Home Services, info@acme.test, +1 (555) 010-2030, "
+        "123 Main St, Springfield, IL 62704</footer></body></html>"
+    )
+
+
+def service_listing(cards: int = 24, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    grid = "".join(service_card(rng, i) for i in range(cards))
+    return page(f"<section class='services'><h2>Our Services</h2><div class='grid'>{grid}</div></section>")
+
+
+def huge_dom(cards: int = 2000, depth: int = 5, breadth: int = 4, seed: int = 2) -> str:
+    rng = random.Random(seed)
+    groups = []
+    for group in range(0, cards, 40):
+        tag = "li" if group % 80 else "div"
+        items = "".join(service_card(rng, i, tag) for i in range(group, min(group + 40, cards)))
+        wrapper = "ul" if tag == "li" else "div"
+        groups.append(f"<{wrapper} class='group'>{items}</{wrapper}><!-- group {group} -->")
+    return page(nested_filler(rng, depth, breadth) + "".join(groups))
+
+
+def deeply_nested(levels: int = 12, width: int = 3, seed: int = 3) -> str:
+    rng = random.Random(seed)
+
+    def build(level: int, index: int) -> str:
+        if level == 0:
+            return service_card(rng, index)
+        return "<div class='wrap'>" + "".join(build(level - 1, index * width + i) for i in range(width)) + "</div>"
+
+    return page(build(min(levels, 7), 0))
+
+
+def corpus() -> dict:
+    return {
+        "service_listing": service_listing(),
+        "service_listing_large": service_listing(cards=400),
+        "huge_dom": huge_dom(),
+        "deeply_nested": deeply_nested(),
+    }
+
+
+def js_rendered_page(cards: int = 12, seed: int = 4) -> str:
+    # An SPA shell: the cards only exist after the bundle runs in a browser
+    rng = random.Random(seed)
+    markup = "".join(service_card(rng, i) for i in range(cards)).replace("\\", "\\\\").replace("`", "\\`")
+    return (
+        "<html><head><title>Acme Home Services</title></head><body>"
+        '<div id="root"></div>'
+        "<script>document.getElementById('root').innerHTML = "
+        f"`<section class='services'><h2>Our Services</h2><div class='grid'>{markup}</div></section>`;"
+        "</script></body></html>"
+    )
+
+
+SITE_SECTIONS = [
+    "plumbing", "roofing", "heating", "cooling", "electrical",
+    "remodeling", "painting", "landscaping", "flooring", "windows",
+]
+
+
+def home_page(sections: list) -> str:
+    rng = random.Random(5)
+    links = "".join(f'<li><a href="/services/{slug}">{slug.title()}</a></li>' for slug in sections)
+    # Pages the subpage filter is expected to skip
+    links += "".join(
+        f'<li><a href="/{slug}">{slug.title()}</a></li>' for slug in ("about", "contact", "blog", "careers", "privacy")
+    )
+    featured = "".join(service_card(rng, i) for i in range(6))
+    return page(
+        f"<section class='hero'><h1>Acme Home Services</h1><p>{FILLER}</p></section>"
+        f"<nav class='services-nav'><ul>{links}</ul></nav>"
+        f"<section class='featured'><h2>Featured</h2><div class='grid'>{featured}</div></section>"
+    )
+
+
+def fixture_site(sections: list = None) -> dict:
+    """A small service-business site keyed by path, for the local fixture server.
+
+    Mixes plain listing pages, a huge DOM, a deeply nested layout and an
+    SPA page that only renders in a browser.
+    """
+    sections = sections or SITE_SECTIONS
+    pages = {"/": home_page(sections + ["catalog", "nested", "app"])}
+    for i, slug in enumerate(sections):
+        pages[f"/services/{slug}"] = service_listing(cards=12, seed=10 + i)
+    pages["/services/catalog"] = huge_dom()
+    pages["/services/nested"] = deeply_nested()
+    pages["/services/app"] = js_rendered_page()
+    for slug in ("about", "contact", "blog", "careers", "privacy"):
+        pages[f"/{slug}"] = page(f"<article><h1>{slug.title()}</h1><p>{FILLER}</p></article>")
+    return pages
+
+
+def locations_page(branches: int = 60, seed: int = 6) -> str:
+    # A footer listing every branch: many addresses, phones and emails in one text
+    rng = random.Random(seed)
+    cities = [("Springfield", "IL"), ("Austin", "Texas"), ("Albany", "New York"), ("Reno", "NV"), ("Dover", "Delaware")]
+    entries = []
+    for i in range(branches):
+        city, state = rng.choice(cities)
+        entries.append(
+            f"<li>Branch {i}: {rng.randint(1, 9999)} {rng.choice(SERVICE_WORDS)} Ave, Suite {i}, {city}, {state} "
+            f"{rng.randint(10000, 99999)} &middot; branch{i}@acme.test &middot; (555) 010-{i:04d}</li>"
+        )
+    return service_listing(cards=12, seed=seed).replace(
+        "</footer>", f"<ul class='branches'>{''.join(entries)}</ul></footer>"
+    )
+
+
+def site_links(services: int = 30, seed: int = 7, base: str = "https://www.acme.test") -> list:
+    """Internal links of a home page the way crawl4ai reports them.
+
+    Header, body and footer link the same service pages with the variants real
+    sites produce (trailing slashes, fragments, tracking parameters, http and
+    bare-host spellings) alongside pages and files the crawler should skip.
+    """
+    rng = random.Random(seed)
+    bare = base.replace("https://www.", "http://")
+    slugs = [f"{rng.choice(SERVICE_WORDS).lower()}-{i}" for i in range(services)]
+    links = []
+    for slug in ("about-us", "contact", "blog/", "careers", "privacy-policy", "reviews"):
+        links.append({"href": f"{base}/{slug}", "text": slug})
+    for slug in slugs[:8]:
+        links.append({"href": f"{base}/services/{slug}/", "text": slug})
+    for slug in slugs:
+        variant = rng.choice((
+            f"{base}/services/{slug}", f"{base}/services/{slug}#quote", f"{bare}/services/{slug}",
+            f"{base}/services/{slug}?utm_source=home&utm_medium=card",
+        ))
+        links.append({"href": variant, "text": slug})
+        if rng.random() < 0.3:
+            links.append({"href": f"{base}/files/{slug}-brochure.pdf", "text": "Brochure"})
+    for slug in slugs[:8]:
+        links.append({"href": f"{base}/services/{slug}#footer", "text": slug})
+    links.append({"href": f"{base}/", "text": "Home"})
+    links.append({"href": f"{base}/index.html", "text": "Home"})
+    return links
+
+
+def asset_heavy_site(images: int = 40, seed: int = 8) -> dict:
+    """A service page that pulls in images, web fonts, a stylesheet and video.
+
+    Returned as fixture server paths; assets are (content type, bytes) of
+    realistic sizes so blocked requests show up as saved bandwidth.
+    """
+    rng = random.Random(seed)
+    css = (
+        "@font-face{font-family:Brand;src:url('/fonts/brand.woff2') format('woff2')}"
+        "body{font-family:Brand,sans-serif;color:#1f2933;background:#fff}"
+        ".card{border:1px solid #d0d7de;background-image:url('/img/texture.jpg')}"
+    )
+    cards = "".join(service_card(rng, i) for i in range(images))
+    body = (
+        "<link rel='stylesheet' href='/styles.css'>"
+        "<video src='/media/intro.mp4' autoplay muted></video>"
+        f"<section class='services'><h2>Our Services</h2><div class='grid'>{cards}</div></section>"
+    )
+    site = {
+        "/": page(body),
+        "/styles.css": ("text/css", css.encode()),
+        "/fonts/brand.woff2": ("font/woff2", rng.randbytes(90_000)),
+        "/img/texture.jpg": ("image/jpeg", rng.randbytes(60_000)),
+        "/logo.png": ("image/png", rng.randbytes(20_000)),
+        "/media/intro.mp4": ("video/mp4", rng.randbytes(1_500_000)),
+    }
+    for i in range(images):
+        site[f"/img/service-{i}.jpg"] = ("image/jpeg", rng.randbytes(rng.randint(30_000, 120_000)))
+    return site
+
+
+def template_site(pages: int = 25, seed: int = 9) -> dict:
+    """Sibling service pages of one site template, keyed by path.
+
+    The card grid sits at the same structural path on every page while the
+    content around it (article filler, number of cards, an optional promo
+    block before it) varies, as on a typical CMS site. Every fifth page
+    also has a team grid the others lack.
+    """
+    rng = random.Random(seed)
+    site = {}
+    for i in range(pages):
+        cards = "".join(service_card(rng, i * 100 + card) for card in range(rng.randint(6, 18)))
+        promo = f"<div class='promo'><p>{FILLER}</p></div>" if i % 3 == 0 else ""
+        article = nested_filler(rng, 3, 4)
+        team = ""
+        if i % 5 == 4:
+            members = "".join(service_card(rng, 10_000 + i * 100 + card, "li") for card in range(4))
+            team = f"<section class='team'><h2>Our Team</h2><ul class='members'>{members}</ul></section>"
+        site[f"/services/{SERVICE_WORDS[i % len(SERVICE_WORDS)].lower()}-{i}"] = page(
+            f"<article class='content'>{article}</article>{promo}"
+            f"<section class='services'><h2>Related Services</h2><div class='grid'>{cards}</div></section>{team}"
+        )
+    return site
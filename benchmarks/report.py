@@ -0,0 +1,136 @@
+"""Shared helpers for benchmark results: percentiles, RSS sampling and JSON output."""
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentile(values, pct: float) -> float:
+    # Nearest-rank on the sorted sample, good enough for latency reports
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def latency_summary(seconds) -> dict:
+    ms = [value * 1000 for value in seconds]
+    return {
+        "count": len(ms),
+        "mean_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(max(ms), 3) if ms else 0.0,
+    }
+
+
+def _process_tree_rss(root_pid: int) -> int:
+    # Sum of resident memory of root_pid and every descendant (browsers, workers), in bytes
+    parents = {}
+    rss = {}
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat") as stat:
+                fields = stat.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        pid = int(entry.name)
+        parents[pid] = int(fields[1])
+        rss[pid] = int(fields[21]) * page_size
+
+    tree = {root_pid}
+    changed = True
+    while changed:
+        changed = False
+        for pid, ppid in parents.items():
+            if ppid in tree and pid not in tree:
+                tree.add(pid)
+                changed = True
+    return sum(rss.get(pid, 0) for pid in tree)
+
+
+class RSSSampler:
+    """Samples the RSS of this process and its children in a background thread.
+
+    Falls back to getrusage peaks where /proc is not available.
+    """
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if os.path.isdir("/proc"):
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        else:
+            scale = 1 if sys.platform == "darwin" else 1024
+            self.peak = scale * (
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+            )
+
+    @property
+    def peak_mb(self) -> float:
+        return round(self.peak / 1024 / 1024, 1)
+
+    def _run(self):
+        pid = os.getpid()
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _process_tree_rss(pid))
+            self._stop.wait(self.interval)
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save_results(suite: str, results: list, params: dict = None, path: str = None) -> Path:
+    """Write {"suite", "environment", "params", "results"} and return the file path.
+
+    Defaults to benchmarks/results/<suite>-<timestamp>.json.
+    """
+    if path:
+        target = Path(path)
+    else:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        target = RESULTS_DIR / f"{suite}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    target.write_text(json.dumps({
+        "suite": suite,
+        "environment": environment(),
+        "params": params or {},
+        "results": results,
+    }, indent=2))
+    return target
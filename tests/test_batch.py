@@ -0,0 +1,29 @@
+import asyncio
+
+from app.batch import BatchRunner
+
+
+def test_closing_the_stream_waits_for_cancelled_roots():
+    async def run():
+        runner = BatchRunner(concurrency=2)
+        unwound = []
+
+        async def crawl(url):
+            if url == "fast":
+                return {}
+            try:
+                await asyncio.sleep(60)
+            finally:
+                await asyncio.sleep(0.01)
+                unwound.append(url)
+
+        stream = runner.stream(["fast", "slow-1", "slow-2", "slow-3"], crawl)
+        first = await stream.__anext__()
+        assert first["url"] == "fast"
+        await stream.aclose()
+        # Every root has finished cleaning up and released its slot by the time aclose returns
+        assert sorted(unwound) == ["slow-1", "slow-2"]
+        assert runner.stats()["active"] == 0
+        assert runner.stats()["queued"] == 0
+
+    asyncio.run(run())
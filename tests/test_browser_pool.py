@@ -0,0 +1,36 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.browser_pool import BrowserPool, PooledBrowser
+
+
+def fake_browser(healthy: bool = True) -> PooledBrowser:
+    async def close():
+        pass
+
+    manager = SimpleNamespace(browser=SimpleNamespace(is_connected=lambda: healthy))
+    return PooledBrowser(SimpleNamespace(ready=True, close=close, crawler_strategy=SimpleNamespace(browser_manager=manager)))
+
+
+def test_cancelled_replacement_is_recorded_as_missing():
+    async def run():
+        pool = BrowserPool(size=1, health_interval=0, max_uses=0, idle_ttl=0)
+        launches = []
+
+        async def launch():
+            launches.append(None)
+            if len(launches) == 1:
+                return fake_browser(healthy=False)
+            await asyncio.sleep(60)
+
+        pool._launch = launch
+        await pool.start()
+        # Leasing the crashed browser relaunches it; the caller gives up meanwhile
+        lease = asyncio.create_task(pool.lease().__aenter__())
+        await asyncio.sleep(0.05)
+        lease.cancel()
+        await asyncio.gather(lease, return_exceptions=True)
+        assert pool.stats()["missing"] == 1
+        assert pool.stats()["replaced"] == 1
+
+    asyncio.run(run())
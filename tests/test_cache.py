@@ -0,0 +1,129 @@
+import asyncio
+import os
+import time
+
+import httpx
+
+from app.cache import CacheEntry, ResultCache, SQLiteTier
+
+
+def test_disk_tier_evicts_least_recently_used_past_its_budget(tmp_path):
+    async def run():
+        cache = ResultCache(max_bytes=0, sqlite_path=str(tmp_path / "results.db"), disk_max_bytes=50_000)
+        for n in range(30):
+            await cache.set(f"key{n}", {"data": os.urandom(2_000).hex()}, {})
+            if n == 0:
+                continue
+            # key0 is read as the others are written, so it stays recently used
+            assert await cache.get("key0") is not None
+        disk = cache.disk
+        assert disk._stored_bytes() <= 50_000
+        assert disk.evictions > 0
+        assert await disk.get("key0") is not None
+        assert await disk.get("key1") is None
+        assert await disk.get("key29") is not None
+        cache.close()
+
+    asyncio.run(run())
+
+
+def test_disk_size_is_reread_from_the_shared_database(tmp_path):
+    async def run():
+        path = str(tmp_path / "results.db")
+        first, second = SQLiteTier(path, max_bytes=100_000), SQLiteTier(path, max_bytes=100_000)
+        # Each worker alone stays under the limit; together they do not
+        for n in range(30):
+            for name, tier in (("a", first), ("b", second)):
+                payload = os.urandom(1_000).hex().encode()
+                await tier.set(f"{name}{n}", payload, CacheEntry(None, time.time(), len(payload)), 0)
+        assert first._stored_bytes() <= 100_000
+        first.close()
+        second.close()
+
+    asyncio.run(run())
+
+
+def counting(value):
+    calls = []
+
+    async def compute(validators):
+        calls.append(None)
+        validators.update(etag='"v1"')
+        return value
+
+    return compute, calls
+
+
+def age(cache: ResultCache, key: str, seconds: float):
+    cache._entries[key].stored_at -= seconds
+
+
+def not_modified_client(status: int, requests: list) -> httpx.AsyncClient:
+    def handler(request):
+        requests.append(request.headers.get("if-none-match"))
+        return httpx.Response(status)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_fresh_entry_is_served_without_computing():
+    async def run():
+        cache = ResultCache(ttl=60)
+        compute, calls = counting({"services": []})
+        assert await cache.get_or_compute("k", "https://acme.test/", "use", compute) == {"services": []}
+        assert await cache.get_or_compute("k", "https://acme.test/", "use", compute) == {"services": []}
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 1
+
+        await cache.get_or_compute("k", "https://acme.test/", "refresh", compute)
+        assert len(calls) == 2
+
+    asyncio.run(run())
+
+
+def test_stale_entry_is_revalidated_before_recrawling():
+    async def run():
+        cache = ResultCache(ttl=60, max_stale=600)
+        compute, calls = counting({"services": []})
+        await cache.get_or_compute("k", "https://acme.test/", "use", compute)
+        age(cache, "k", 120)
+
+        requests = []
+        async with not_modified_client(304, requests) as client:
+            await cache.get_or_compute("k", "https://acme.test/", "use", compute, client)
+        assert requests == ['"v1"']
+        assert len(calls) == 1
+        assert cache.stats()["revalidated"] == 1
+        # Revalidation makes the entry fresh again
+        assert time.time() - cache._entries["k"].stored_at < 1
+
+        age(cache, "k", 120)
+        async with not_modified_client(200, requests) as client:
+            await cache.get_or_compute("k", "https://acme.test/", "use", compute, client)
+        assert len(calls) == 2
+
+    asyncio.run(run())
+
+
+def test_entry_past_max_stale_is_dropped():
+    async def run():
+        cache = ResultCache(ttl=60, max_stale=600)
+        compute, calls = counting({"services": []})
+        await cache.get_or_compute("k", "https://acme.test/", "use", compute)
+        age(cache, "k", 700)
+        assert await cache.get("k") is None
+        assert cache.stats()["entries"] == 0
+
+    asyncio.run(run())
+
+
+def test_partial_results_are_returned_but_not_stored():
+    async def run():
+        cache = ResultCache(ttl=60)
+        compute, calls = counting({"services": [], "partial": True})
+        assert (await cache.get_or_compute("k", "https://acme.test/", "use", compute))["partial"]
+        await cache.get_or_compute("k", "https://acme.test/", "use", compute)
+        assert len(calls) == 2
+        assert await cache.get("k") is None
+
+    asyncio.run(run())
@@ -0,0 +1,64 @@
+import asyncio
+import gzip
+import os
+
+from app.compression import CompressionMiddleware
+
+
+def respond(chunks: list, headers: list):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        for n, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": n < len(chunks) - 1})
+
+    return app
+
+
+def call(app, thread_bytes: int = 1024) -> tuple:
+    messages = []
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=10, thread_bytes=thread_bytes)(scope, receive, send))
+    headers = messages[0]["headers"]
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return headers, gzip.decompress(body)
+
+
+def test_large_body_is_compressed_off_the_loop(monkeypatch):
+    threaded = []
+    to_thread = asyncio.to_thread
+
+    async def counting_to_thread(fn, *args):
+        threaded.append(len(args[0]))
+        return await to_thread(fn, *args)
+
+    monkeypatch.setattr(asyncio, "to_thread", counting_to_thread)
+    payload = os.urandom(200_000).hex().encode()
+    headers, body = call(respond([payload], [(b"content-type", b"application/json")]))
+    assert body == payload
+    assert threaded == [len(payload)]
+    # Small bodies stay on the loop
+    call(respond([b"x" * 100], [(b"content-type", b"text/plain")]))
+    assert len(threaded) == 1
+    assert (b"content-encoding", b"gzip") in headers
+    assert (b"content-length", str(len(body)).encode()) not in headers
+
+
+def test_streamed_chunks_are_compressed_in_order():
+    chunks = [b'{"event": "page"}\n' * n for n in (1, 5000, 2)]
+    headers, body = call(respond(chunks, [(b"content-type", b"application/x-ndjson")]))
+    assert body == b"".join(chunks)
+
+
+def test_vary_is_merged_into_the_existing_header():
+    headers, _ = call(respond([b"x" * 100], [(b"content-type", b"text/plain"), (b"vary", b"Origin")]))
+    assert [value for name, value in headers if name == b"vary"] == [b"Origin, Accept-Encoding"]
+
+    headers, _ = call(respond([b"x" * 100], [(b"content-type", b"text/plain"), (b"vary", b"accept-encoding")]))
+    assert [value for name, value in headers if name == b"vary"] == [b"accept-encoding"]
@@ -0,0 +1,80 @@
+import re
+
+from app.contacts import PHONE_RE, extract_contacts, find_addresses, find_emails, merge_contacts, phone_key
+from app.document import PageDocument
+from benchmarks.bench_contacts import legacy_extract_address_details, legacy_extract_contacts
+from benchmarks.fixtures import locations_page
+
+EMAIL_EDGES = (
+    "Write jane.doe@example.com, sales@shop.co.uk or a@b.c; not foo @ bar nor x@@y; "
+    "mail:A.B-C@sub.example.org. user@localhost @start trailing@"
+)
+SIMPLE_ADDRESSES = "Visit 123 Main St, Springfield, IL 62704 or 9 Elm Rd, Reno, NV today."
+
+
+def footer_text() -> str:
+    return PageDocument(locations_page()).footer_text
+
+
+def test_emails_match_the_old_regex():
+    for text in (EMAIL_EDGES, footer_text()):
+        assert find_emails(text) == re.findall(r'[\w\.-]+@[\w\.-]+\.\w+', text)
+
+
+def test_simple_addresses_match_the_old_regex():
+    assert find_addresses(SIMPLE_ADDRESSES) == legacy_extract_contacts(SIMPLE_ADDRESSES)["address"]
+
+
+def test_full_state_names_are_not_cut_short():
+    # The old [A-Z]{2} IGNORECASE branch read "Dover, Delaware" as state "Do"
+    text = "HQ: 1321 Gutters Ave, Suite 4, Dover, Delaware 44291 · 9 Elm Rd, Newark, new jersey 07102-1234"
+    legacy = legacy_extract_contacts(text)["address"]
+    assert [address["state"] for address in legacy] == ["Do", "ne"]
+
+    assert find_addresses(text) == [
+        {
+            "full_address": "1321 Gutters Ave, Suite 4, Dover, Delaware 44291",
+            "street_address": "1321 Gutters Ave, Suite 4",
+            "city": "Dover",
+            "state": "Delaware",
+            "zip_code": "44291",
+        },
+        {
+            "full_address": "9 Elm Rd, Newark, new jersey 07102-1234",
+            "street_address": "9 Elm Rd",
+            "city": "Newark",
+            "state": "New Jersey",
+            "zip_code": "07102-1234",
+        },
+    ]
+
+
+def test_branch_footer_finds_every_address_once():
+    text = footer_text()
+    found = extract_contacts(text)
+    legacy = legacy_extract_contacts(text)
+    assert len(found["addresses"]) == len(legacy["address"])
+    assert {address["city"] for address in found["addresses"]} == {"Springfield", "Austin", "Albany", "Reno", "Dover"}
+    # Where the old regex got an address right, both parse it the same way
+    assert found["addresses"][0] == legacy["address"][0]
+    assert all(legacy_extract_address_details(address["full_address"]) == address
+               for address in found["addresses"] if address["state"] == "IL")
+
+
+def test_phones_keep_the_area_code_bracket():
+    text = footer_text()
+    legacy = legacy_extract_contacts(text)["phone"]
+    phones = extract_contacts(text)["phones"]
+    assert "(555) 010-0000" in phones
+    assert sorted(map(phone_key, phones)) == sorted(set(map(phone_key, legacy)))
+    assert all(phone in PHONE_RE.findall(text) for phone in phones)
+
+
+def test_merge_contacts_dedupes_across_pages_first_seen_wins():
+    home = extract_contacts("Call +1 (555) 010-0000 or mail Info@Acme.test. 123 Main St, Springfield, IL 62704")
+    contact_page = extract_contacts("info@acme.test · 555-010-0000 · 555-010-9999 · 123 Main St., Springfield, IL 62704")
+    merged = merge_contacts([home, None, {}, contact_page])
+
+    assert merged["emails"] == ["Info@Acme.test"]
+    assert merged["phones"] == ["+1 (555) 010-0000", "555-010-9999"]
+    assert [address["full_address"] for address in merged["addresses"]] == ["123 Main St, Springfield, IL 62704"]
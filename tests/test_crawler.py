@@ -0,0 +1,55 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+
+from app.crawler import add_basic_info, crawl_subpages
+from app.executor import ExtractionTimeout, ExtractionWorkerLost
+from app.hosts import HostScheduler
+from app.metrics import NO_TIMINGS
+from app.site_templates import SiteTemplates
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.fixtures import service_listing
+
+
+class FailingExecutor:
+    def __init__(self, errors: dict):
+        self.errors = errors
+
+    async def subpage(self, raw_html: str, include_html: bool = False, template: list = None):
+        raise self.errors[raw_html]
+
+    async def basic_info(self, content):
+        raise self.errors[content.html]
+
+
+def test_http_subpage_whose_extraction_fails_is_reported():
+    slow, lost = service_listing(seed=1), service_listing(seed=2)
+    with FixtureServer({"/slow": slow, "/lost": lost}) as server:
+        async def run():
+            async with httpx.AsyncClient() as client:
+                runtime = SimpleNamespace(
+                    http_client=client,
+                    hosts=HostScheduler(rate=0),
+                    page_store=None,
+                    templates=SiteTemplates(enabled=False),
+                    executor=FailingExecutor({slow: ExtractionTimeout("timed out"), lost: ExtractionWorkerLost("lost")}),
+                )
+                return await crawl_subpages([server.url("/slow"), server.url("/lost")], runtime, "http")
+
+        subpages, report = asyncio.run(run())
+
+    assert subpages == []
+    assert [(row["fetchedWith"], row["fallbackReason"]) for row in report] == [
+        (None, "extraction-timeout"),
+        (None, "extraction-failed"),
+    ]
+
+
+def test_failed_basic_info_is_left_out_with_its_reason():
+    content = SimpleNamespace(url="https://acme.test/", html="<html></html>", js_execution_result=None)
+    for error, reason in ((ExtractionTimeout("timed out"), "extraction-timeout"), (ExtractionWorkerLost("lost"), "extraction-failed")):
+        runtime = SimpleNamespace(executor=FailingExecutor({content.html: error}))
+        data = {"url": content.url}
+        asyncio.run(add_basic_info(runtime, data, content, NO_TIMINGS))
+        assert data == {"url": content.url, "basicInfoError": reason}
@@ -0,0 +1,75 @@
+import asyncio
+
+import httpx
+
+from app.discovery import SitemapDiscovery
+from app.hosts import HostScheduler
+
+SITE = "https://acme.test"
+
+
+def urlset(*paths: str) -> bytes:
+    return (
+        '<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        + "".join(f"<url><loc>{SITE}{path}</loc></url>" for path in paths)
+        + "</urlset>"
+    ).encode()
+
+
+def client_for(routes: dict) -> httpx.AsyncClient:
+    # routes: path -> (status, body), or a coroutine function returning one
+    async def handler(request: httpx.Request) -> httpx.Response:
+        route = routes.get(request.url.path, (404, b""))
+        status, body = await route() if callable(route) else route
+        return httpx.Response(status, content=body)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def discover(discovery: SitemapDiscovery, routes: dict, times: int = 1) -> list:
+    async def run():
+        async with client_for(routes) as client:
+            hosts = HostScheduler(rate=0)
+            return [await discovery.discover(SITE + "/", client, hosts) for _ in range(times)]
+
+    return asyncio.run(run())
+
+
+def test_forbidden_robots_txt_disallows_the_whole_site():
+    for status in (401, 403):
+        discovery = SitemapDiscovery(enabled=True)
+        [urls] = discover(discovery, {
+            "/robots.txt": (status, b""),
+            "/sitemap.xml": (200, urlset("/services/roofing", "/services/plumbing")),
+        })
+        assert urls == []
+        assert discovery.stats()["disallowed"] == 1
+
+
+def test_missing_robots_txt_allows_the_whole_site():
+    discovery = SitemapDiscovery(enabled=True)
+    [urls] = discover(discovery, {"/sitemap.xml": (200, urlset("/services/roofing"))})
+    assert urls == [SITE + "/services/roofing"]
+
+
+def test_timed_out_discovery_keeps_the_pages_read_briefly():
+    async def slow_sitemap():
+        await asyncio.sleep(5)
+        return 200, urlset("/services/late")
+
+    index = (
+        f'<sitemapindex><sitemap><loc>{SITE}/pages.xml</loc></sitemap></sitemapindex>'
+    ).encode()
+    routes = {
+        "/robots.txt": (200, f"Sitemap: {SITE}/index.xml\nSitemap: {SITE}/services.xml".encode()),
+        "/services.xml": (200, urlset("/services/roofing", "/services/plumbing")),
+        "/index.xml": (200, index),
+        "/pages.xml": slow_sitemap,
+    }
+    discovery = SitemapDiscovery(enabled=True, timeout=0.3, partial_ttl=0)
+    first, second = discover(discovery, routes, times=2)
+    assert first == [SITE + "/services/roofing", SITE + "/services/plumbing"]
+    assert second == first
+    # Not served from the cache: the partial result expired at once and the site was tried again
+    assert discovery.stats()["timeouts"] == 2
+    assert discovery.stats()["cached"] == 0
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.executor import ExtractionExecutor, ExtractionTimeout, ExtractionWorkerLost
+
+
+def sleep_job(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def die_job():
+    os._exit(1)
+
+
+def test_timed_out_task_keeps_its_slot_until_it_ends():
+    async def run():
+        executor = ExtractionExecutor("thread", max_workers=2, max_pending=1, task_timeout=0.05).start()
+        try:
+            with pytest.raises(ExtractionTimeout):
+                await executor.run(sleep_job, 0.3)
+            assert executor.stats()["pending"] == 1
+            start = time.perf_counter()
+            await executor.run(sleep_job, 0)
+            # The next task only got the slot once the timed-out one finished
+            assert time.perf_counter() - start > 0.15
+            assert executor.stats()["pending"] == 0
+        finally:
+            executor.close()
+
+    asyncio.run(run())
+
+
+def test_dead_worker_rebuilds_the_process_pool():
+    async def run():
+        executor = ExtractionExecutor("process", max_workers=1, max_pending=2, task_timeout=60).start()
+        try:
+            with pytest.raises(ExtractionWorkerLost):
+                await executor.run(die_job)
+            assert await executor.run(sleep_job, 0) == 0
+            assert executor.stats()["restarts"] == 1
+        finally:
+            executor.close()
+
+    asyncio.run(run())
+
+
+def test_hung_worker_is_recycled():
+    async def run():
+        executor = ExtractionExecutor("process", max_workers=1, max_pending=1, task_timeout=0.5).start()
+        try:
+            await executor.run(sleep_job, 0)
+            with pytest.raises(ExtractionTimeout):
+                await executor.run(sleep_job, 60)
+            assert executor.stats()["restarts"] == 1
+            # The hung worker is terminated task_timeout later, which frees its slot for the new pool
+            assert await asyncio.wait_for(executor.run(sleep_job, 0), timeout=30) == 0
+            assert executor.stats()["pending"] == 0
+        finally:
+            executor.close()
+
+    asyncio.run(run())
@@ -0,0 +1,37 @@
+import random
+
+from app.document import PageDocument
+from app.helper import extract_repeated_sections, extract_templated_sections
+from benchmarks.fixtures import page, service_card
+
+
+def grid_page(rng: random.Random, first: int, team: bool = False) -> str:
+    cards = "".join(service_card(rng, first + card) for card in range(6))
+    body = f"<section class='services'><div class='grid'>{cards}</div></section>"
+    if team:
+        members = "".join(service_card(rng, first + 50 + card, "li") for card in range(4))
+        body += f"<section class='team'><ul class='members'>{members}</ul></section>"
+    return page(body)
+
+
+def test_template_hit_returns_the_same_sections_as_a_full_scan():
+    rng = random.Random(1)
+    _, hit, learned = extract_templated_sections(PageDocument(grid_page(rng, 0)))
+    assert not hit and learned
+
+    sections, hit, _ = extract_templated_sections(PageDocument(grid_page(rng, 100)), learned)
+    assert hit
+    assert len(sections) == 6
+
+
+def test_page_with_an_extra_grid_falls_back_to_the_full_scan():
+    rng = random.Random(2)
+    _, _, learned = extract_templated_sections(PageDocument(grid_page(rng, 0)))
+
+    raw_html = grid_page(rng, 100, team=True)
+    sections, hit, relearned = extract_templated_sections(PageDocument(raw_html), learned)
+    assert not hit
+    assert sections == extract_repeated_sections(PageDocument(raw_html))
+    assert len(sections) == 10
+    # The extra grid is learned for the next pages of the site
+    assert len(relearned) == 2
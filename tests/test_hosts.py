@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import httpx
+
+from app.fetcher import fetch_static_page
+from app.hosts import HostScheduler
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.fixtures import service_listing
+
+PAGES = {f"/services/{i}": service_listing(cards=6, seed=i) for i in range(12)}
+
+
+def test_scheduled_fetches_stay_under_the_server_rate_limit():
+    with FixtureServer(PAGES, rate_limit=20.0, burst=2) as server:
+        async def run():
+            hosts = HostScheduler(max_concurrency=4, rate=12.0, burst=2)
+            async with httpx.AsyncClient() as client:
+                return await asyncio.gather(*(fetch_static_page(client, server.url(path), hosts) for path in PAGES))
+
+        results = asyncio.run(run())
+
+        assert server.rejected == 0
+        assert all(page is not None for page, _ in results)
+
+
+def test_per_host_concurrency_cap_holds():
+    in_flight = 0
+    peak = 0
+
+    with FixtureServer(PAGES, latency=0.05) as server:
+        async def run():
+            hosts = HostScheduler(max_concurrency=3, rate=0)
+
+            async def fetch(client, url, permit):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                try:
+                    response = await client.get(url)
+                    permit.report(response.status_code, response.headers)
+                    return response.status_code
+                finally:
+                    in_flight -= 1
+
+            async with httpx.AsyncClient() as client:
+                return await asyncio.gather(*(
+                    hosts.run(server.url(path), lambda permit, url=server.url(path): fetch(client, url, permit))
+                    for path in PAGES
+                ))
+
+        statuses = asyncio.run(run())
+
+    assert statuses == [200] * len(PAGES)
+    assert peak == 3
+
+
+def test_retry_after_pauses_the_host():
+    # The server allows one request per second and answers the rest 429 with Retry-After: 1
+    attempts = []
+
+    with FixtureServer(PAGES, rate_limit=1.0, burst=1) as server:
+        async def run():
+            hosts = HostScheduler(max_concurrency=1, rate=0, max_retries=2)
+
+            async def fetch(client, url, permit):
+                started = time.monotonic()
+                response = await client.get(url)
+                permit.report(response.status_code, response.headers)
+                attempts.append((started, time.monotonic(), response.status_code))
+                return response.status_code
+
+            async with httpx.AsyncClient() as client:
+                return await asyncio.gather(*(
+                    hosts.run(server.url(path), lambda permit, url=server.url(path): fetch(client, url, permit))
+                    for path in list(PAGES)[:2]
+                ))
+
+        statuses = asyncio.run(run())
+
+    assert statuses == [200, 200]
+    throttled = [i for i, (_, _, status) in enumerate(attempts) if status == 429]
+    assert throttled
+    for i in throttled:
+        answered_at = attempts[i][1]
+        # Nothing is sent to the host until Retry-After has passed
+        assert all(started >= answered_at + 0.95 for started, _, _ in attempts[i + 1:])
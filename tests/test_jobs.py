@@ -0,0 +1,63 @@
+import asyncio
+
+from app.jobs import JobScheduler, QueueFullError, SQLiteJobBackend
+
+
+def test_cancelled_queued_jobs_free_their_queue_slot():
+    async def run():
+        blocker = asyncio.Event()
+        jobs = JobScheduler(lambda job: blocker.wait(), workers=1, max_queue=2)
+        await jobs.start()
+        try:
+            await jobs.submit("crawl", {})
+            await asyncio.sleep(0)  # the single worker picks it up
+            queued = [await jobs.submit("crawl", {}) for _ in range(2)]
+            for job in queued:
+                await jobs.cancel(job.id)
+            assert jobs.stats()["queued"] == 0
+            # Without the cancelled entries counting, two more fit
+            await jobs.submit("crawl", {})
+            await jobs.submit("crawl", {})
+            try:
+                await jobs.submit("crawl", {})
+                raise AssertionError("queue over max_queue")
+            except QueueFullError:
+                pass
+        finally:
+            blocker.set()
+            while jobs.stats()["running"] or jobs.stats()["queued"]:
+                await asyncio.sleep(0.01)
+            await jobs.close()
+
+    asyncio.run(run())
+
+
+def test_cancel_reaches_the_owning_worker_through_a_shared_backend(tmp_path):
+    async def run():
+        path = str(tmp_path / "jobs.db")
+        started = asyncio.Event()
+
+        async def runner(job):
+            started.set()
+            await asyncio.sleep(60)
+
+        owner = JobScheduler(runner, backend=SQLiteJobBackend(path), cancel_poll_interval=0.05)
+        other = JobScheduler(runner, backend=SQLiteJobBackend(path), cancel_poll_interval=0.05)
+        await owner.start()
+        await other.start()
+        try:
+            job = await owner.submit("crawl", {})
+            await started.wait()
+            assert not other.owns(job.id)
+            await other.cancel(job.id)
+            for _ in range(100):
+                if (await other.get(job.id)).status == "cancelled":
+                    break
+                await asyncio.sleep(0.02)
+            assert (await other.get(job.id)).status == "cancelled"
+            assert owner.stats()["cancelled"] == 1
+        finally:
+            await owner.close()
+            await other.close()
+
+    asyncio.run(run())
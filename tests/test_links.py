@@ -0,0 +1,27 @@
+from app.links import EXCLUDED_RE, select_subpages
+from app.scoring import ServiceURLScorer
+
+RUN_TOGETHER = ["/aboutus", "/contactus", "/privacypolicy", "/termsofservice", "/ourteam", "/newsroom"]
+SERVICE_PAGES = ["/pressure-washing", "/steam-cleaning", "/services/express-repair", "/accounting-services"]
+
+
+def test_excludes_run_together_slugs():
+    for path in RUN_TOGETHER + ["/contact-us", "/Blog/", "/cookies.html"]:
+        assert EXCLUDED_RE.search(path), path
+
+
+def test_keeps_service_words_containing_keywords():
+    for path in SERVICE_PAGES:
+        assert not EXCLUDED_RE.search(path), path
+
+
+def test_select_subpages_drops_run_together_slugs():
+    links = [{"href": path} for path in RUN_TOGETHER + SERVICE_PAGES]
+    selection = select_subpages("https://acme.test/", links, limit=25)
+    assert sorted(selection.urls) == sorted(f"https://acme.test{path}" for path in SERVICE_PAGES)
+    assert selection.excluded == len(RUN_TOGETHER)
+
+
+def test_scorer_penalizes_run_together_slugs():
+    scorer = ServiceURLScorer()
+    assert scorer.score("https://acme.test/aboutus") < scorer.score("https://acme.test/pressure-washing")
@@ -0,0 +1,43 @@
+import asyncio
+import os
+
+from app.pagestore import PageStore
+
+
+def noise(size: int) -> str:
+    # Incompressible enough that the stored size tracks size
+    return os.urandom(size // 2).hex()
+
+
+def test_extractions_and_frontiers_count_toward_the_budget(tmp_path):
+    async def run():
+        store = PageStore(str(tmp_path / "pages.db"), max_bytes=50_000)
+        for n in range(40):
+            await store.put_extraction(f"hash{n}", "sections", noise(4_000))
+            await store.save_frontier(f"crawl{n}", {"frontier": noise(2_000)})
+            await store.save_frontier_event(f"crawl{n}", f"https://example.com/{n}", {"page": noise(1_000)})
+        assert store._stored_bytes() <= 50_000
+        assert store.stats()["evictions"] > 0
+        # The newest entries survive, the oldest were evicted
+        assert await store.extraction("hash39", "sections") is not None
+        assert await store.extraction("hash0", "sections") is None
+        assert await store.frontier("crawl0") is None
+        store.close()
+
+    asyncio.run(run())
+
+
+def test_size_is_reread_from_the_shared_database(tmp_path):
+    async def run():
+        path = str(tmp_path / "pages.db")
+        first = PageStore(path, max_bytes=100_000)
+        second = PageStore(path, max_bytes=100_000)
+        # Each worker alone stays under the limit; together they do not
+        for n in range(30):
+            await first.put_page(f"https://example.com/a{n}", noise(2_000), {})
+            await second.put_page(f"https://example.com/b{n}", noise(2_000), {})
+        assert first._stored_bytes() <= 100_000
+        first.close()
+        second.close()
+
+    asyncio.run(run())
@@ -0,0 +1,77 @@
+from app.scoring import ServiceURLScorer, ServiceYield, URLShapeStats
+
+BASE = "https://acme.test"
+
+
+def test_service_words_in_path_and_anchor_add_up():
+    scorer = ServiceURLScorer()
+    scorer.observe_links([
+        {"href": "/pressure-washing", "text": "Cleaning services"},
+        {"href": "/our-story", "text": "About us"},
+    ], BASE + "/")
+
+    assert scorer._calculate_score(BASE + "/locations") == 0.0
+    assert scorer._calculate_score(BASE + "/services") == 1.0
+    assert scorer._calculate_score(BASE + "/pressure-washing") == 0.5
+    assert scorer._calculate_score(BASE + "/our-story") == -0.5
+    assert scorer._calculate_score(BASE + "/about") == -1.0
+
+
+def test_assets_and_deep_paths_score_lower():
+    scorer = ServiceURLScorer()
+    assert scorer._calculate_score(BASE + "/services/brochure.pdf") == -2.0
+    assert scorer._calculate_score(BASE + "/services/home/repair") == 1.0 - 0.15
+    assert scorer._calculate_score(BASE + "/services/home/repair/gutters") == 1.0 - 0.3
+
+
+def test_learned_shapes_move_the_score():
+    learned = URLShapeStats()
+    for n in range(10):
+        learned.record(f"{BASE}/offers/{n}", hit=True)
+        learned.record(f"{BASE}/projects/{n}", hit=False)
+    scorer = ServiceURLScorer(learned)
+
+    assert scorer._calculate_score(BASE + "/offers/99") > 0.0
+    assert scorer._calculate_score(BASE + "/projects/99") < 0.0
+    # Unseen shapes fall back to the path heuristics alone
+    assert ServiceURLScorer(learned)._calculate_score(BASE + "/locations") == ServiceURLScorer()._calculate_score(BASE + "/locations")
+
+
+def sections(*titles):
+    return [{"title": title} for title in titles]
+
+
+def test_plateau_needs_a_full_window_of_empty_pages():
+    services = ServiceYield(window=3, min_pages=4)
+    assert services.add(sections("Roofing", "Gutters")) == 2
+    assert services.add(sections("Roofing", " ", "Siding")) == 1
+    for _ in range(2):
+        services.add(sections("Gutters"))
+        assert not services.plateaued
+    services.add([])
+    assert services.plateaued
+    assert services.should_stop()
+
+    # A new service resets the window, but a stopped crawl stays stopped
+    services.add(sections("Windows"))
+    assert not services.plateaued
+    assert services.should_stop()
+    assert services.as_dict() == {"pages": 6, "services": 4, "pagesPerService": 1.5, "stoppedEarly": True}
+
+
+def test_plateau_waits_for_min_pages():
+    services = ServiceYield(window=2, min_pages=5)
+    for _ in range(4):
+        services.add([])
+    assert not services.plateaued
+    services.add([])
+    assert services.plateaued
+
+
+def test_window_of_zero_never_stops():
+    services = ServiceYield(window=0, min_pages=0)
+    for _ in range(50):
+        services.add([])
+    assert not services.plateaued
+    assert not services.should_stop()
+    assert services.as_dict()["pagesPerService"] is None
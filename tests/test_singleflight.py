@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_task():
+    async def run():
+        flights = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(None)
+            await asyncio.sleep(0.05)
+            return "result"
+
+        results = await asyncio.gather(*(flights.run("k", work) for _ in range(3)))
+        assert results == ["result"] * 3
+        assert len(calls) == 1
+        assert flights.stats() == {"in_flight": 0, "started": 1, "coalesced": 2}
+
+    asyncio.run(run())
+
+
+def test_shared_task_survives_until_its_last_waiter_leaves():
+    async def run():
+        flights = SingleFlight()
+        started = asyncio.Event()
+        cancelled = []
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(None)
+                raise
+
+        first = asyncio.create_task(flights.run("k", work))
+        second = asyncio.create_task(flights.run("k", work))
+        await started.wait()
+
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await asyncio.sleep(0)
+        # The other caller still waits, so the work goes on
+        assert not cancelled
+        assert flights.stats()["in_flight"] == 1
+
+        second.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await second
+        await asyncio.sleep(0)
+        assert cancelled == [None]
+        assert flights.stats()["in_flight"] == 0
+
+    asyncio.run(run())
+
+
+def test_failure_reaches_every_caller_and_the_key_is_freed():
+    async def run():
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flights.run("k", work) for _ in range(2)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flights.stats()["in_flight"] == 0
+
+        async def retry():
+            return "ok"
+
+        assert await flights.run("k", retry) == "ok"
+
+    asyncio.run(run())